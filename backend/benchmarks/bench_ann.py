@@ -0,0 +1,139 @@
+"""
+Recall/latency benchmark for the FAISS index types selectable with FAISS_INDEX_FACTORY.
+
+For each corpus size, synthetic normalised vectors are drawn from a mixture of
+gaussian clusters, which is closer to real embeddings than uniform noise. Each
+index type is built the way faiss_store builds it (IDMap2 wrapper,
+inner-product metric). The script reports recall@k against the exact Flat
+index and p50/p99 single-query latency. Compressed factories (SQ/PQ) get a
+second "+rerank" row that re-scores k * FAISS_RERANK_FACTOR candidates
+against the full-precision vectors, as the API does.
+
+    python -m benchmarks.bench_ann
+    python -m benchmarks.bench_ann --sizes 10000 100000 --dim 384 --factories Flat HNSW32 "IVF{nlist},Flat"
+    python -m benchmarks.bench_ann --factories Flat SQ8 PQ96
+
+"{nlist}" in a factory string is replaced by 4*sqrt(n). At 1M vectors and
+768 dimensions the raw vectors alone take about 3 GB.
+"""
+import argparse
+import math
+import time
+
+import faiss
+import numpy as np
+
+from src.app.services.faiss_store import uses_rerank
+from src.app.services.vector_store import VectorStore
+from src.core.config import FAISS_EF_SEARCH, FAISS_NPROBE, FAISS_RERANK_FACTOR
+
+DEFAULT_FACTORIES = ["Flat", "HNSW32", "IVF{nlist},Flat", "SQ8", "IVF{nlist},SQ8"]
+
+
+def synthetic_vectors(n, dim, clusters, rng, chunk=100_000):
+    """Normalised vectors around `clusters` random centres, generated in chunks to bound peak memory."""
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        assignment = rng.integers(0, clusters, stop - start)
+        vectors[start:stop] = centres[assignment] + 0.6 * rng.standard_normal((stop - start, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def build_index(factory, vectors):
+    index = faiss.index_factory(vectors.shape[1], f"IDMap2,{factory}", faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        sample = vectors[:min(len(vectors), 256 * 1024)]
+        index.train(sample)
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+
+    parameter_space = faiss.ParameterSpace()
+    for name, value in (("efSearch", FAISS_EF_SEARCH), ("nprobe", FAISS_NPROBE)):
+        try:
+            parameter_space.set_index_parameter(index, name, value)
+        except RuntimeError:
+            continue
+    return index
+
+
+def rerank_search(index, store, queries, k):
+    found = []
+    for query in queries:
+        _, candidates = index.search(query.reshape(1, -1), k * FAISS_RERANK_FACTOR)
+        found.append(store.rerank(query, candidates[0], k)[0])
+    return found
+
+
+def single_query_latencies(search, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def report(n, name, build_seconds, found, truth, k, latencies, size_bytes):
+    print(f"{n:>9}  {name:<22} {build_seconds:>8.2f} {size_bytes / n:>9.0f} {recall_at_k(found, truth, k):>9.3f} "
+          f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f}")
+
+
+def recall_at_k(found, truth, k):
+    hits = sum(len(set(row[:k]) & set(expected[:k])) for row, expected in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--factories", nargs="+", default=DEFAULT_FACTORIES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Single-query latency is what a /search request pays
+    faiss.omp_set_num_threads(1)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"dim={args.dim} k={args.k} queries={args.queries} efSearch={FAISS_EF_SEARCH} nprobe={FAISS_NPROBE}\n")
+    print(f"{'n':>9}  {'index':<22} {'build s':>8} {'B/vector':>9} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    for n in args.sizes:
+        vectors = synthetic_vectors(n, args.dim, clusters=max(16, int(math.sqrt(n))), rng=rng)
+        queries = vectors[rng.integers(0, n, args.queries)] + 0.05 * rng.standard_normal(
+            (args.queries, args.dim)).astype(np.float32)
+        faiss.normalize_L2(queries)
+
+        # Ids are sorted, as the vector store requires; vectors stay in RAM here rather than mapped
+        store = VectorStore(np.arange(n, dtype=np.int64), vectors)
+        truth = None
+        for factory in args.factories:
+            name = factory.replace("{nlist}", str(int(4 * math.sqrt(n))))
+            start = time.perf_counter()
+            index = build_index(name, vectors)
+            build_seconds = time.perf_counter() - start
+
+            _, found = index.search(queries, args.k)
+            if truth is None:
+                if name != "Flat":
+                    truth = build_index("Flat", vectors).search(queries, args.k)[1]
+                else:
+                    truth = found
+            size_bytes = len(faiss.serialize_index(index))
+            latencies = single_query_latencies(lambda query: index.search(query.reshape(1, -1), args.k), queries)
+            report(n, name, build_seconds, found, truth, args.k, latencies, size_bytes)
+
+            if uses_rerank(name):
+                found = rerank_search(index, store, queries, args.k)
+                latencies = single_query_latencies(lambda query: rerank_search(index, store, [query], args.k), queries)
+                report(n, f"{name}+rerank", build_seconds, found, truth, args.k, latencies, size_bytes)
+            del index
+        print()
+
+
+if __name__ == "__main__":
+    main()
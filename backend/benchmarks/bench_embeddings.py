@@ -0,0 +1,121 @@
+"""
+Parity and throughput benchmark for the EMBEDDING_BACKEND options.
+
+Every backend embeds the same queries and documents. The torch fp32 output is
+the reference: the script reports the mean and minimum cosine similarity of
+each backend against it, p50/p99 single-query `embed_query` latency and
+`embed_documents` throughput. Texts are news-style headlines generated from a
+fixed vocabulary, or title + excerpt rows from Supabase with --from-db.
+
+    python -m benchmarks.bench_embeddings
+    python -m benchmarks.bench_embeddings --backends torch onnx-int8 --documents 512 --min-cosine 0.99
+    python -m benchmarks.bench_embeddings --from-db 500
+
+With --min-cosine the script exits non-zero when any backend falls below the
+threshold, so it can gate a backend switch.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from src.core.config import EMBEDDING_MODEL, LocalEmbeddingModel
+
+SUBJECTS = ["PSX", "Senate", "State Bank", "Pakistan cricket team", "Karachi police", "IMF", "Punjab government",
+            "National Assembly", "rupee", "petrol prices", "Supreme Court", "Met Office"]
+EVENTS = ["closes higher after", "rejects proposal on", "announces new measures for", "faces criticism over",
+          "reaches agreement on", "warns of delays in", "approves budget for", "launches inquiry into"]
+OBJECTS = ["interest rates", "electricity tariffs", "the monsoon season", "tax reforms", "the Asia Cup",
+           "gas shortages", "foreign exchange reserves", "provincial elections", "wheat procurement"]
+
+
+def synthetic_texts(count, rng, words=(6, 60)):
+    texts = []
+    for _ in range(count):
+        sentences = [f"{rng.choice(SUBJECTS)} {rng.choice(EVENTS)} {rng.choice(OBJECTS)}."
+                     for _ in range(max(1, int(rng.integers(*words)) // 8))]
+        texts.append(" ".join(sentences))
+    return texts
+
+
+def database_texts(limit):
+    from src.core.database import supabase
+
+    response = supabase.table('news_articles').select('title, excerpt').limit(limit).execute()
+    return [f"{row['title']} {row['excerpt']}" for row in response.data]
+
+
+def cosine_rows(a, b):
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def query_latencies(model, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        model.embed_query(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=256)
+    parser.add_argument("--from-db", type=int, metavar="N", help="use N title + excerpt rows from Supabase")
+    parser.add_argument("--min-cosine", type=float, help="fail when a backend's minimum cosine is below this")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.from_db:
+        documents = database_texts(args.from_db)
+        queries = [" ".join(text.split()[:6]) for text in documents[:args.queries]]
+    else:
+        documents = synthetic_texts(args.documents, rng)
+        queries = synthetic_texts(args.queries, rng, words=(3, 9))
+
+    # The reference is always torch fp32, even when it is not one of the benchmarked backends
+    reference = LocalEmbeddingModel(args.model, backend="torch")
+    reference_queries = np.array([reference.embed_query(query) for query in queries])
+    reference_documents = np.array(reference.embed_documents(documents))
+
+    print(f"model={args.model} queries={len(queries)} documents={len(documents)}\n")
+    print(f"{'backend':<10} {'load s':>7} {'q cos mean':>10} {'q cos min':>9} {'d cos min':>9} "
+          f"{'q p50 ms':>9} {'q p99 ms':>9} {'docs/s':>8}")
+
+    failed = []
+    for backend in args.backends:
+        start = time.perf_counter()
+        model = reference if backend == "torch" else LocalEmbeddingModel(args.model, backend=backend)
+        load_seconds = time.perf_counter() - start
+        if model.backend != backend:
+            print(f"{backend:<10} unavailable, see the warning above")
+            continue
+
+        # One warm-up call so lazy session setup is not timed
+        model.embed_query(queries[0])
+        latencies = query_latencies(model, queries)
+        start = time.perf_counter()
+        embedded = model.embed_documents(documents)
+        docs_per_second = len(documents) / (time.perf_counter() - start)
+
+        query_cosines = cosine_rows([model.embed_query(query) for query in queries], reference_queries)
+        document_cosines = cosine_rows(embedded, reference_documents)
+        print(f"{backend:<10} {load_seconds:>7.1f} {query_cosines.mean():>10.4f} {query_cosines.min():>9.4f} "
+              f"{document_cosines.min():>9.4f} {np.percentile(latencies, 50):>9.2f} "
+              f"{np.percentile(latencies, 99):>9.2f} {docs_per_second:>8.1f}")
+        if args.min_cosine is not None and min(query_cosines.min(), document_cosines.min()) < args.min_cosine:
+            failed.append(backend)
+
+    if failed:
+        print(f"\n[!] Below --min-cosine {args.min_cosine}: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
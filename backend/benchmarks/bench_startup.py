@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark for the API.
+
+Each run starts from a fresh interpreter and reports:
+  - import seconds for src.core.config and src.app.main (heavy libraries should
+    not be pulled in by either),
+  - seconds until uvicorn answers GET / (live) and GET /ready with 200 (model
+    and index loaded and warmed up),
+  - latency of the first /search once ready.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --port 8765 --query "petrol prices"
+
+The server reads the usual environment (.env, INDEX_SOURCE_DIR, EMBEDDING_BACKEND, ...).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+IMPORT_PROBE = (
+    "import sys, time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start, 'sentence_transformers' in sys.modules, 'torch' in sys.modules)"
+)
+
+
+def import_seconds(module):
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(module=module)],
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), output[1] == "True" or output[2] == "True"
+
+
+def request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return None
+
+
+def wait_for(url, start, timeout):
+    while time.perf_counter() - start < timeout:
+        if request(url) == 200:
+            return time.perf_counter() - start
+        time.sleep(0.05)
+    return None
+
+
+def server_run(port, query, timeout):
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.app.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "INDEX_POLL_INTERVAL": "0"}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        live = wait_for(f"{base}/", start, timeout)
+        ready = wait_for(f"{base}/ready", start, timeout) if live is not None else None
+        first_search = None
+        if ready is not None:
+            search_start = time.perf_counter()
+            if request(f"{base}/search", {"query": query, "max_articles": 3}) == 200:
+                first_search = (time.perf_counter() - search_start) * 1000
+        return live, ready, first_search
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summary(values, unit):
+    values = [value for value in values if value is not None]
+    if not values:
+        return "n/a"
+    return f"median {np.median(values):.2f}{unit}  max {max(values):.2f}{unit}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--query", default="rupee against the dollar")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for the server per run")
+    args = parser.parse_args()
+
+    for module in ("src.core.config", "src.app.main"):
+        runs = [import_seconds(module) for _ in range(args.runs)]
+        heavy = any(loaded for _, loaded in runs)
+        print(f"import {module:<16} {summary([seconds for seconds, _ in runs], 's')}"
+              f"{'  [!] imports sentence_transformers/torch' if heavy else ''}")
+
+    results = [server_run(args.port, args.query, args.timeout) for _ in range(args.runs)]
+    live, ready, first_search = zip(*results)
+    print(f"GET / live           {summary(live, 's')}")
+    print(f"GET /ready 200       {summary(ready, 's')}")
+    print(f"first /search        {summary(first_search, 'ms')}")
+    if None in ready:
+        print("[!] The server did not become ready in every run, check GET /ready for errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare the HF zero-shot classifier with the local embedding-prototype classifier.
+
+Labelled articles are read from Supabase. Their stored categories were produced
+by the HF backend, so without hand labels the articles are split in two:
+prototypes are built from the first half, the local backend classifies the
+second half and reports its agreement with HF, and the HF row reports latency
+only (scoring HF against its own labels says nothing about accuracy). Stored
+"Others" articles are not read, so that label is not measured either.
+
+With --labels, a JSON-lines file of hand-labelled articles ({"title",
+"excerpt", "category"}, where category may be "Others") is the evaluation set,
+prototypes are built from all stored articles and both backends report
+accuracy against the hand labels.
+
+    python -m benchmarks.compare_classifiers --limit 200
+    python -m benchmarks.compare_classifiers --labels hand_labels.jsonl
+"""
+import argparse
+import json
+import time
+
+from src.core.config import get_embedding_model
+from src.scraper import classifier
+from src.scraper.prototype_classifier import PrototypeClassifier, fetch_labelled_articles
+
+
+def _timed(fn, texts):
+    start = time.perf_counter()
+    labels = fn(texts)
+    return labels, time.perf_counter() - start
+
+
+def _report(name, labels, expected, elapsed, metric):
+    """Print per-article latency and, unless metric is None, the share of labels matching expected."""
+    scored = [(label, truth) for label, truth in zip(labels, expected) if label != classifier.UNCATEGORIZED]
+    per_article_ms = elapsed / len(expected) * 1000 if expected else 0.0
+    line = f"{name:<12} latency={per_article_ms:8.2f} ms/article  classified={len(scored)}/{len(expected)}"
+    if metric is not None:
+        matched = sum(label == truth for label, truth in scored) / len(scored) if scored else 0.0
+        line += f"  {metric}={matched:6.1%}"
+    print(line)
+
+
+def read_hand_labels(path):
+    """Hand-labelled articles from a JSON-lines file; categories are CATEGORIES or "Others"."""
+    with open(path, encoding="utf-8") as f:
+        articles = [json.loads(line) for line in f if line.strip()]
+    unknown = {article['category'] for article in articles} - set(classifier.CATEGORIES) - {"Others"}
+    if unknown:
+        raise ValueError(f"Unknown categories in {path}: {sorted(unknown)}")
+    return articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=200, help="labelled articles to read")
+    parser.add_argument("--labels", help="JSON-lines file of hand-labelled articles to evaluate on")
+    parser.add_argument("--skip-hf", action="store_true", help="only time the local backend")
+    args = parser.parse_args()
+
+    articles = fetch_labelled_articles(args.limit)
+    if args.labels:
+        train, test = articles, read_hand_labels(args.labels)
+        local_metric = hf_metric = "accuracy"
+    else:
+        train, test = articles[::2], articles[1::2]
+        local_metric, hf_metric = "agreement with HF", None
+    if not train or not test:
+        print("[!] Not enough labelled articles to compare")
+        return
+
+    texts = [f"{article['title']} {article['excerpt']}" for article in test]
+    expected = [article['category'] for article in test]
+    print(f"Prototypes from {len(train)} articles, evaluating on {len(test)}\n")
+
+    start = time.perf_counter()
+    local = PrototypeClassifier(get_embedding_model(), train)
+    print(f"Prototype build: {time.perf_counter() - start:.2f}s (includes model load)")
+
+    labels, elapsed = _timed(local.classify, texts)
+    _report("embedding", labels, expected, elapsed, local_metric)
+
+    # Embeddings are cached now, so this isolates the scoring cost
+    vectors = local.embed(texts)
+    labels, elapsed = _timed(local.classify_vectors, vectors)
+    _report("proto-only", labels, expected, elapsed, local_metric)
+
+    if not args.skip_hf:
+        # Bypass the label cache so every article costs a real request
+        labels, elapsed = _timed(
+            lambda batch: [label for i in range(0, len(batch), classifier.BATCH_SIZE)
+                           for label in classifier._classify_batch(batch[i:i + classifier.BATCH_SIZE])],
+            texts,
+        )
+        _report("hf", labels, expected, elapsed, hf_metric)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from src.scraper.scraper_new import scrape_once, check_supabase_connection
 from src.app.services.faiss_store import faiss_create
+from src.core.config import CHECK_INTERVAL
 from rich.console import Console
 from rich.panel import Panel
 from rich import print
@@ -45,9 +46,9 @@ def run_scraping_cycle():
 
 
 if __name__ == "__main__":
-    console.print("[bold blue]Starting continuous scraping every 2 hours...[/bold blue]\n")
+    console.print(f"[bold blue]Starting continuous scraping every {CHECK_INTERVAL // 60} minutes...[/bold blue]\n")
     while True:
         run_scraping_cycle()
         faiss_create()
-        console.print("[i]Waiting 2 hours before next cycle...[/i]\n")
-        time.sleep(7200)
+        console.print(f"[i]Waiting {CHECK_INTERVAL // 60} minutes before next cycle...[/i]\n")
+        time.sleep(CHECK_INTERVAL)
@@ -1,18 +1,33 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from src.app.routes import query, summarize
-from src.app.services.rag import load_faiss_index
+from src.app.services.answer_cache import answer_cache
+from src.app.services.batcher import retrieval_batcher
+from src.app.services.executor import search_executor
+from src.app.services import rag
+from src.app.services.rag import query_embedding_cache, watch_index
+from src.app.services.startup import readiness, warm_up
+from src.app.services.summaries import summary_cache
+from src.core.config import INDEX_POLL_INTERVAL
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    if not load_faiss_index():
-        print("Warning: FAISS index not loaded. API will not work properly.")
+    # Model, index and LLM client load in the background so the server starts listening at once;
+    # GET /ready turns 200 once start-up has finished with both the model and an index loaded
+    startup = asyncio.create_task(warm_up())
+    watcher = asyncio.create_task(watch_index(INDEX_POLL_INTERVAL)) if INDEX_POLL_INTERVAL > 0 else None
     yield
+    startup.cancel()
+    if watcher is not None:
+        watcher.cancel()
+    search_executor.shutdown(wait=False)
 
 
 app = FastAPI(
@@ -39,6 +54,25 @@ async def root():
     return {"message": "News RAG API is running", "status": "healthy"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness check: 503 until start-up has finished and the embedding model and index are loaded."""
+    current = readiness()
+    return JSONResponse(status_code=200 if current["ready"] else 503, content=current)
+
+
+@app.get("/stats")
+async def stats():
+    """Cache hit rates, retrieval batch sizes and loaded index version for this worker."""
+    return {
+        "index_version": rag.index_version,
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "summary_cache": summary_cache.stats(),
+        "retrieval_batches": retrieval_batcher.stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     PORT = int(os.environ.get("PORT", 8000))
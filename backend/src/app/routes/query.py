@@ -1,22 +1,43 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
-from src.app.schemas.models import QueryRequest, RAGResponse, ArticleSummary
-from src.app.services.rag import retrieve_articles
-from src.app.services.llm import generate_summary
+from src.app.schemas.models import (
+    ArticleSummary,
+    BatchSearchRequest,
+    BatchSearchResponse,
+    QueryRequest,
+    RAGResponse,
+    SearchResult,
+)
+from src.app.services.answer_cache import stream_with_cache, summarize_with_cache
+from src.app.services.batcher import retrieval_batcher
+from src.app.services.executor import run_in_search_executor
+from src.app.services.rag import query_vector_or_none, retrieve_batch
+from src.app.services.streaming import SSE_HEADERS, sse_event
 
 router = APIRouter()
 
 
+def _retrieve(request: QueryRequest):
+    """Run retrieval for a request, with its filters, batched with concurrent requests."""
+    return retrieval_batcher.submit({
+        "query": request.query, "k": request.max_articles, "category": request.category,
+        "source": request.source, "since": request.since,
+    })
+
+
 @router.post("/query", response_model=RAGResponse)
 async def query_articles(request: QueryRequest):
     """Main RAG endpoint - retrieve articles and generate summary."""
     try:
-        articles = retrieve_articles(request.query, request.max_articles)
+        articles = await _retrieve(request)
 
         if not articles:
             raise HTTPException(status_code=404, detail="No relevant articles found")
 
-        summary = generate_summary(request.query, articles)
+        # Already in the query-embedding cache from retrieval
+        query_vector = await run_in_search_executor(query_vector_or_none, request.query)
+        summary = await summarize_with_cache(request.query, articles, query_vector)
         articles_used = [ArticleSummary(**article) for article in articles]
 
         return RAGResponse(
@@ -30,14 +51,69 @@ async def query_articles(request: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 
+@router.post("/query/stream")
+async def query_articles_stream(request: QueryRequest):
+    """
+    Streaming RAG endpoint (server-sent events): an `articles` event as soon as
+    retrieval finishes, `token` events while Gemini generates, then a `result`
+    event carrying the full RAGResponse.
+    """
+    try:
+        articles = await _retrieve(request)
+        query_vector = await run_in_search_executor(query_vector_or_none, request.query)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+    if not articles:
+        raise HTTPException(status_code=404, detail="No relevant articles found")
+
+    articles_used = [ArticleSummary(**article) for article in articles]
+
+    async def events():
+        yield sse_event("articles", [article.model_dump() for article in articles_used])
+        try:
+            chunks = []
+            async for chunk in stream_with_cache(request.query, articles, query_vector):
+                chunks.append(chunk)
+                yield sse_event("token", {"text": chunk})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Error processing query: {str(e)}"})
+            return
+
+        response = RAGResponse(query=request.query, summary="".join(chunks), articles_used=articles_used)
+        yield sse_event("result", response.model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/search")
 async def search_articles(request: QueryRequest):
     """Search for articles without generating summary."""
     try:
-        articles = retrieve_articles(request.query, request.max_articles)
+        articles = await _retrieve(request)
         return {
             "query": request.query,
             "articles": [ArticleSummary(**article) for article in articles],
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching articles: {str(e)}")
+
+
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_articles_batch(request: BatchSearchRequest):
+    """Search many queries at once: one encode batch and one FAISS search per filter combination."""
+    searches = [
+        {"query": search.query, "k": search.max_articles, "category": search.category,
+         "source": search.source, "since": search.since}
+        for search in request.queries
+    ]
+    try:
+        results = await run_in_search_executor(retrieve_batch, searches)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching articles: {str(e)}")
+    return BatchSearchResponse(results=[
+        SearchResult(query=search.query, articles=[ArticleSummary(**article) for article in articles])
+        for search, articles in zip(request.queries, results)
+    ])
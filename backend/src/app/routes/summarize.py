@@ -1,16 +1,18 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
 from src.app.schemas.models import URLSummaryRequest, URLSummaryResponse
 from src.app.services.rag import get_article_by_url
-from src.app.services.llm import generate_article_summary
+from src.app.services.streaming import SSE_HEADERS, sse_event
+from src.app.services.summaries import get_or_create_summary, stream_summary
 
 router = APIRouter()
 
 
-@router.post("/summarize-url", response_model=URLSummaryResponse)
-async def summarize_by_url(request: URLSummaryRequest):
-    """Summarize a specific article by URL."""
-    article = get_article_by_url(request.url)
+async def _get_summarizable_article(url):
+    article = await asyncio.to_thread(get_article_by_url, url)
 
     if not article:
         raise HTTPException(status_code=404, detail="Article not found in database")
@@ -18,8 +20,16 @@ async def summarize_by_url(request: URLSummaryRequest):
     if not article.get('content') or article['content'] == 'No content found.':
         raise HTTPException(status_code=400, detail="Article content is not available")
 
+    return article
+
+
+@router.post("/summarize-url", response_model=URLSummaryResponse)
+async def summarize_by_url(request: URLSummaryRequest):
+    """Summarize a specific article by URL."""
+    article = await _get_summarizable_article(request.url)
+
     try:
-        summary = generate_article_summary(article)
+        summary = await get_or_create_summary(article)
 
         return URLSummaryResponse(
             url=article['url'],
@@ -30,3 +40,40 @@ async def summarize_by_url(request: URLSummaryRequest):
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
+
+
+@router.post("/summarize-url/stream")
+async def summarize_by_url_stream(request: URLSummaryRequest):
+    """
+    Streaming variant of /summarize-url (server-sent events): an `article` event,
+    `token` events while Gemini generates, then a `result` event carrying the
+    full URLSummaryResponse.
+    """
+    article = await _get_summarizable_article(request.url)
+
+    async def events():
+        yield sse_event("article", {
+            "url": article['url'],
+            "title": article['title'],
+            "category": article.get('category', 'Unknown'),
+            "source": article.get('source', 'geo'),
+        })
+        try:
+            chunks = []
+            async for chunk in stream_summary(article):
+                chunks.append(chunk)
+                yield sse_event("token", {"text": chunk})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Error generating summary: {str(e)}"})
+            return
+
+        response = URLSummaryResponse(
+            url=article['url'],
+            title=article['title'],
+            summary="".join(chunks),
+            category=article.get('category', 'Unknown'),
+            source=article.get('source', 'geo'),
+        )
+        yield sse_event("result", response.model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
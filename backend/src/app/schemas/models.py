@@ -1,10 +1,16 @@
-from pydantic import BaseModel
-from typing import List
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from src.core.config import MAX_ARTICLES, MAX_BATCH_QUERIES
 
 
 class QueryRequest(BaseModel):
     query: str
-    max_articles: int = 3
+    max_articles: int = Field(3, ge=1, le=MAX_ARTICLES)
+    category: Optional[str] = None
+    source: Optional[str] = None
+    since: Optional[datetime] = None  # only articles published at or after this time
 
 
 class ArticleSummary(BaseModel):
@@ -16,6 +22,20 @@ class ArticleSummary(BaseModel):
     relevance_score: float
 
 
+class BatchSearchRequest(BaseModel):
+    # Each entry has its own max_articles and filters
+    queries: List[QueryRequest] = Field(max_length=MAX_BATCH_QUERIES)
+
+
+class SearchResult(BaseModel):
+    query: str
+    articles: List[ArticleSummary]
+
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResult]
+
+
 class RAGResponse(BaseModel):
     query: str
     summary: str
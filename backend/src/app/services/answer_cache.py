@@ -0,0 +1,102 @@
+"""Cache of /query summaries scoped to the loaded FAISS index version."""
+import threading
+
+import numpy as np
+
+from src.app.services import rag
+from src.app.services.cache import LRUCache
+from src.app.services.llm import agenerate_summary, astream_summary
+from src.core.config import ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL
+
+
+class AnswerCache:
+    """
+    Summaries keyed by the ordered article ids retrieval returned. Within one id
+    list an entry matches on the normalised query or, when a similarity threshold
+    is set, on a query embedding at least that close to the cached one.
+    """
+
+    def __init__(self, maxsize=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL, similarity_threshold=ANSWER_CACHE_SIMILARITY):
+        self.similarity_threshold = similarity_threshold
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = LRUCache(maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def _use_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, query, article_ids, version, query_vector=None):
+        with self._lock:
+            self._use_version(version)
+            normalized = rag.normalize_query(query)
+            for cached_query, cached_vector, summary in self._entries.get(tuple(article_ids), ()):
+                if cached_query == normalized:
+                    self.hits += 1
+                    return summary
+                if (
+                    self.similarity_threshold
+                    and query_vector is not None
+                    and cached_vector is not None
+                    and float(np.dot(query_vector, cached_vector)) >= self.similarity_threshold
+                ):
+                    self.hits += 1
+                    return summary
+            self.misses += 1
+            return None
+
+    def set(self, query, article_ids, version, summary, query_vector=None):
+        with self._lock:
+            if self.version is not None and version != self.version:
+                # Generated against an index that has since been replaced
+                return
+            self._use_version(version)
+            key = tuple(article_ids)
+            entries = [entry for entry in self._entries.get(key, ()) if entry[0] != rag.normalize_query(query)]
+            entries.append((rag.normalize_query(query), query_vector, summary))
+            self._entries.set(key, entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "index_version": self.version,
+        }
+
+
+answer_cache = AnswerCache()
+
+
+async def summarize_with_cache(query, articles, query_vector=None):
+    """Return the cached summary for this query and result list, generating it on a miss."""
+    article_ids = [article['id'] for article in articles]
+    version = rag.index_version
+
+    summary = answer_cache.get(query, article_ids, version, query_vector)
+    if summary is None:
+        summary = await agenerate_summary(query, articles)
+        answer_cache.set(query, article_ids, version, summary, query_vector)
+    return summary
+
+
+async def stream_with_cache(query, articles, query_vector=None):
+    """Yield summary text chunks, replaying a cached answer as a single chunk."""
+    article_ids = [article['id'] for article in articles]
+    version = rag.index_version
+
+    summary = answer_cache.get(query, article_ids, version, query_vector)
+    if summary is not None:
+        yield summary
+        return
+
+    chunks = []
+    async for chunk in astream_summary(query, articles):
+        chunks.append(chunk)
+        yield chunk
+    answer_cache.set(query, article_ids, version, "".join(chunks), query_vector)
@@ -0,0 +1,101 @@
+"""Coalesce concurrent retrieval calls into batched encodes and FAISS searches."""
+import asyncio
+
+from src.app.services.executor import run_in_search_executor
+from src.app.services.rag import retrieve_batch
+from src.core.config import SEARCH_BATCH_SIZE, SEARCH_BATCH_WAIT
+
+
+class MicroBatcher:
+    """
+    Queue single items from concurrent requests and run them through
+    run_batch(items) -> results on the search executor. A batch is sent when
+    max_batch items are waiting or max_wait seconds after its first item, and
+    each caller gets the result at its own position.
+    """
+
+    def __init__(self, run_batch, max_batch, max_wait):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        # Batches that failed and were retried item by item
+        self.retried_batches = 0
+        # Power-of-two bucket (1, 2, 4, ...) -> number of batches whose size fell in [bucket, 2 * bucket)
+        self.size_histogram = {}
+        self._pending = []
+        self._timer = None
+        # Running batches, referenced so they are not garbage-collected mid-flight
+        self._running = set()
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        bucket = 1 << (len(batch).bit_length() - 1)
+        self.size_histogram[bucket] = self.size_histogram.get(bucket, 0) + 1
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_one(self, item):
+        """Result of a batch of one item, or the exception it raised."""
+        try:
+            return (await run_in_search_executor(self.run_batch, [item]))[0]
+        except Exception as e:
+            return e
+
+    async def _run(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = await run_in_search_executor(self.run_batch, items)
+        except Exception as e:
+            if len(items) == 1:
+                results = [e]
+            else:
+                # Retry items one at a time so a bad request only fails its own caller
+                self.retried_batches += 1
+                results = await asyncio.gather(*(self._run_one(item) for item in items))
+        for (_, future), result in zip(batch, results):
+            # Callers that disconnected have already cancelled their future
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait": self.max_wait,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "retried_batches": self.retried_batches,
+            "size_histogram": {str(bucket): count for bucket, count in sorted(self.size_histogram.items())},
+        }
+
+
+# /query, /query/stream and /search retrievals; one batch is one retrieve_batch call
+retrieval_batcher = MicroBatcher(retrieve_batch, SEARCH_BATCH_SIZE, SEARCH_BATCH_WAIT)
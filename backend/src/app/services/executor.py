@@ -0,0 +1,14 @@
+"""Bounded thread pool that keeps CPU-bound retrieval off the event loop."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from src.core.config import SEARCH_WORKERS
+
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+
+
+async def run_in_search_executor(fn, *args, **kwargs):
+    """Run query encoding / FAISS search on the search pool and await the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(search_executor, partial(fn, *args, **kwargs))
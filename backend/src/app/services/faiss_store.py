@@ -1,75 +1,436 @@
 import faiss
+import hashlib
+import os
+import tempfile
 import numpy as np
-import pickle
-import io
+from datetime import datetime
+from itertools import islice
 
-from src.core.config import get_embedding_dimension, get_embedding_model
+from src.app.services.index_artifacts import FAISS_FILE, META_FILE, download, download_manifest, fetch, publish
+from src.app.services.lexical import LEXICAL_FILE, BM25Index
+from src.app.services.metadata_store import MetadataStore, encode_metadata
+from src.app.services.passages import PASSAGES_FILE, PassageWriter, passage_ids
+from src.app.services.vector_store import (
+    VECTOR_IDS_FILE,
+    VECTORS_FILE,
+    VectorStore,
+    VectorStoreWriter,
+)
+from src.core.config import (
+    EMBEDDING_MODEL,
+    FAISS_INDEX_FACTORY,
+    FAISS_RERANK_FACTOR,
+    FAISS_TRAIN_SIZE,
+    INDEX_BUILD_BATCH,
+    MAX_PASSAGES,
+    PASSAGE_OVERLAP,
+    PASSAGE_WORDS,
+    get_embedding_dimension,
+    get_embedding_model,
+)
 from src.core.database import supabase
+from src.core.embedding_cache import cached_embed_documents
 
-BUCKET_NAME = "Faiss"
-FAISS_FILE = "faiss_index.bin"
-META_FILE = "metadata.pkl"
 
+def article_text(article):
+    """Title and excerpt: the first passage of every article and its BM25 document."""
+    return f"{article['title']} {article['excerpt']}"
 
-def fetch_articles():
-    """Get all articles from database."""
+
+def split_passages(text, size=PASSAGE_WORDS, overlap=PASSAGE_OVERLAP):
+    """Windows of `size` words, each starting `size - overlap` words after the previous one."""
+    words = (text or "").split()
+    if not words:
+        return []
+    step = max(size - overlap, 1)
+    return [" ".join(words[start:start + size]) for start in range(0, max(len(words) - overlap, 1), step)]
+
+
+def article_passages(article):
+    """Texts embedded for an article; content windows carry the title so they stand on their own."""
+    windows = [f"{article['title']}: {window}" for window in split_passages(article.get('content'))]
+    return ([article_text(article)] + windows)[:MAX_PASSAGES]
+
+
+def text_hash(text):
+    """Stable hash used to detect articles whose embedded text changed."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def published_timestamp(article):
+    """Epoch seconds of publish_time, falling back to scraped_at; 0 when neither parses."""
+    for field in ('publish_time', 'scraped_at'):
+        try:
+            return int(datetime.fromisoformat(article[field]).timestamp())
+        except (KeyError, TypeError, ValueError):
+            continue
+    return 0
+
+
+def passages_hash(passages):
+    return text_hash("\n".join(passages))
+
+
+def article_metadata(article, passages=None):
+    """The fields stored in the index metadata for one database row."""
+    passages = article_passages(article) if passages is None else passages
+    return {
+        'id': article['id'],
+        'title': article['title'],
+        'excerpt': article['excerpt'],
+        'url': article['url'],
+        'category': article['category'],
+        'source': article.get('source'),
+        'published_at': published_timestamp(article),
+        'passages': len(passages),
+        'text_hash': passages_hash(passages),
+    }
+
+
+def uses_rerank(factory=FAISS_INDEX_FACTORY):
+    """Scalar and product quantizers store lossy codes, so their candidates are re-scored exactly."""
+    return FAISS_RERANK_FACTOR > 1 and ("SQ" in factory or "PQ" in factory)
+
+
+def index_header(factory=FAISS_INDEX_FACTORY):
+    """
+    Settings an index was built with; an index built with other settings is
+    rebuilt. `factory` is the one actually built, which differs from
+    FAISS_INDEX_FACTORY after a training fallback.
+    """
+    return {
+        "model": EMBEDDING_MODEL,
+        "index_factory": factory,
+        "passage_words": PASSAGE_WORDS,
+        "passage_overlap": PASSAGE_OVERLAP,
+        "max_passages": MAX_PASSAGES,
+    }
+
+
+def fetch_articles(page_size=INDEX_BUILD_BATCH):
+    """Yield all articles in id order, one page at a time, so full contents are never all in memory."""
     print("Fetching articles from database...")
-    response = supabase.table('news_articles').select('id, title, excerpt, url, category, source').execute()
-    print(f"Found {len(response.data)} articles")
-    return response.data
+    start = 0
+    while True:
+        response = (
+            supabase.table('news_articles')
+            .select('id, title, excerpt, content, url, category, source, publish_time, scraped_at')
+            .order('id')
+            .range(start, start + page_size - 1)
+            .execute()
+        )
+        yield from response.data
+        start += len(response.data)
+        if len(response.data) < page_size:
+            break
+    print(f"Found {start} articles")
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 
 def generate_embeddings(articles):
-    """Create embeddings for title + excerpt."""
+    """Embed every passage of the articles; returns (passage embeddings, one metadata dict per article)."""
     embedding_model = get_embedding_model()
     if embedding_model is None:
         raise RuntimeError("Local embedding model is not configured")
 
-    print("Generating embeddings...")
+    if not articles:
+        return np.empty((0, get_embedding_dimension()), dtype=np.float32), []
+
+    print(f"Generating embeddings for {len(articles)} article(s)...")
     texts, metadata = [], []
 
     for article in articles:
-        text = f"{article['title']} {article['excerpt']}"
-        texts.append(text)
-        metadata.append(article)
-
-    embeddings = embedding_model.embed_documents(texts)
+        passages = article_passages(article)
+        texts.extend(passages)
+        metadata.append(article_metadata(article, passages))
 
-    return np.array(embeddings, dtype=np.float32), metadata
+    embeddings = cached_embed_documents(embedding_model, texts)
 
+    return np.array(embeddings, dtype=np.float32).reshape(len(texts), -1), metadata
 
-def create_faiss_index(embeddings, metadata):
-    """Create FAISS index and upload to Supabase storage."""
-    print("Creating FAISS index...")
 
+def build_faiss_index(embeddings, ids):
+    """
+    Build an ID-mapped FAISS index so rows can be added and removed by passage id.
+    Embeddings are normalised, so the inner-product metric scores cosine similarity.
+    Returns (index, factory actually used).
+    """
     embedding_dimension = get_embedding_dimension()
     if embedding_dimension is None:
         raise RuntimeError("Embedding dimension is not configured")
 
-    index = faiss.IndexFlatL2(embedding_dimension)
-    index.add(embeddings)
+    index = faiss.index_factory(embedding_dimension, f"IDMap2,{FAISS_INDEX_FACTORY}", faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        try:
+            index.train(embeddings)
+        except RuntimeError as e:
+            # IVF/PQ need more training vectors than a near-empty table provides. The header records
+            # Flat, so the next update sees a factory mismatch and tries FAISS_INDEX_FACTORY again
+            print(f"[!] {'!' * 60}")
+            print(f"[!] Could not train {FAISS_INDEX_FACTORY} on {len(embeddings)} vectors: {e}")
+            print(f"[!] Publishing a Flat index instead; the next update retries {FAISS_INDEX_FACTORY}")
+            print(f"[!] {'!' * 60}")
+            index = faiss.index_factory(embedding_dimension, "IDMap2,Flat", faiss.METRIC_INNER_PRODUCT)
+            factory = "Flat"
+        else:
+            factory = FAISS_INDEX_FACTORY
+    else:
+        factory = FAISS_INDEX_FACTORY
+
+    if len(ids):
+        index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+    return index, factory
+
+
+def new_passage_ids(metadata):
+    return passage_ids([article['id'] for article in metadata],
+                       [article['passages'] for article in metadata], MAX_PASSAGES)
+
+
+class IndexBuilder:
+    """
+    Adds passage vectors batch by batch. A new index that needs training
+    buffers the first FAISS_TRAIN_SIZE vectors, trains on them and then
+    streams the rest straight into the index.
+    """
+
+    def __init__(self, index=None):
+        if index is None:
+            fresh = faiss.index_factory(get_embedding_dimension(), f"IDMap2,{FAISS_INDEX_FACTORY}",
+                                        faiss.METRIC_INNER_PRODUCT)
+            # Flat and HNSW need no training and take vectors as they come
+            index = fresh if fresh.is_trained else None
+        self.index = index
+        # Factory of the index being filled: FAISS_INDEX_FACTORY, or Flat after a training fallback
+        self.factory = FAISS_INDEX_FACTORY
+        self._pending_ids = []
+        self._pending = []
+        self._buffered = 0
+
+    def add(self, ids, embeddings):
+        if not len(ids):
+            return
+        if self.index is not None:
+            self.index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+            return
+        self._pending_ids.append(np.asarray(ids, dtype=np.int64))
+        self._pending.append(np.asarray(embeddings, dtype=np.float32))
+        self._buffered += len(ids)
+        if self._buffered >= FAISS_TRAIN_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            ids, embeddings = np.concatenate(self._pending_ids), np.concatenate(self._pending)
+        else:
+            ids, embeddings = np.empty(0, dtype=np.int64), np.empty((0, get_embedding_dimension()), dtype=np.float32)
+        self._pending_ids, self._pending = [], []
+        self.index, self.factory = build_faiss_index(embeddings, ids)
+
+    def finish(self):
+        if self.index is None:
+            self._flush()
+        return self.index
+
+
+def upload_faiss_index(index, metadata, passages=None, store=None, factory=FAISS_INDEX_FACTORY):
+    """
+    Serialize the index, its id-keyed article metadata and the BM25 index over
+    the same articles, then publish them to Supabase storage under a new
+    manifest together with the passage texts and, for compressed indexes, the
+    (ids, vectors) store. `passages` and `store` are paths of spooled files;
+    `factory` is the index type actually built.
+    """
+    artifacts = {
+        FAISS_FILE: bytes(faiss.serialize_index(index)),
+        META_FILE: encode_metadata(metadata, **index_header(factory)),
+        LEXICAL_FILE: BM25Index.build(
+            (article_id, article_text(article)) for article_id, article in metadata.items()
+        ).to_bytes(),
+    }
+    if passages is not None:
+        artifacts[PASSAGES_FILE] = passages
+    if store is not None:
+        artifacts[VECTOR_IDS_FILE], artifacts[VECTORS_FILE] = store
+
+    manifest = publish(artifacts, index_factory=factory)
+    print(f"[i] Published {factory} index version {manifest['version']}")
+
+
+def download_vector_store():
+    """Download the full-precision vector store published with the index, or None if it is missing."""
+    files = (download_manifest() or {}).get("files", {})
+    if VECTORS_FILE not in files or VECTOR_IDS_FILE not in files:
+        print("[i] No full-precision vectors published with the index")
+        return None
+    try:
+        # Kept in the local checksum cache and memory-mapped, like the API does, so the
+        # vectors are not held in memory while the index is updated
+        ids_path, _ = fetch(VECTOR_IDS_FILE, files[VECTOR_IDS_FILE]["sha256"])
+        vectors_path, _ = fetch(VECTORS_FILE, files[VECTORS_FILE]["sha256"])
+        store = VectorStore.open(ids_path, vectors_path)
+    except Exception as e:
+        print(f"[!] Could not load full-precision vectors: {e}")
+        return None
+    vectors = store.vectors
+    if vectors.ndim != 2 or len(store.ids) != len(vectors) or vectors.shape[1] != get_embedding_dimension():
+        print("[i] Full-precision vectors do not match this model, rebuilding")
+        return None
+    return store
+
+
+def download_faiss_index():
+    """Download the current index and metadata, or (None, None) if they cannot be updated in place."""
+    try:
+        faiss_bytes = download(FAISS_FILE)
+        meta_bytes = download(META_FILE)
+        index = faiss.deserialize_index(np.frombuffer(faiss_bytes, dtype=np.uint8))
+        stored = MetadataStore.from_bytes(meta_bytes)
+    except Exception as e:
+        # Also the case for indexes published with pickled metadata
+        print(f"[!] Could not load existing FAISS index: {e}")
+        return None, None
+
+    header = index_header()
+    if stored.header.get("model") != EMBEDDING_MODEL:
+        print("[i] Existing index was built with another embedding model, rebuilding")
+        return None, None
+    if stored.header.get("index_factory") != FAISS_INDEX_FACTORY or index.metric_type != faiss.METRIC_INNER_PRODUCT:
+        print(f"[i] Existing index is a {stored.header.get('index_factory')} index, not a {FAISS_INDEX_FACTORY} "
+              f"inner-product index, rebuilding")
+        return None, None
+    if any(stored.header.get(name) != header[name] for name in ("passage_words", "passage_overlap", "max_passages")):
+        # Also the case for article-level indexes built before passages existed
+        print("[i] Existing index was built with other passage settings, rebuilding")
+        return None, None
+    if not isinstance(index, faiss.IndexIDMap2) or index.d != get_embedding_dimension():
+        print("[i] Existing index is not ID-mapped for this model, rebuilding")
+        return None, None
+
+    return index, dict(stored.items())
+
+
+def supports_removal(index):
+    """
+    Whether ids can be removed in place. HNSW graphs cannot delete vectors, and
+    IVF lists keep their internal ids while IDMap2 compacts its id map, so every
+    later hit would be attributed to the wrong passage.
+    """
+    inner = getattr(index, "index", None)
+    if inner is not None and isinstance(faiss.downcast_index(inner), faiss.IndexIVF):
+        return False
+    # Probing with no ids tells without touching the index
+    try:
+        index.remove_ids(np.empty(0, dtype=np.int64))
+    except RuntimeError:
+        return False
+    return True
+
+
+def diff_articles(articles, indexed):
+    """Split database rows into articles to embed and ids to drop from the index."""
+    to_embed, to_remove = [], []
+    current_ids = set()
+
+    for article in articles:
+        current_ids.add(article['id'])
+        previous = indexed.get(article['id'])
+        if previous is None:
+            to_embed.append(article)
+        elif previous.get('text_hash') != passages_hash(article_passages(article)):
+            to_remove.append(article['id'])
+            to_embed.append(article)
+
+    to_remove.extend(article_id for article_id in indexed if article_id not in current_ids)
+    return to_embed, to_remove
+
+
+def indexed_passage_ids(indexed, ids):
+    return passage_ids(ids, [indexed[article_id]['passages'] for article_id in ids], MAX_PASSAGES)
+
+
+def update_faiss_index(articles, full_rebuild=False):
+    """
+    Stream articles in batches of INDEX_BUILD_BATCH: embed the passages of new
+    or changed articles, drop those of changed and deleted ones and republish.
+    Passage texts and full-precision vectors are spooled to disk and the
+    embedding cache is memory-mapped and saved after every batch, so memory is
+    bounded by one batch plus the index itself. Indexes that cannot delete
+    vectors (HNSW) are rebuilt; the embedding cache keeps that cheap.
+    """
+    index, indexed = (None, None) if full_rebuild else download_faiss_index()
+    old_store = None
+    if index is not None and uses_rerank():
+        old_store = download_vector_store()
+        expected = np.sort(indexed_passage_ids(indexed, list(indexed)))
+        if old_store is None or not np.array_equal(old_store.ids, expected):
+            print("[i] Full-precision vectors do not match the index, rebuilding")
+            index = None
+    if index is not None and not supports_removal(index):
+        print(f"[i] {FAISS_INDEX_FACTORY} does not support removal in place, rebuilding")
+        index = None
+    if index is None:
+        indexed, old_store = {}, None
+
+    builder = IndexBuilder(index)
+    metadata = {}
+    embedded = removed = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        passages = PassageWriter(os.path.join(workdir, PASSAGES_FILE), MAX_PASSAGES)
+        store = VectorStoreWriter(workdir, get_embedding_dimension()) if uses_rerank() else None
+
+        for batch in batched(articles, INDEX_BUILD_BATCH):
+            known = {article['id']: indexed[article['id']] for article in batch if article['id'] in indexed}
+            to_embed, to_remove = diff_articles(batch, known)
+            if to_remove:
+                builder.index.remove_ids(indexed_passage_ids(indexed, to_remove))
+                removed += len(to_remove)
+
+            if to_embed:
+                embeddings, new_metadata = generate_embeddings(to_embed)
+                ids = new_passage_ids(new_metadata)
+                builder.add(ids, embeddings)
+                if store is not None:
+                    store.add(ids, embeddings)
+                embedded += len(to_embed)
+
+            if store is not None and old_store is not None:
+                changed = {article['id'] for article in to_embed}
+                kept = indexed_passage_ids(indexed, [article_id for article_id in known if article_id not in changed])
+                store.add(kept, old_store.lookup(kept))
 
-    faiss_bytes = bytes(faiss.serialize_index(index))
+            for article in batch:
+                article_passage_texts = article_passages(article)
+                passages.add(article['id'], article_passage_texts)
+                # Category or url edits do not change the embeddings, but the metadata must follow them
+                metadata[article['id']] = article_metadata(article, article_passage_texts)
 
-    meta_buffer = io.BytesIO()
-    pickle.dump(metadata, meta_buffer)
-    meta_buffer.seek(0)
-    meta_bytes = meta_buffer.read()
+        deleted = [article_id for article_id in indexed if article_id not in metadata]
+        if deleted:
+            builder.index.remove_ids(indexed_passage_ids(indexed, deleted))
+            removed += len(deleted)
 
-    print("Uploading FAISS index to Supabase Storage...")
-    supabase.storage.from_(BUCKET_NAME).update(FAISS_FILE, faiss_bytes)
+        print(f"[i] {embedded} article(s) embedded, {removed} removed")
+        index = builder.finish()
+        spooled = passages.close(), store.close() if store is not None else None
+        if not embedded and not removed and metadata == indexed:
+            print("[=] FAISS index is already up to date")
+            return index
 
-    print("Uploading metadata to Supabase Storage...")
-    supabase.storage.from_(BUCKET_NAME).update(META_FILE, meta_bytes)
+        # Unchanged artifacts keep their checksum and are not uploaded again
+        upload_faiss_index(index, metadata, *spooled, factory=builder.factory)
 
-    print(f"✅ Updated FAISS index with {index.ntotal} embeddings")
+    print(f"✅ Updated FAISS index with {index.ntotal} passages from {len(metadata)} articles")
     return index
 
 
-def faiss_create():
+def faiss_create(full_rebuild=False):
     """Main function to generate embeddings and upload FAISS index."""
     print("=== FAISS Embedding Generator ===")
 
-    articles = fetch_articles()
-    embeddings, metadata = generate_embeddings(articles)
-    create_faiss_index(embeddings, metadata)
+    update_faiss_index(fetch_articles(), full_rebuild=full_rebuild)
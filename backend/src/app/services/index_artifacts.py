@@ -0,0 +1,136 @@
+"""Index files in the Faiss bucket, the manifest that versions them, and a local checksum-keyed copy."""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+
+from src.core.config import CACHE_DIR, INDEX_SOURCE_DIR
+from src.core.database import supabase
+
+BUCKET_NAME = "Faiss"
+FAISS_FILE = "faiss_index.bin"
+META_FILE = "metadata.bin"
+# Uploaded last, so a reader that follows the manifest never sees a half-published index
+MANIFEST_FILE = "manifest.json"
+
+LOCAL_DIR = os.path.join(CACHE_DIR, "faiss")
+
+
+def checksum(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download(name):
+    if INDEX_SOURCE_DIR:
+        with open(os.path.join(INDEX_SOURCE_DIR, name), "rb") as f:
+            return f.read()
+    return supabase.storage.from_(BUCKET_NAME).download(name)
+
+
+def upload(name, data):
+    """Upload bytes, or the file at a path so large artifacts are not read into memory."""
+    if INDEX_SOURCE_DIR:
+        if isinstance(data, str):
+            copy_file(INDEX_SOURCE_DIR, name, data)
+        else:
+            write_file(INDEX_SOURCE_DIR, name, data)
+        return
+    supabase.storage.from_(BUCKET_NAME).upload(name, data, {"upsert": "true"})
+
+
+def download_manifest():
+    """The published manifest, or None for buckets written before manifests existed."""
+    try:
+        return json.loads(download(MANIFEST_FILE))
+    except Exception as e:
+        print(f"[i] No index manifest available: {e}")
+        return None
+
+
+def publish(artifacts, **details):
+    """
+    Upload the artifacts (bytes or file paths) whose checksum changed, then the
+    manifest that makes them current. `details` are recorded in the manifest.
+    """
+    previous = (download_manifest() or {}).get("files", {})
+    files = {}
+    for name, data in artifacts.items():
+        if isinstance(data, str):
+            digest, size = file_checksum(data), os.path.getsize(data)
+        else:
+            digest, size = checksum(data), len(data)
+        if previous.get(name, {}).get("sha256") != digest:
+            print(f"Uploading {name} to Supabase Storage...")
+            upload(name, data)
+        files[name] = {"sha256": digest, "size": size}
+
+    manifest = {
+        "version": checksum(json.dumps(files, sort_keys=True).encode("utf-8"))[:16],
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "files": files,
+        **details,
+    }
+    upload(MANIFEST_FILE, json.dumps(manifest).encode("utf-8"))
+    return manifest
+
+
+def write_file(directory, name, data):
+    """Atomically write one downloaded file, so concurrent workers never open a partial file."""
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f"{name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def copy_file(directory, name, path):
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f"{name}.{os.getpid()}.tmp")
+    shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def local_name(name, digest):
+    return f"{digest[:16]}-{name}"
+
+
+def fetch(name, digest, directory=LOCAL_DIR):
+    """
+    Return (path, data) for one manifest entry. A file already cached under its
+    checksum is reused and data is None; otherwise the download is verified,
+    written to the cache and returned so the caller can use it without re-reading.
+    """
+    path = os.path.join(directory, local_name(name, digest))
+    if os.path.exists(path):
+        return path, None
+
+    data = download(name)
+    if checksum(data) != digest:
+        # The writer may have replaced the file and not yet published its manifest
+        raise ValueError(f"{name} does not match the manifest checksum")
+    write_file(directory, local_name(name, digest), data)
+    return path, data
+
+
+def prune(manifest, directory=LOCAL_DIR):
+    """Delete cached files that the manifest no longer references; mapped files stay valid until unmapped."""
+    keep = {local_name(name, entry["sha256"]) for name, entry in manifest["files"].items()}
+    try:
+        entries = os.listdir(directory)
+    except OSError:
+        return
+    for entry in entries:
+        if entry not in keep and not entry.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                continue
@@ -0,0 +1,123 @@
+"""BM25 inverted index over title + excerpt, published next to the FAISS index."""
+import io
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+LEXICAL_FILE = "lexical.npy"
+
+K1 = 1.2
+B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+# Arrays in file order; the file is these arrays written back to back with np.save
+FIELDS = ("doc_ids", "doc_lengths", "term_offsets", "postings_docs", "postings_tf", "vocab_offsets", "vocab_blob")
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Postings in CSR form: the documents of term t are
+    postings_docs[term_offsets[t]:term_offsets[t + 1]], with matching term frequencies.
+    """
+
+    def __init__(self, doc_ids, doc_lengths, term_offsets, postings_docs, postings_tf, vocabulary):
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.vocabulary = vocabulary
+        self.average_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def build(cls, documents):
+        """Index (article id, text) pairs; output only depends on the input, so checksums stay stable."""
+        documents = sorted(documents, key=lambda document: document[0])
+        doc_lengths = np.zeros(len(documents), dtype=np.int32)
+        postings = {}
+        for position, (_, text) in enumerate(documents):
+            counts = Counter(tokenize(text))
+            doc_lengths[position] = sum(counts.values())
+            for term, frequency in counts.items():
+                postings.setdefault(term, []).append((position, frequency))
+
+        terms = sorted(postings)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(postings[term]) for term in terms], out=term_offsets[1:])
+        flat = [posting for term in terms for posting in postings[term]]
+        postings_docs = np.array([position for position, _ in flat], dtype=np.int32)
+        postings_tf = np.minimum([frequency for _, frequency in flat], np.iinfo(np.uint16).max).astype(np.uint16)
+
+        doc_ids = np.array([article_id for article_id, _ in documents], dtype=np.int64)
+        vocabulary = {term: index for index, term in enumerate(terms)}
+        return cls(doc_ids, doc_lengths, term_offsets, postings_docs, postings_tf, vocabulary)
+
+    def to_bytes(self):
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        encoded = [term.encode("utf-8") for term in terms]
+        vocab_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(term) for term in encoded], out=vocab_offsets[1:])
+        arrays = {
+            "doc_ids": self.doc_ids,
+            "doc_lengths": self.doc_lengths,
+            "term_offsets": self.term_offsets,
+            "postings_docs": self.postings_docs,
+            "postings_tf": self.postings_tf,
+            "vocab_offsets": vocab_offsets,
+            "vocab_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        }
+        buffer = io.BytesIO()
+        for name in FIELDS:
+            np.save(buffer, arrays[name], allow_pickle=False)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        buffer = io.BytesIO(data)
+        arrays = {name: np.load(buffer, allow_pickle=False) for name in FIELDS}
+        blob = arrays["vocab_blob"].tobytes()
+        offsets = arrays["vocab_offsets"]
+        vocabulary = {
+            blob[offsets[index]:offsets[index + 1]].decode("utf-8"): index
+            for index in range(len(offsets) - 1)
+        }
+        return cls(arrays["doc_ids"], arrays["doc_lengths"], arrays["term_offsets"],
+                   arrays["postings_docs"], arrays["postings_tf"], vocabulary)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def search(self, query, k, allowed_ids=None):
+        """Top k (ids, BM25 scores); documents without any query term are never returned."""
+        terms = [self.vocabulary[term] for term in set(tokenize(query)) if term in self.vocabulary]
+        if not terms:
+            return self.doc_ids[:0], np.empty(0, dtype=np.float32)
+
+        total = len(self.doc_ids)
+        scores = np.zeros(total, dtype=np.float32)
+        for term in terms:
+            start, end = self.term_offsets[term], self.term_offsets[term + 1]
+            docs = self.postings_docs[start:end]
+            frequencies = self.postings_tf[start:end].astype(np.float32)
+            idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            norms = frequencies + K1 * (1 - B + B * self.doc_lengths[docs] / self.average_length)
+            # A document appears once per term, so fancy-index addition is safe
+            scores[docs] += idf * frequencies * (K1 + 1) / norms
+
+        if allowed_ids is not None:
+            scores[~np.isin(self.doc_ids, allowed_ids)] = 0
+        candidates = np.flatnonzero(scores > 0)
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+        return self.doc_ids[top], scores[top]
@@ -1,21 +1,32 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import (
-    ChatPromptTemplate,
-    SystemMessagePromptTemplate,
-    HumanMessagePromptTemplate,
-)
+import threading
 
 from src.core.config import GEMINI_API_KEY, CHAT_MODEL
 
-llm = ChatGoogleGenerativeAI(
-    model=CHAT_MODEL,
-    api_key=GEMINI_API_KEY,
-    temperature=0.3,
-)
+# Built by get_llm() on first use, or by the startup warm-up, so importing this module stays cheap
+llm = None
+_llm_lock = threading.Lock()
 
 
-def generate_article_summary(article):
-    """Generate summary for a specific article."""
+def get_llm():
+    """The Gemini chat client, created on first use."""
+    global llm
+
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                llm = ChatGoogleGenerativeAI(
+                    model=CHAT_MODEL,
+                    api_key=GEMINI_API_KEY,
+                    temperature=0.3,
+                )
+    return llm
+
+
+def _article_summary_messages(article):
+    from langchain.prompts import HumanMessagePromptTemplate, SystemMessagePromptTemplate
+
     system_prompt = SystemMessagePromptTemplate.from_template("""
     You are an expert article summarizer. Create a concise, informative summary of the provided article.
     
@@ -41,15 +52,15 @@ def generate_article_summary(article):
         excerpt=article['excerpt'],
         content=article['content'],
     )
+    return [system_message, human_message]
 
-    response = llm([system_message, human_message])
-    return response.content
 
+def _query_summary_messages(query: str, articles: list):
+    from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
 
-def generate_summary(query: str, articles: list):
-    """Generate summary using Gemini LLM with modern prompt templates."""
+    # Best-matching passages of the full article when retrieval found them, else the excerpt
     context = "\n\n".join([
-        f"Article {i+1}: {article['title']}\n{article['excerpt']}"
+        f"Article {i+1}: {article['title']}\n" + "\n...\n".join(article.get('passages') or [article['excerpt']])
         for i, article in enumerate(articles)
     ])
 
@@ -79,6 +90,42 @@ Guidelines:
         HumanMessagePromptTemplate.from_template(human_template),
     ])
 
-    formatted_prompt = prompt.format_messages(query=query, context=context)
-    response = llm.invoke(formatted_prompt)
+    return prompt.format_messages(query=query, context=context)
+
+
+def generate_article_summary(article):
+    """Generate summary for a specific article."""
+    response = get_llm()(_article_summary_messages(article))
     return response.content
+
+
+async def agenerate_article_summary(article):
+    """Async variant of generate_article_summary that does not block the event loop."""
+    response = await get_llm().ainvoke(_article_summary_messages(article))
+    return response.content
+
+
+async def astream_article_summary(article):
+    """Yield the article summary text as Gemini streams it."""
+    async for chunk in get_llm().astream(_article_summary_messages(article)):
+        if chunk.content:
+            yield chunk.content
+
+
+def generate_summary(query: str, articles: list):
+    """Generate summary using Gemini LLM with modern prompt templates."""
+    response = get_llm().invoke(_query_summary_messages(query, articles))
+    return response.content
+
+
+async def agenerate_summary(query: str, articles: list):
+    """Async variant of generate_summary that does not block the event loop."""
+    response = await get_llm().ainvoke(_query_summary_messages(query, articles))
+    return response.content
+
+
+async def astream_summary(query: str, articles: list):
+    """Yield the query summary text as Gemini streams it."""
+    async for chunk in get_llm().astream(_query_summary_messages(query, articles)):
+        if chunk.content:
+            yield chunk.content
@@ -0,0 +1,160 @@
+"""
+Columnar article metadata published next to the FAISS index.
+
+Layout: an 8-byte magic, the header length, a JSON header and then 8-byte
+aligned sections. Numeric columns are fixed-width arrays. String columns are
+an int64 offsets array, one utf-8 blob and a null mask. Rows are sorted by
+article id, so a lookup is a binary search and the whole file can be
+memory-mapped and shared between workers instead of unpickled.
+"""
+import json
+from collections.abc import Mapping
+
+import numpy as np
+
+MAGIC = b"NSMETA01"
+ALIGN = 8
+
+# Column name -> numpy dtype, or "str" for variable-length text
+COLUMNS = {
+    "id": "int64",
+    "text_hash": "S40",
+    "title": "str",
+    "excerpt": "str",
+    "url": "str",
+    "category": "str",
+    "source": "str",
+    "published_at": "int64",  # epoch seconds, 0 when unknown
+    "passages": "int64",  # passages embedded for the article
+}
+
+
+def _padded(data):
+    return data + b"\0" * (-len(data) % ALIGN)
+
+
+def encode_metadata(articles, **header):
+    """Serialize id-keyed article dicts; extra keyword arguments are stored in the header."""
+    rows = sorted(articles.values(), key=lambda article: article['id'])
+    sections = []
+    size = 0
+
+    def add(data):
+        nonlocal size
+        offset = size
+        sections.append(_padded(data))
+        size += len(sections[-1])
+        return offset
+
+    columns = []
+    for name, kind in COLUMNS.items():
+        values = [row.get(name) for row in rows]
+        if kind == "str":
+            encoded = [(value or "").encode("utf-8") for value in values]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            columns.append({
+                "name": name,
+                "type": kind,
+                "offsets": add(offsets.tobytes()),
+                "data": add(b"".join(encoded)),
+                "data_size": int(offsets[-1]),
+                "nulls": add(np.array([value is None for value in values], dtype=np.bool_).tobytes()),
+            })
+        else:
+            values = [0 if value is None else value for value in values]
+            columns.append({"name": name, "type": kind, "data": add(np.array(values, dtype=kind).tobytes())})
+
+    header_bytes = json.dumps({**header, "count": len(rows), "columns": columns}).encode("utf-8")
+    return MAGIC + np.uint64(len(header_bytes)).tobytes() + _padded(header_bytes) + b"".join(sections)
+
+
+class MetadataStore(Mapping):
+    """Read-only id -> article mapping over an encoded buffer; rows are decoded only when accessed."""
+
+    def __init__(self, buffer):
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a metadata store")
+        header_size = int(np.frombuffer(buffer, dtype=np.uint64, count=1, offset=len(MAGIC))[0])
+        start = len(MAGIC) + 8
+        self.header = json.loads(bytes(buffer[start:start + header_size]).decode("utf-8"))
+        base = start + header_size + (-header_size % ALIGN)
+        count = self.header["count"]
+
+        self._numeric = {}
+        self._strings = {}
+        self._codes = {}
+        for column in self.header["columns"]:
+            if column["type"] == "str":
+                self._strings[column["name"]] = (
+                    np.frombuffer(buffer, dtype=np.int64, count=count + 1, offset=base + column["offsets"]),
+                    buffer[base + column["data"]:base + column["data"] + column["data_size"]],
+                    np.frombuffer(buffer, dtype=np.bool_, count=count, offset=base + column["nulls"]),
+                )
+            else:
+                self._numeric[column["name"]] = np.frombuffer(
+                    buffer, dtype=column["type"], count=count, offset=base + column["data"])
+        self.ids = self._numeric["id"]
+
+    @classmethod
+    def open(cls, path):
+        return cls(np.memmap(path, dtype=np.uint8, mode="r"))
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(np.frombuffer(data, dtype=np.uint8))
+
+    def position(self, article_id):
+        """Row of an article id, or -1 if it is not in the store."""
+        row = int(np.searchsorted(self.ids, article_id))
+        return row if row < len(self.ids) and self.ids[row] == article_id else -1
+
+    def string(self, name, row):
+        offsets, blob, nulls = self._strings[name]
+        if nulls[row]:
+            return None
+        return bytes(blob[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def codes(self, name):
+        """Dictionary-encode a string column on first use so equality filters are vectorised."""
+        if name not in self._codes:
+            lookup = {}
+            codes = np.fromiter(
+                (lookup.setdefault(self.string(name, row), len(lookup)) for row in range(len(self))),
+                dtype=np.int32, count=len(self),
+            )
+            self._codes[name] = (lookup, codes)
+        return self._codes[name]
+
+    def filter_ids(self, equals=None, at_least=None):
+        """Ids of rows whose string columns equal `equals` and numeric columns are >= `at_least`."""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in (equals or {}).items():
+            lookup, codes = self.codes(name)
+            if value not in lookup:
+                return self.ids[:0]
+            mask &= codes == lookup[value]
+        for name, value in (at_least or {}).items():
+            mask &= self._numeric[name] >= value
+        return self.ids[mask]
+
+    def row(self, row):
+        article = {}
+        for name, values in self._numeric.items():
+            value = values[row]
+            article[name] = value.decode("ascii") if isinstance(value, bytes) else value.item()
+        for name in self._strings:
+            article[name] = self.string(name, row)
+        return article
+
+    def __getitem__(self, article_id):
+        row = self.position(article_id)
+        if row < 0:
+            raise KeyError(article_id)
+        return self.row(row)
+
+    def __iter__(self):
+        return (int(article_id) for article_id in self.ids)
+
+    def __len__(self):
+        return len(self.ids)
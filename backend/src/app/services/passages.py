@@ -0,0 +1,102 @@
+"""
+Passage texts of the multi-vector index and the passage id <-> article id mapping.
+
+A passage id is article_id * stride + n for the n-th passage of an article, so
+the article of any FAISS hit is one integer division away and the passages of
+an article form one contiguous id range.
+
+Layout of passages.bin: an 8-byte magic, the passage count and stride, the
+sorted passage ids, one (start, end) byte span per passage and a utf-8 blob.
+The blob is written in build order, so the file is assembled from a spooled
+temporary file without holding the texts in memory.
+"""
+import os
+import shutil
+
+import numpy as np
+
+PASSAGES_FILE = "passages.bin"
+MAGIC = b"NSPASS01"
+
+
+def passage_ids(article_ids, counts, stride):
+    """Passage ids of each article, in article order: [a*stride, ..., a*stride + count - 1]."""
+    article_ids = np.asarray(article_ids, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    firsts = np.repeat(article_ids * stride, counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return firsts + np.arange(len(firsts), dtype=np.int64) - starts
+
+
+class PassageWriter:
+    """Spool passage texts to disk as they are produced and write passages.bin on close."""
+
+    def __init__(self, path, stride):
+        self.path = path
+        self.stride = stride
+        self.ids = []
+        self.spans = []
+        self._size = 0
+        self._blob_path = f"{path}.blob"
+        self._blob = open(self._blob_path, "wb")
+
+    def add(self, article_id, texts):
+        for n, text in enumerate(texts):
+            encoded = text.encode("utf-8")
+            self._blob.write(encoded)
+            self.ids.append(article_id * self.stride + n)
+            self.spans.append((self._size, self._size + len(encoded)))
+            self._size += len(encoded)
+
+    def close(self):
+        self._blob.close()
+        ids = np.array(self.ids, dtype=np.int64)
+        spans = np.array(self.spans, dtype=np.int64).reshape(-1, 2)
+        order = np.argsort(ids, kind="stable")
+        with open(self.path, "wb") as f:
+            f.write(MAGIC + np.array([len(ids), self.stride], dtype=np.uint64).tobytes())
+            f.write(ids[order].tobytes())
+            f.write(spans[order].tobytes())
+            with open(self._blob_path, "rb") as blob:
+                shutil.copyfileobj(blob, f)
+        os.remove(self._blob_path)
+        return self.path
+
+
+class PassageStore:
+    """Read-only passage id -> text lookup over a memory-mapped passages.bin."""
+
+    def __init__(self, buffer):
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a passage store")
+        count, stride = (int(value) for value in np.frombuffer(buffer, dtype=np.uint64, count=2, offset=len(MAGIC)))
+        offset = len(MAGIC) + 16
+        self.stride = stride
+        self.ids = np.frombuffer(buffer, dtype=np.int64, count=count, offset=offset)
+        self.spans = np.frombuffer(buffer, dtype=np.int64, count=2 * count, offset=offset + 8 * count).reshape(-1, 2)
+        self.blob = buffer[offset + 24 * count:]
+
+    @classmethod
+    def open(cls, path):
+        return cls(np.memmap(path, dtype=np.uint8, mode="r"))
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(np.frombuffer(data, dtype=np.uint8))
+
+    def text(self, passage_id):
+        row = int(np.searchsorted(self.ids, passage_id))
+        if row >= len(self.ids) or self.ids[row] != passage_id:
+            return None
+        start, end = self.spans[row]
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+    def passages_of(self, ids):
+        """Every stored passage id of the given article ids, for id selectors over the passage index."""
+        ids = np.asarray(ids, dtype=np.int64)
+        starts = np.searchsorted(self.ids, ids * self.stride)
+        ends = np.searchsorted(self.ids, (ids + 1) * self.stride)
+        return passage_ids(ids, ends - starts, self.stride) if len(ids) else ids
+
+    def __len__(self):
+        return len(self.ids)
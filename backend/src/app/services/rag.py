@@ -1,72 +1,476 @@
+import asyncio
 import faiss
 import numpy as np
-import pickle
-import tempfile
+from datetime import timezone
 
 from fastapi import HTTPException
 
-from src.core.config import get_embedding_model
+from src.app.services.cache import LRUCache
+from src.app.services.index_artifacts import FAISS_FILE, META_FILE, download_manifest, fetch, prune
+from src.app.services.lexical import LEXICAL_FILE, BM25Index
+from src.app.services.metadata_store import MetadataStore
+from src.app.services.passages import PASSAGES_FILE, PassageStore
+from src.app.services.vector_store import VECTOR_IDS_FILE, VECTORS_FILE, VectorStore
+from src.core.config import (
+    FAISS_EF_SEARCH,
+    FAISS_NPROBE,
+    FAISS_RERANK_FACTOR,
+    HYBRID_CANDIDATES,
+    PASSAGE_SEARCH_FACTOR,
+    PASSAGES_PER_ARTICLE,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+    RETRIEVAL_MODE,
+    RRF_K,
+    get_embedding_model,
+)
 from src.core.database import supabase
+from src.core.embedding_cache import model_key
 
-faiss_index = None
-metadata = None
 
+class IndexGeneration:
+    """One loaded index together with the metadata and vectors published with it."""
+
+    def __init__(self, index, metadata, vector_store=None, version=None, lexical=None, passages=None):
+        self.index = index
+        # Article id -> metadata; a memory-mapped MetadataStore once loaded from storage
+        self.metadata = metadata
+        # Full-precision vectors for exact re-ranking, set when the index uses compressed codes
+        self.vector_store = vector_store
+        self.version = version
+        # BM25 index over the same articles, for hybrid retrieval and as a fallback
+        self.lexical = lexical
+        # Passage texts when the index holds passage vectors rather than one vector per article
+        self.passages = passages
+
+
+# Replaced as a whole on reload; a search reads it once and finishes on that generation
+generation = None
+# Version of the current generation; caches of answers are scoped to it
+index_version = None
+
+# (embedding model and backend, normalised query) -> query vector
+query_embedding_cache = LRUCache(QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+
+
+def configure_search(index):
+    """Apply the configured efSearch / nprobe to whichever of them the index type supports."""
+    parameter_space = faiss.ParameterSpace()
+    for name, value in (("efSearch", FAISS_EF_SEARCH), ("nprobe", FAISS_NPROBE)):
+        try:
+            parameter_space.set_index_parameter(index, name, value)
+        except RuntimeError:
+            continue
+
+
+def search_parameters(index, allowed_ids):
+    """
+    Search parameters restricting an IDMap2 index to `allowed_ids`, or None when
+    the index type cannot take an id selector (PQ, FastScan and additive
+    quantizer codes without IVF). Passing parameters replaces the index
+    defaults, so efSearch / nprobe are set again.
+    """
+    selector = faiss.IDSelectorBatch(np.asarray(allowed_ids, dtype=np.int64))
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=FAISS_EF_SEARCH)
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=FAISS_NPROBE)
+    if isinstance(inner, (faiss.IndexFlat, faiss.IndexScalarQuantizer)):
+        return faiss.SearchParameters(sel=selector)
+    return None
 
-def load_faiss_index():
-    """Load FAISS index and metadata from Supabase Storage."""
-    global faiss_index, metadata
 
+def post_filtered_search(index, query_vectors, k, allowed_ids):
+    """
+    Filtered search for indexes without id selectors: search deeper than k, in
+    proportion to how selective the filter is, drop ids outside `allowed_ids` and
+    double the depth until every row has k matches or the whole index was read.
+    """
+    allowed_ids = np.asarray(allowed_ids, dtype=np.int64)
+    total = index.ntotal
+    depth = min(total, max(k, int(np.ceil(2 * k * total / max(len(allowed_ids), 1)))))
+    while True:
+        distances, indices = (np.asarray(result) for result in index.search(query_vectors, depth))
+        allowed = np.isin(indices, allowed_ids)
+        if depth >= total or (allowed.sum(axis=1) >= k).all():
+            break
+        depth = min(total, depth * 2)
+
+    # Same shape as a plain search: k columns per row, padded with -1 ids
+    kept_distances = np.full((len(indices), k), -np.inf, dtype=np.float32)
+    kept_indices = np.full((len(indices), k), -1, dtype=np.int64)
+    for row, mask in enumerate(allowed):
+        found = np.flatnonzero(mask)[:k]
+        kept_distances[row, :len(found)] = distances[row, found]
+        kept_indices[row, :len(found)] = indices[row, found]
+    return kept_distances, kept_indices
+
+
+def index_search(index, query_vectors, k, allowed_ids=None):
+    """(distances, ids) of the top k per row, restricted to `allowed_ids` when given."""
+    if allowed_ids is None:
+        return index.search(query_vectors, k)
+    params = search_parameters(index, allowed_ids)
+    if params is None:
+        return post_filtered_search(index, query_vectors, k, allowed_ids)
+    return index.search(query_vectors, k, params=params)
+
+
+def read_index(path, data):
+    """Deserialize a fresh download in place, or memory-map the copy already in the local cache."""
+    if data is not None:
+        return faiss.deserialize_index(np.frombuffer(data, dtype=np.uint8))
     try:
-        faiss_res = supabase.storage.from_("Faiss").download("faiss_index.bin")
-        meta_res = supabase.storage.from_("Faiss").download("metadata.pkl")
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+
+def build_generation(manifest):
+    """
+    Load the index, metadata and vectors a manifest points to. Artifacts are kept
+    in CACHE_DIR by checksum, so a restart with an unchanged index downloads only
+    the manifest.
+    """
+    files = manifest["files"]
+    index = read_index(*fetch(FAISS_FILE, files[FAISS_FILE]["sha256"]))
+    meta_path, _ = fetch(META_FILE, files[META_FILE]["sha256"])
+    articles = MetadataStore.open(meta_path)
+
+    store = None
+    if VECTORS_FILE in files:
+        ids_path, _ = fetch(VECTOR_IDS_FILE, files[VECTOR_IDS_FILE]["sha256"])
+        vectors_path, _ = fetch(VECTORS_FILE, files[VECTORS_FILE]["sha256"])
+        store = VectorStore.open(ids_path, vectors_path)
+
+    lexical = None
+    if LEXICAL_FILE in files:
+        lexical_path, lexical_data = fetch(LEXICAL_FILE, files[LEXICAL_FILE]["sha256"])
+        lexical = BM25Index.from_bytes(lexical_data) if lexical_data is not None else BM25Index.open(lexical_path)
+
+    passages = None
+    if PASSAGES_FILE in files:
+        passages_path, _ = fetch(PASSAGES_FILE, files[PASSAGES_FILE]["sha256"])
+        passages = PassageStore.open(passages_path)
 
-        with tempfile.NamedTemporaryFile(delete=False) as faiss_tmp:
-            faiss_tmp.write(faiss_res)
-            faiss_tmp.flush()
-            faiss_index = faiss.read_index(faiss_tmp.name)
+    configure_search(index)
+    return IndexGeneration(index, articles, store, manifest["version"], lexical, passages)
 
-        with tempfile.NamedTemporaryFile(delete=False) as meta_tmp:
-            meta_tmp.write(meta_res)
-            meta_tmp.flush()
-            with open(meta_tmp.name, "rb") as f:
-                metadata = pickle.load(f)
 
-        print(f"✅ Loaded FAISS index from Supabase with {faiss_index.ntotal} articles")
+def swap_generation(new_generation):
+    """Make a fully built generation current with one reference assignment."""
+    global generation, index_version
+
+    generation = new_generation
+    index_version = new_generation.version
+    print(f"✅ Loaded FAISS index {new_generation.version} with {new_generation.index.ntotal} vectors"
+          f"{' (exact re-ranking enabled)' if new_generation.vector_store is not None else ''}")
+
+
+def load_faiss_index():
+    """Load FAISS index and metadata from Supabase Storage."""
+    try:
+        manifest = download_manifest()
+        if manifest is None:
+            # Indexes published before manifests and columnar metadata are replaced on the next update
+            print("[!] No index has been published yet, run faiss_create()")
+            return False
+        swap_generation(build_generation(manifest))
+        prune(manifest)
         return True
     except Exception as e:
         print(f"❌ Error loading FAISS index: {e}")
         return False
 
 
-def retrieve_articles(query: str, k: int = 3):
-    """Retrieve top k similar articles."""
-    if faiss_index is None or metadata is None:
-        raise HTTPException(status_code=500, detail="FAISS index not loaded")
+def refresh_index():
+    """Load and swap in a newly published index; returns True when the generation changed."""
+    manifest = download_manifest()
+    if manifest is None or (generation is not None and manifest["version"] == generation.version):
+        return False
+
+    print(f"[→] Index version {manifest['version']} published, reloading")
+    swap_generation(build_generation(manifest))
+    # Files of the old generation stay readable while in-flight searches still map them
+    prune(manifest)
+    return True
+
+
+async def watch_index(interval):
+    """Poll the manifest every `interval` seconds and hot-swap new indexes off the request path."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(refresh_index)
+        except Exception as e:
+            print(f"[!] Index reload failed, keeping version {index_version}: {e}")
+
+
+def normalize_query(query: str):
+    """Case- and whitespace-insensitive form of a query, used as a cache key."""
+    return " ".join(query.lower().split())
+
+
+def embed_query(query: str):
+    """Return the query vector, reusing cached vectors for repeated queries."""
+    embedding_model = get_embedding_model()
+    if embedding_model is None:
+        raise HTTPException(status_code=500, detail="Local embedding model is not configured")
+
+    normalized = normalize_query(query)
+    key = (model_key(embedding_model), normalized)
+    vector = query_embedding_cache.get(key)
+    if vector is None:
+        vector = np.asarray(embedding_model.embed_query(normalized), dtype=np.float32)
+        query_embedding_cache.set(key, vector)
+    return vector
 
+
+def embed_queries(queries):
+    """Query vectors for many queries as one matrix; cache misses are encoded in a single batch."""
     embedding_model = get_embedding_model()
     if embedding_model is None:
         raise HTTPException(status_code=500, detail="Local embedding model is not configured")
 
-    query_embedding = embedding_model.embed_query(query)
-    query_vector = np.array([query_embedding], dtype=np.float32)
+    key = model_key(embedding_model)
+    normalized = [normalize_query(query) for query in queries]
+    vectors = {}
+    for text in normalized:
+        vector = query_embedding_cache.get((key, text))
+        if vector is not None:
+            vectors[text] = vector
+
+    missing = list(dict.fromkeys(text for text in normalized if text not in vectors))
+    if missing:
+        for text, vector in zip(missing, embedding_model.embed_documents(missing)):
+            vectors[text] = np.asarray(vector, dtype=np.float32)
+            query_embedding_cache.set((key, text), vectors[text])
+    return np.stack([vectors[text] for text in normalized])
+
+
+def filter_ids(articles, category=None, source=None, since=None):
+    """Ids matching the request filters, or None when the search is unfiltered."""
+    equals = {name: value for name, value in (("category", category), ("source", source)) if value}
+    at_least = {}
+    if since is not None:
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        at_least["published_at"] = int(since.timestamp())
+    if not equals and not at_least:
+        return None
+    return articles.filter_ids(equals, at_least)
+
+
+def query_vector_or_none(query: str):
+    """Query vector for answer-cache matching, or None while the embedding model is unavailable."""
+    try:
+        return embed_query(query)
+    except Exception:
+        return None
+
 
-    distances, indices = faiss_index.search(query_vector, k)
+def vector_search(current, query_vectors, k, allowed_ids=None):
+    """Top k (ids, scores) for each row of query_vectors, from one search of the generation's index."""
+    # Filters run inside the index through an id selector where the index type supports one,
+    # so k results come back when k articles match
+    if current.vector_store is not None:
+        # Compressed codes only shortlist candidates; the float vectors decide the final order
+        _, candidates = index_search(current.index, query_vectors, k * FAISS_RERANK_FACTOR, allowed_ids)
+        return [current.vector_store.rerank(vector, row, k) for vector, row in zip(query_vectors, candidates)]
 
+    distances, indices = index_search(current.index, query_vectors, k, allowed_ids)
+    # Inner-product indexes already score cosine similarity; older L2 indexes return distances
+    inner_product = getattr(current.index, "metric_type", faiss.METRIC_L2) == faiss.METRIC_INNER_PRODUCT
+    results = []
+    for row_distances, row_indices in zip(np.asarray(distances), np.asarray(indices)):
+        found = row_indices >= 0
+        row_distances, row_indices = row_distances[found], row_indices[found]
+        results.append((row_indices, row_distances if inner_product else 1 / (1 + row_distances)))
+    return results
+
+
+def group_passages(ids, scores, stride, k):
+    """
+    Max-score aggregation of passage hits: an article ranks by its best passage.
+    Returns the top k (article ids, scores) and article id -> best passage ids.
+    """
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    best, article_scores = {}, []
+    for passage_id, score in zip(np.asarray(ids)[order], np.asarray(scores)[order]):
+        article_id = int(passage_id) // stride
+        if article_id not in best:
+            if len(best) == k:
+                continue
+            best[article_id] = []
+            article_scores.append(score)
+        if len(best[article_id]) < PASSAGES_PER_ARTICLE:
+            best[article_id].append(int(passage_id))
+    return np.array(list(best), dtype=np.int64), np.array(article_scores, dtype=np.float32), best
+
+
+def article_search(current, query_vectors, k, allowed_ids=None):
+    """Top k (article ids, scores, article id -> best passage ids) per query row from the vector index."""
+    if current.passages is None:
+        return [(ids, scores, {}) for ids, scores in vector_search(current, query_vectors, k, allowed_ids)]
+
+    total = current.index.ntotal
+    if allowed_ids is not None:
+        allowed_ids = current.passages.passages_of(allowed_ids)
+        total = min(total, len(allowed_ids))
+    if not total:
+        return [group_passages([], [], current.passages.stride, k) for _ in query_vectors]
+    # Several passages of one article can fill the shortlist, so search deeper than k, and
+    # keep doubling the depth for rows that still have fewer than k articles
+    query_vectors = np.asarray(query_vectors)
+    results = [None] * len(query_vectors)
+    rows, depth = np.arange(len(query_vectors)), min(total, k * PASSAGE_SEARCH_FACTOR)
+    while len(rows):
+        hits = vector_search(current, query_vectors[rows], depth, allowed_ids)
+        short = []
+        for row, (ids, scores) in zip(rows, hits):
+            results[row] = group_passages(ids, scores, current.passages.stride, k)
+            if len(results[row][0]) < k and depth < total:
+                short.append(row)
+        rows, depth = np.array(short, dtype=np.int64), min(total, depth * 2)
+    return results
+
+
+def reciprocal_rank_fusion(rankings, k):
+    """Merge ranked id lists into the top k (id, score); an id ranked first in every list scores 1."""
+    fused = {}
+    for ranking in rankings:
+        for rank, article_id in enumerate(ranking):
+            fused[int(article_id)] = fused.get(int(article_id), 0.0) + 1 / (RRF_K + rank + 1)
+    best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+    scale = len(rankings) / (RRF_K + 1)
+    return [(article_id, score / scale) for article_id, score in best]
+
+
+def encode_for_mode(current, queries, mode, encode):
+    """
+    (query vectors or None, BM25 index or None) for a retrieval mode. When
+    encoding fails, BM25 keeps search available if the generation has it.
+    """
+    lexical = current.lexical if mode in ("hybrid", "lexical") else None
+    if mode == "lexical" and lexical is not None:
+        return None, lexical
+    try:
+        return encode(queries), lexical
+    except Exception as e:
+        if current.lexical is None:
+            raise
+        print(f"[!] Query embedding failed, falling back to lexical search: {e}")
+        return None, current.lexical
+
+
+def rank_articles(current, queries, ks, query_vectors, lexical, allowed_ids=None):
+    """
+    (hits, best passages) per query for queries that share one filter. The
+    vector side is a single multi-row search at the largest depth any query
+    needs; each query then keeps only its own top k.
+    """
+    if lexical is None:
+        searched = article_search(current, query_vectors, max(ks), allowed_ids)
+        return [(list(zip(ids[:k], scores[:k])), best) for (ids, scores, best), k in zip(searched, ks)]
+
+    depths = [max(k, HYBRID_CANDIDATES) for k in ks]
+    searched = [None] * len(queries)
+    if query_vectors is not None:
+        searched = article_search(current, query_vectors, max(depths), allowed_ids)
+
+    ranked = []
+    for query, k, depth, vector_hits in zip(queries, ks, depths, searched):
+        rankings = [lexical.search(query, depth, allowed_ids)[0]]
+        best_passages = {}
+        if vector_hits is not None:
+            ids, _, best_passages = vector_hits
+            rankings.insert(0, ids[:depth])
+        ranked.append((reciprocal_rank_fusion(rankings, k), best_passages))
+    return ranked
+
+
+def article_results(current, hits, best_passages):
     articles = []
-    for distance, idx in zip(distances[0], indices[0]):
-        article = metadata[idx]
+    for idx, score in hits:
+        article = current.metadata[int(idx)]
         articles.append({
+            'id': article.get('id', int(idx)),
             'title': article['title'],
             'excerpt': article['excerpt'],
             'url': article['url'],
             'category': article['category'],
             'source': article.get('source', 'geo'),
-            'relevance_score': float(1 / (1 + distance)),
+            'relevance_score': float(score),
+            # Articles found only by BM25 have no matched passage; the LLM falls back to the excerpt
+            'passages': [current.passages.text(passage_id) for passage_id in best_passages.get(int(idx), [])],
         })
-
     return articles
 
 
+def loaded_generation():
+    current = generation
+    if current is None:
+        raise HTTPException(status_code=500, detail="FAISS index not loaded")
+    return current
+
+
+def retrieve_articles(query: str, k: int = 3, category=None, source=None, since=None, mode=None):
+    """
+    Retrieve top k articles, optionally restricted by category, source and publish time.
+    `mode` (default RETRIEVAL_MODE) is "vector", "lexical" or "hybrid"; hybrid merges
+    FAISS and BM25 results with reciprocal rank fusion. With a passage index each
+    article carries the text of its best-matching passages for the LLM.
+    """
+    current = loaded_generation()
+    allowed_ids = filter_ids(current.metadata, category, source, since)
+    if allowed_ids is not None and not len(allowed_ids):
+        return []
+
+    query_vectors, lexical = encode_for_mode(
+        current, [query], mode or RETRIEVAL_MODE, lambda queries: embed_query(queries[0]).reshape(1, -1)
+    )
+    hits, best_passages = rank_articles(current, [query], [k], query_vectors, lexical, allowed_ids)[0]
+    return article_results(current, hits, best_passages)
+
+
+def retrieve_batch(searches, mode=None):
+    """
+    Retrieve articles for many searches, each a dict with "query" and optional
+    "k", "category", "source" and "since". All queries are encoded in one batch
+    and searches sharing the same filters run as one multi-row FAISS search.
+    Returns one article list per search, in order.
+    """
+    current = loaded_generation()
+    if not searches:
+        return []
+
+    queries = [search["query"] for search in searches]
+    query_vectors, lexical = encode_for_mode(current, queries, mode or RETRIEVAL_MODE, embed_queries)
+
+    groups = {}
+    for position, search in enumerate(searches):
+        key = (search.get("category"), search.get("source"), search.get("since"))
+        groups.setdefault(key, []).append(position)
+
+    results = [[] for _ in searches]
+    for (category, source, since), positions in groups.items():
+        allowed_ids = filter_ids(current.metadata, category, source, since)
+        if allowed_ids is not None and not len(allowed_ids):
+            continue
+        ranked = rank_articles(
+            current,
+            [queries[position] for position in positions],
+            [searches[position].get("k", 3) for position in positions],
+            None if query_vectors is None else query_vectors[positions],
+            lexical,
+            allowed_ids,
+        )
+        for position, (hits, best_passages) in zip(positions, ranked):
+            results[position] = article_results(current, hits, best_passages)
+    return results
+
+
 def get_article_by_url(article_url: str):
     """Retrieve article by URL from database."""
     try:
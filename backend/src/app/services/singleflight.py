@@ -0,0 +1,28 @@
+"""Collapse concurrent identical async calls into one in-flight call."""
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight = {}
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    def get(self, key):
+        """The task currently running for key, if any."""
+        return self._in_flight.get(key)
+
+    def start(self, key, fn):
+        """The task running fn() for key, started now when none is in flight."""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return task
+
+    async def do(self, key, fn):
+        """Await fn() once per key; callers arriving while it runs share its result."""
+        # A caller that disconnects must not cancel the call for everyone else
+        return await asyncio.shield(self.start(key, fn))
@@ -0,0 +1,83 @@
+"""Background start-up: load the embedding model, FAISS index and LLM client, then warm the search path."""
+import asyncio
+import time
+
+from src.app.services import rag
+from src.app.services.executor import run_in_search_executor
+from src.app.services.llm import get_llm
+from src.app.services.rag import load_faiss_index, retrieve_articles
+from src.core import config
+from src.core.config import WARM_UP_QUERY, get_embedding_model
+
+# Outcome of warm_up(); the API answers GET / as soon as the process is listening
+status = {
+    "started": False,
+    "llm_client": False,
+    "warmed_up": False,
+    "startup_seconds": None,
+    "errors": {},
+}
+
+
+def _record(name, result):
+    """True when a start-up step returned a truthy value; failures are kept in status["errors"]."""
+    if isinstance(result, BaseException):
+        status["errors"][name] = str(result)
+        print(f"[!] Start-up step {name} failed: {result}")
+        return False
+    if not result:
+        status["errors"][name] = "not available"
+        return False
+    return True
+
+
+def readiness():
+    """
+    Status reported by GET /ready. Model and index state are read on every call,
+    so an index published after start-up (or a model loaded by a later request)
+    makes the worker ready without a restart.
+    """
+    model_loaded = config.embedding_model is not None
+    current = rag.generation
+    return {
+        **status,
+        "ready": status["started"] and model_loaded and current is not None,
+        "model_loaded": model_loaded,
+        "index_loaded": current is not None,
+        "index_version": current.version if current is not None else None,
+    }
+
+
+async def warm_up():
+    """
+    Load the model, index and LLM client concurrently in worker threads, then
+    run one retrieval so the first real request does not pay for lazy
+    initialisation (tokenizer, ONNX session, FAISS pages, executor threads).
+    """
+    start = time.perf_counter()
+    model, index_loaded, llm_client = await asyncio.gather(
+        asyncio.to_thread(get_embedding_model),
+        asyncio.to_thread(load_faiss_index),
+        asyncio.to_thread(get_llm),
+        return_exceptions=True,
+    )
+    model_loaded = _record("model", model)
+    index_loaded = _record("index", index_loaded)
+    # The LLM client is only needed by /query and /summarize, so it does not gate readiness
+    status["llm_client"] = _record("llm", llm_client)
+    if not index_loaded:
+        print("Warning: FAISS index not loaded. API will not work properly.")
+
+    if model_loaded and index_loaded and WARM_UP_QUERY:
+        try:
+            await run_in_search_executor(retrieve_articles, WARM_UP_QUERY, 1)
+            status["warmed_up"] = True
+        except Exception as e:
+            _record("warm_up", e)
+
+    status["started"] = True
+    status["startup_seconds"] = round(time.perf_counter() - start, 3)
+    ready = readiness()["ready"]
+    marker = "[✓]" if ready else "[!]"
+    print(f"{marker} Start-up finished in {status['startup_seconds']}s, ready={ready}")
+    return ready
@@ -0,0 +1,13 @@
+"""Server-sent-events framing for the streaming endpoints."""
+import json
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop reverse proxies from buffering the stream into one response
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event, data):
+    """Encode one SSE event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,171 @@
+"""Per-article summaries persisted in Supabase and shared between concurrent requests."""
+import asyncio
+import hashlib
+
+from src.app.services.cache import LRUCache
+from src.app.services.llm import agenerate_article_summary, astream_article_summary
+from src.app.services.singleflight import SingleFlight
+from src.core.config import CHAT_MODEL, SUMMARY_CACHE_SIZE
+from src.core.database import supabase
+
+SUMMARY_TABLE = "article_summaries"
+
+# (article id, content hash) -> summary
+summary_cache = LRUCache(SUMMARY_CACHE_SIZE)
+summary_flight = SingleFlight()
+# (article id, content hash) -> SummaryBroadcast of the streaming generation in flight
+summary_streams = {}
+
+
+class SummaryBroadcast:
+    """Chunks of one streaming generation, replayed to every stream that joins while it runs."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, chunk):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error=None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def replay(self):
+        """Yield every chunk produced so far, then new ones as they arrive."""
+        sent = 0
+        while True:
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+def content_hash(article):
+    """Hash of everything the summary prompt sees, so edited articles get a new summary."""
+    text = f"{article['title']}\n{article['excerpt']}\n{article['content']}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_stored_summary(article_id, article_hash):
+    try:
+        response = (
+            supabase.table(SUMMARY_TABLE)
+            .select('summary')
+            .eq('article_id', article_id)
+            .eq('content_hash', article_hash)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0]['summary'] if response.data else None
+    except Exception as e:
+        print(f"Error fetching stored summary: {e}")
+        return None
+
+
+def store_summary(article_id, article_hash, summary):
+    try:
+        supabase.table(SUMMARY_TABLE).upsert(
+            {
+                'article_id': article_id,
+                'content_hash': article_hash,
+                'summary': summary,
+                'model': CHAT_MODEL,
+            },
+            on_conflict='article_id,content_hash',
+        ).execute()
+    except Exception as e:
+        print(f"Error storing summary: {e}")
+
+
+async def get_or_create_summary(article):
+    """
+    Return the article's summary from memory, then Supabase, and only then Gemini.
+    Concurrent requests for the same article share one lookup and LLM call.
+    """
+    key = (article['id'], content_hash(article))
+    summary = summary_cache.get(key)
+    if summary is not None:
+        return summary
+
+    async def load_or_generate():
+        stored = await asyncio.to_thread(get_stored_summary, *key)
+        if stored is None:
+            stored = await agenerate_article_summary(article)
+            await asyncio.to_thread(store_summary, *key, stored)
+        summary_cache.set(key, stored)
+        return stored
+
+    return await summary_flight.do(key, load_or_generate)
+
+
+def start_summary_stream(key, article):
+    """
+    Start the one producer for an article: it replays a stored summary or streams
+    Gemini tokens into a broadcast, then persists the result. It is registered in
+    summary_flight, so non-streaming requests share it as well.
+    """
+    broadcast = SummaryBroadcast()
+
+    async def produce():
+        try:
+            summary = await asyncio.to_thread(get_stored_summary, *key)
+            if summary is not None:
+                broadcast.append(summary)
+            else:
+                async for chunk in astream_article_summary(article):
+                    broadcast.append(chunk)
+                summary = "".join(broadcast.chunks)
+                await asyncio.to_thread(store_summary, *key, summary)
+            summary_cache.set(key, summary)
+        except BaseException as e:
+            # Cancellation must still release the streams waiting on the broadcast
+            broadcast.finish(e if isinstance(e, Exception) else RuntimeError("Summary generation was cancelled"))
+            raise
+        finally:
+            summary_streams.pop(key, None)
+        broadcast.finish()
+        return summary
+
+    summary_streams[key] = broadcast
+    task = summary_flight.start(key, produce)
+    # Streams see failures through the broadcast; mark the task's exception as retrieved
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+    return broadcast
+
+
+async def stream_summary(article):
+    """
+    Yield summary text chunks. Cached summaries and non-streaming generations
+    already in flight are replayed as one chunk. Otherwise concurrent streams for
+    the same article share one producer: the first starts it, later ones replay
+    what it has produced so far and then follow it.
+    """
+    key = (article['id'], content_hash(article))
+    summary = summary_cache.get(key)
+    if summary is not None:
+        yield summary
+        return
+
+    broadcast = summary_streams.get(key)
+    if broadcast is None:
+        in_flight = summary_flight.get(key)
+        if in_flight is not None:
+            yield await asyncio.shield(in_flight)
+            return
+        broadcast = start_summary_stream(key, article)
+
+    async for chunk in broadcast.replay():
+        yield chunk
@@ -0,0 +1,89 @@
+"""Full-precision passage vectors kept on disk and memory-mapped for exact re-ranking."""
+import os
+
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"
+VECTOR_IDS_FILE = "vector_ids.npy"
+
+
+class VectorStoreWriter:
+    """
+    Append vectors in any id order to a raw spool file; close() writes the
+    id-sorted .npy pair in chunks, so the full store is never held in memory.
+    """
+
+    CHUNK_ROWS = 65536
+
+    def __init__(self, directory, dimension):
+        self.directory = directory
+        self.dimension = dimension
+        self.ids = []
+        self._spool_path = os.path.join(directory, f"{VECTORS_FILE}.spool")
+        self._spool = open(self._spool_path, "wb")
+
+    def add(self, ids, vectors):
+        vectors = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension))
+        self._spool.write(vectors.tobytes())
+        self.ids.extend(np.asarray(ids, dtype=np.int64).tolist())
+
+    def close(self):
+        """Write VECTOR_IDS_FILE and VECTORS_FILE to the directory and return their paths."""
+        self._spool.close()
+        ids = np.array(self.ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        ids_path = os.path.join(self.directory, VECTOR_IDS_FILE)
+        vectors_path = os.path.join(self.directory, VECTORS_FILE)
+        np.save(ids_path, ids[order], allow_pickle=False)
+
+        output = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(len(ids), self.dimension))
+        if len(ids):
+            spool = np.memmap(self._spool_path, dtype=np.float32, mode="r", shape=(len(ids), self.dimension))
+            for start in range(0, len(ids), self.CHUNK_ROWS):
+                output[start:start + self.CHUNK_ROWS] = spool[order[start:start + self.CHUNK_ROWS]]
+            del spool
+        output.flush()
+        del output
+        os.remove(self._spool_path)
+        return ids_path, vectors_path
+
+
+class VectorStore:
+    """
+    Vector ids (sorted, in memory) and their float32 vectors (memory-mapped).
+    Only the rows touched by re-ranking are paged in, and workers on one host
+    share those pages through the OS cache.
+    """
+
+    def __init__(self, ids, vectors):
+        self.ids = ids
+        self.vectors = vectors
+
+    @classmethod
+    def open(cls, ids_path, vectors_path):
+        ids = np.load(ids_path, allow_pickle=False)
+        vectors = np.load(vectors_path, mmap_mode="r", allow_pickle=False)
+        return cls(ids, vectors)
+
+    def lookup(self, ids):
+        """Vectors of ids that are all known to be in the store."""
+        return np.asarray(self.vectors[np.searchsorted(self.ids, np.asarray(ids, dtype=np.int64))])
+
+    def rerank(self, query_vector, candidate_ids, k):
+        """Exact inner-product scores for first-pass candidates; returns the top k (ids, scores)."""
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        candidate_ids = candidate_ids[candidate_ids >= 0]
+        if not len(self.ids) or not len(candidate_ids):
+            return candidate_ids[:0], np.empty(0, dtype=np.float32)
+        rows = np.searchsorted(self.ids, candidate_ids)
+        rows = np.minimum(rows, len(self.ids) - 1)
+        found = self.ids[rows] == candidate_ids
+        candidate_ids, rows = candidate_ids[found], rows[found]
+
+        # Fancy indexing a memmap reads just these rows; sorted rows keep the reads sequential
+        order = np.argsort(rows)
+        scores = np.empty(len(rows), dtype=np.float32)
+        scores[order] = self.vectors[rows[order]] @ np.asarray(query_vector, dtype=np.float32)
+
+        best = np.argsort(-scores, kind="stable")[:k]
+        return candidate_ids[best], scores[best]
@@ -1,11 +1,9 @@
 import os
+import re
+import threading
+import time
 from dotenv import load_dotenv
 
-try:
-    from sentence_transformers import SentenceTransformer
-except ImportError:
-    SentenceTransformer = None
-
 load_dotenv()
 
 # Scraper settings
@@ -17,7 +15,11 @@ HEADERS = {
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
     'Accept-Language': 'en-US,en;q=0.9'
 }
-CHECK_INTERVAL = 7200  # 2 hours
+CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", 7200))  # 2 hours
+ROBOTS_CACHE_TTL = int(os.getenv("ROBOTS_CACHE_TTL", 86400))  # seconds a parsed robots.txt is reused
+INSERT_BATCH_SIZE = int(os.getenv("INSERT_BATCH_SIZE", 20))  # articles per upsert request
+INSERT_FLUSH_INTERVAL = float(os.getenv("INSERT_FLUSH_INTERVAL", 60))  # seconds before a partial batch is written
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", 6))  # article-page fetch threads across all hosts
 
 # Multi-source configuration
 NEWS_SOURCES = [
@@ -27,6 +29,8 @@ NEWS_SOURCES = [
         "base_url": "https://www.geo.tv/latest-news",
         "robots_url": "https://www.geo.tv/robots.txt",
         "domain": "www.geo.tv",
+        "max_concurrency": 2,
+        "requests_per_second": 1.0,
     },
     {
         "name": "tribune",
@@ -34,6 +38,8 @@ NEWS_SOURCES = [
         "base_url": "https://tribune.com.pk/latest",
         "robots_url": "https://tribune.com.pk/robots.txt",
         "domain": "tribune.com.pk",
+        "max_concurrency": 2,
+        "requests_per_second": 1.0,
     },
     {
         "name": "thenews",
@@ -41,22 +47,135 @@ NEWS_SOURCES = [
         "base_url": "https://www.thenews.com.pk/latest-stories",
         "robots_url": "https://www.thenews.com.pk/robots.txt",
         "domain": "www.thenews.com.pk",
+        "max_concurrency": 2,
+        "requests_per_second": 1.0,
     },
 ]
 
 # Models
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-base-en-v1.5")
+# "torch" (fp32 PyTorch), "onnx" (ONNX Runtime) or "onnx-int8" (dynamically quantized ONNX);
+# the ONNX backends need `pip install "sentence-transformers[onnx]"`
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Instruction set the int8 graph is quantized for: avx2, avx512, avx512_vnni or arm64
+ONNX_QUANTIZATION = os.getenv("ONNX_QUANTIZATION", "avx512_vnni")
 CHAT_MODEL = "gemini-2.5-flash"
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# API settings
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", 2))  # threads for query encoding and FAISS search
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))  # cached query embeddings
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 3600))  # seconds
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 512))  # cached /query summaries
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 7200))  # seconds
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.95))  # 0 disables semantic matches
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", 1024))  # per-article summaries kept in memory
+# Concurrent retrievals are coalesced into one encode + search of up to SEARCH_BATCH_SIZE
+# queries, waiting at most SEARCH_BATCH_WAIT seconds for a batch to fill; 1 disables batching
+SEARCH_BATCH_SIZE = int(os.getenv("SEARCH_BATCH_SIZE", 32))
+SEARCH_BATCH_WAIT = float(os.getenv("SEARCH_BATCH_WAIT", 0.002))
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", 1000))  # queries accepted by one /search/batch request
+MAX_ARTICLES = int(os.getenv("MAX_ARTICLES", 50))  # largest max_articles a request may ask for
+# Retrieval run once at start-up before /ready reports ready; empty skips the warm-up search
+WARM_UP_QUERY = os.getenv("WARM_UP_QUERY", "latest news from Pakistan")
+INDEX_POLL_INTERVAL = float(os.getenv("INDEX_POLL_INTERVAL", 300))  # seconds between manifest checks, 0 disables
+# "vector", "lexical" (BM25) or "hybrid" (both, merged with reciprocal rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))  # results taken from each list before fusion
+RRF_K = int(os.getenv("RRF_K", 60))
+
+# Local caches (embeddings, scraper state) live under this directory
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+EMBEDDING_CACHE_RETENTION = int(os.getenv("EMBEDDING_CACHE_RETENTION", 3 * 86400))  # seconds since last use
+
+# FAISS index: a faiss.index_factory description (e.g. "Flat", "HNSW32", "IVF256,Flat"),
+# always wrapped in IDMap2 and built with inner-product metric over normalised embeddings
+FAISS_INDEX_FACTORY = os.getenv("FAISS_INDEX_FACTORY", "Flat")
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", 64))  # HNSW candidates explored per query
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", 16))  # IVF lists scanned per query
+# Compressed factories ("SQ8", "PQ96", "IVF256,SQ8") keep full-precision vectors in a
+# memory-mapped file; the top k * FAISS_RERANK_FACTOR candidates are re-scored exactly
+FAISS_RERANK_FACTOR = int(os.getenv("FAISS_RERANK_FACTOR", 4))
+# Article content is indexed as overlapping word windows ("passages"); passage ids are
+# article_id * MAX_PASSAGES + n, so an article keeps at most MAX_PASSAGES of them
+PASSAGE_WORDS = int(os.getenv("PASSAGE_WORDS", 120))
+PASSAGE_OVERLAP = int(os.getenv("PASSAGE_OVERLAP", 30))
+MAX_PASSAGES = int(os.getenv("MAX_PASSAGES", 32))
+PASSAGE_SEARCH_FACTOR = int(os.getenv("PASSAGE_SEARCH_FACTOR", 4))  # passages first searched per requested article
+PASSAGES_PER_ARTICLE = int(os.getenv("PASSAGES_PER_ARTICLE", 2))  # best passages passed to the LLM
+INDEX_BUILD_BATCH = int(os.getenv("INDEX_BUILD_BATCH", 256))  # articles fetched and embedded per step
+FAISS_TRAIN_SIZE = int(os.getenv("FAISS_TRAIN_SIZE", 50000))  # vectors buffered to train IVF/PQ indexes
+# Read and publish index artifacts in this directory instead of the Supabase "Faiss" bucket
+INDEX_SOURCE_DIR = os.getenv("INDEX_SOURCE_DIR")
+
 # Initialize local embeddings lazily so unrelated imports do not trigger model load
 embedding_model = None
 EMBEDDING_DIMENSION = None
+_embedding_model_lock = threading.Lock()
+# After a failed model load, requests fail fast (and fall back to BM25) for this many seconds
+EMBEDDING_RETRY_INTERVAL = float(os.getenv("EMBEDDING_RETRY_INTERVAL", 60))
+_embedding_model_error = None
+_embedding_model_failed_at = None
+
+# sentence_transformers imports torch, which takes seconds, so it is imported on first model load
+SentenceTransformer = None
+_sentence_transformers_missing = False
+
+
+def import_sentence_transformers():
+    """The SentenceTransformer class, imported on first use; None when the package is not installed."""
+    global SentenceTransformer, _sentence_transformers_missing
+
+    if SentenceTransformer is None:
+        if _sentence_transformers_missing:
+            return None
+        try:
+            from sentence_transformers import SentenceTransformer as sentence_transformer_class
+        except ImportError:
+            _sentence_transformers_missing = True
+            return None
+        SentenceTransformer = sentence_transformer_class
+    return SentenceTransformer
+
+
+def load_sentence_transformer(model_name, backend):
+    """Load the model for one EMBEDDING_BACKEND; the int8 graph is exported once into CACHE_DIR."""
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        # Uses the repository's onnx/model.onnx, or exports one when it has none
+        return SentenceTransformer(model_name, backend="onnx")
+    if backend == "onnx-int8":
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        local_dir = os.path.join(CACHE_DIR, "onnx", re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        file_name = f"onnx/model_qint8_{ONNX_QUANTIZATION}.onnx"
+        if not os.path.exists(os.path.join(local_dir, file_name)):
+            print(f"[i] Quantizing {model_name} to int8 ({ONNX_QUANTIZATION}) in {local_dir}")
+            fp32 = SentenceTransformer(model_name, backend="onnx")
+            fp32.save(local_dir)
+            export_dynamic_quantized_onnx_model(fp32, ONNX_QUANTIZATION, local_dir)
+        return SentenceTransformer(local_dir, backend="onnx", model_kwargs={"file_name": file_name})
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}, expected torch, onnx or onnx-int8")
 
 
 class LocalEmbeddingModel:
-    def __init__(self, model_name: str):
-        self.client = SentenceTransformer(model_name)
+    def __init__(self, model_name: str, backend: str = EMBEDDING_BACKEND):
+        self.model_name = model_name
+        if import_sentence_transformers() is None:
+            raise ImportError("sentence-transformers is not installed")
+        try:
+            self.client = load_sentence_transformer(model_name, backend)
+        except Exception as e:
+            # sentence-transformers raises a bare Exception when optimum / onnxruntime are missing
+            if backend == "torch":
+                raise
+            print(f"[!] Could not load the {backend} embedding backend, using torch: {e}")
+            backend = "torch"
+            self.client = SentenceTransformer(model_name)
+        self.backend = backend
+        # Vectors from different backends differ slightly, so cached vectors are kept per backend
+        self.cache_key = model_name if backend == "torch" else f"{model_name}@{backend}"
         self.dimension = self.client.get_sentence_embedding_dimension()
 
     def embed_documents(self, texts):
@@ -76,17 +195,39 @@ class LocalEmbeddingModel:
         return embedding.tolist()
 
 
+def raise_if_recently_failed():
+    """Re-raise the last model load error while EMBEDDING_RETRY_INTERVAL has not passed since it."""
+    if _embedding_model_failed_at is None:
+        return
+    remaining = _embedding_model_failed_at + EMBEDDING_RETRY_INTERVAL - time.monotonic()
+    if remaining > 0:
+        raise RuntimeError(f"Embedding model unavailable, next load attempt in {remaining:.0f}s: "
+                           f"{_embedding_model_error}")
+
+
 def get_embedding_model():
-    global embedding_model, EMBEDDING_DIMENSION
+    global embedding_model, EMBEDDING_DIMENSION, _embedding_model_error, _embedding_model_failed_at
 
     if embedding_model is not None:
         return embedding_model
-
-    if SentenceTransformer is None:
-        return None
-
-    embedding_model = LocalEmbeddingModel(EMBEDDING_MODEL)
-    EMBEDDING_DIMENSION = embedding_model.dimension
+    raise_if_recently_failed()
+
+    # The startup warm-up and early requests may ask at the same time; load the model once
+    with _embedding_model_lock:
+        if embedding_model is not None:
+            return embedding_model
+        raise_if_recently_failed()
+        if import_sentence_transformers() is None:
+            return None
+        try:
+            model = LocalEmbeddingModel(EMBEDDING_MODEL)
+        except Exception as e:
+            _embedding_model_error, _embedding_model_failed_at = e, time.monotonic()
+            print(f"[!] Could not load embedding model {EMBEDDING_MODEL}, retrying in {EMBEDDING_RETRY_INTERVAL:.0f}s: {e}")
+            raise
+        EMBEDDING_DIMENSION = model.dimension
+        embedding_model = model
+        _embedding_model_error = _embedding_model_failed_at = None
     return embedding_model
 
 
@@ -0,0 +1,286 @@
+"""On-disk embedding cache keyed by (model name, hash of the embedded text)."""
+import glob
+import hashlib
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from src.core.config import CACHE_DIR, EMBEDDING_CACHE_RETENTION, EMBEDDING_MODEL
+
+KEY_BYTES = 16
+# A shard is three .npy files: <number>.keys.npy, <number>.vectors.npy and <number>.last_used.npy
+SHARD_PARTS = ("keys", "vectors", "last_used")
+# A cache hit refreshes its last-used time only when the stored one is older than this, so
+# repeated hits do not rewrite timestamps on every save (retention is measured in days)
+TOUCH_INTERVAL = 3600
+# Rows copied at a time when shards are merged or compacted
+CHUNK_ROWS = 65536
+
+
+def text_key(text):
+    """Fixed-width digest of the text, stored as one uint8 row per embedding."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+def save_array(path, array):
+    """Atomically write one .npy file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def row_blocks(vectors, keep=None):
+    """Rows of a (memory-mapped) matrix in blocks of CHUNK_ROWS, optionally only those where keep is True."""
+    for start in range(0, len(vectors), CHUNK_ROWS):
+        block = np.asarray(vectors[start:start + CHUNK_ROWS])
+        yield block if keep is None else block[keep[start:start + CHUNK_ROWS]]
+
+
+class Shard:
+    """One saved batch of cache rows."""
+
+    def __init__(self, number, keys, vectors, last_used):
+        self.number = number
+        self.keys = keys
+        self.vectors = vectors
+        self.last_used = last_used
+        # Last-used times changed since the shard was written
+        self.touched = False
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class EmbeddingCache:
+    """
+    Embeddings for one model, stored as append-only shards. Each save writes the
+    vectors added since the last save as a new shard, and a shard is merged into
+    the one before it once it has grown as large, so a cache filled over many
+    saves is written O(n log n) bytes in total and kept in O(log n) files.
+    Last-used times are rewritten per shard, without the vectors. Saved vectors
+    are memory-mapped, so only rows added since the last save are held in memory.
+    """
+
+    def __init__(self, model_name, cache_dir=CACHE_DIR, retention=EMBEDDING_CACHE_RETENTION):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.directory = os.path.join(cache_dir, "embeddings", safe_name)
+        # Single-file cache written by earlier versions; its rows move into a shard on the next save
+        self.legacy_path = f"{self.directory}.npz"
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._shards = []
+        # First row number of each shard, plus the total; rows are numbered across shards in order
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._next_number = 0
+        # Rows added since the last save; they are numbered after every saved row
+        self._pending_keys, self._pending_vectors, self._pending_used = [], [], []
+        self._rows = {}
+        self._load()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _path(self, number, part):
+        return os.path.join(self.directory, f"{number:06d}.{part}.npy")
+
+    def _read_shard(self, number):
+        keys = np.load(self._path(number, "keys"))
+        vectors = np.load(self._path(number, "vectors"), mmap_mode="r")
+        last_used = np.load(self._path(number, "last_used"))
+        if not len(keys) == len(vectors) == len(last_used):
+            raise ValueError("shard files have different lengths")
+        return Shard(number, keys, vectors, last_used)
+
+    def _load(self):
+        numbers = sorted({int(os.path.basename(path).split(".")[0])
+                          for path in glob.glob(os.path.join(self.directory, "*.npy"))})
+        self._next_number = numbers[-1] + 1 if numbers else 0
+        for number in numbers:
+            try:
+                self._shards.append(self._read_shard(number))
+            except Exception as e:
+                # A shard whose write was interrupted; its rows are simply encoded again
+                print(f"[!] Ignoring unreadable embedding cache shard {self._path(number, 'keys')}: {e}")
+
+        if not self._shards and os.path.exists(self.legacy_path):
+            try:
+                with np.load(self.legacy_path) as data:
+                    self._pending_keys = [key.tobytes() for key in data["keys"]]
+                    self._pending_vectors = list(data["vectors"])
+                    self._pending_used = data["last_used"].tolist()
+            except Exception as e:
+                print(f"[!] Ignoring unreadable embedding cache {self.legacy_path}: {e}")
+                self._pending_keys, self._pending_vectors, self._pending_used = [], [], []
+        self._index_rows()
+
+    def _index_rows(self):
+        self._offsets = np.cumsum([0] + [len(shard) for shard in self._shards], dtype=np.int64)
+        self._rows = {}
+        for shard, start in zip(self._shards, self._offsets):
+            # An interrupted merge can leave a row in two shards; the first copy wins
+            for row, key in enumerate(shard.keys):
+                self._rows.setdefault(key.tobytes(), int(start) + row)
+        for row, key in enumerate(self._pending_keys, start=int(self._offsets[-1])):
+            self._rows.setdefault(key, row)
+
+    def get_many(self, texts):
+        """Return cached vectors in input order, with None for every miss."""
+        now = time.time()
+        found = []
+        with self._lock:
+            saved = int(self._offsets[-1])
+            for text in texts:
+                row = self._rows.get(text_key(text))
+                if row is None:
+                    found.append(None)
+                    continue
+                if row >= saved:
+                    self._pending_used[row - saved] = now
+                    found.append(self._pending_vectors[row - saved])
+                    continue
+                position = int(np.searchsorted(self._offsets, row, side="right")) - 1
+                shard, local = self._shards[position], row - int(self._offsets[position])
+                if shard.last_used[local] < now - TOUCH_INTERVAL:
+                    shard.last_used[local] = now
+                    shard.touched = True
+                found.append(shard.vectors[local])
+        return found
+
+    def put_many(self, texts, vectors):
+        """Add vectors for texts not already cached; they are written on the next save()."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        now = time.time()
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = text_key(text)
+                if key in self._rows:
+                    continue
+                self._rows[key] = int(self._offsets[-1]) + len(self._pending_keys)
+                self._pending_keys.append(key)
+                self._pending_vectors.append(vector)
+                self._pending_used.append(now)
+
+    def _write_shard(self, keys, vector_blocks, last_used):
+        """
+        Write a shard from its keys, its vectors as an iterable of consecutive row
+        blocks and its last-used times. Blocks are copied into a memory-mapped
+        file, so merging large shards does not load them into memory.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        number = self._next_number
+        self._next_number += 1
+        save_array(self._path(number, "keys"), keys)
+
+        vectors_path = self._path(number, "vectors")
+        vectors, row = None, 0
+        for block in vector_blocks:
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(f"{vectors_path}.tmp", mode="w+", dtype=np.float32,
+                                                    shape=(len(keys), block.shape[1]))
+            vectors[row:row + len(block)] = block
+            row += len(block)
+        vectors.flush()
+        del vectors
+        os.replace(f"{vectors_path}.tmp", vectors_path)
+
+        # Last-used times go last: a shard missing any part is ignored on load
+        save_array(self._path(number, "last_used"), last_used)
+        return Shard(number, keys, np.load(vectors_path, mmap_mode="r"), last_used)
+
+    def _remove_shard(self, shard):
+        for part in SHARD_PARTS:
+            try:
+                os.remove(self._path(shard.number, part))
+            except FileNotFoundError:
+                pass
+
+    def _merge_tail(self):
+        """Merge the newest shard into the one before it while it is at least as large."""
+        while len(self._shards) >= 2 and len(self._shards[-1]) >= len(self._shards[-2]):
+            older, newer = self._shards[-2:]
+            merged = self._write_shard(
+                np.concatenate([older.keys, newer.keys]),
+                (block for shard in (older, newer) for block in row_blocks(shard.vectors)),
+                np.concatenate([older.last_used, newer.last_used]),
+            )
+            self._shards[-2:] = [merged]
+            self._remove_shard(older)
+            self._remove_shard(newer)
+
+    def evict(self, now=None):
+        """Drop saved rows that have not been used within the retention window."""
+        now = time.time() if now is None else now
+        with self._lock:
+            keeps = [shard.last_used >= now - self.retention for shard in self._shards]
+            evicted = sum(int((~keep).sum()) for keep in keeps)
+            if not evicted:
+                return 0
+
+            old_shards, self._shards = self._shards, []
+            if any(keep.any() for keep in keeps):
+                self._shards.append(self._write_shard(
+                    np.concatenate([shard.keys[keep] for shard, keep in zip(old_shards, keeps)]),
+                    (block for shard, keep in zip(old_shards, keeps) for block in row_blocks(shard.vectors, keep)),
+                    np.concatenate([shard.last_used[keep] for shard, keep in zip(old_shards, keeps)]),
+                ))
+            for shard in old_shards:
+                self._remove_shard(shard)
+            self._index_rows()
+            return evicted
+
+    def save(self):
+        """Evict expired rows, write new rows as a shard and refresh changed last-used times."""
+        self.evict()
+        with self._lock:
+            if self._pending_keys:
+                keys = np.frombuffer(b"".join(self._pending_keys), dtype=np.uint8).reshape(-1, KEY_BYTES)
+                self._shards.append(self._write_shard(
+                    keys, [np.stack(self._pending_vectors)], np.array(self._pending_used, dtype=np.float64)
+                ))
+                self._pending_keys, self._pending_vectors, self._pending_used = [], [], []
+                self._merge_tail()
+                # Row numbers are unchanged: merges keep rows in order and new rows were numbered last
+                self._offsets = np.cumsum([0] + [len(shard) for shard in self._shards], dtype=np.int64)
+            for shard in self._shards:
+                if shard.touched:
+                    save_array(self._path(shard.number, "last_used"), shard.last_used)
+                    shard.touched = False
+            if self._shards and os.path.exists(self.legacy_path):
+                os.remove(self.legacy_path)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name=EMBEDDING_MODEL):
+    """Return the process-wide cache for a model, loading it from disk on first use."""
+    with _caches_lock:
+        if model_name not in _caches:
+            _caches[model_name] = EmbeddingCache(model_name)
+        return _caches[model_name]
+
+
+def model_key(embedding_model):
+    """Name cached vectors are stored under: the model, plus the backend when it is not torch."""
+    return getattr(embedding_model, "cache_key", getattr(embedding_model, "model_name", EMBEDDING_MODEL))
+
+
+def cached_embed_documents(embedding_model, texts):
+    """Embed texts, encoding only those missing from the cache, and persist new vectors."""
+    cache = get_embedding_cache(model_key(embedding_model))
+
+    vectors = cache.get_many(texts)
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        encoded = embedding_model.embed_documents([texts[i] for i in missing])
+        for i, vector in zip(missing, encoded):
+            vectors[i] = np.asarray(vector, dtype=np.float32)
+        cache.put_many([texts[i] for i in missing], encoded)
+    cache.save()
+
+    return vectors
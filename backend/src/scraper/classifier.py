@@ -1,7 +1,15 @@
 import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from dotenv import load_dotenv
 
+from src.core.config import CACHE_DIR
+
 load_dotenv()
 
 HF_TOKEN = os.getenv("HF_TOKEN")
@@ -18,14 +26,102 @@ CATEGORIES = [
     "National News from Pakistan",
 ]
 
+LOW_CONFIDENCE_THRESHOLD = 0.3
+UNCATEGORIZED = "uncategorized"
 
-def classify_category(text):
-    if not HF_TOKEN:
-        print("[!] Hugging Face token not found. Please set HF_TOKEN in your .env file.")
-        return "uncategorized"
+# "hf" calls the remote BART-MNLI endpoint, "embedding" scores local article embeddings
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "hf")
+BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", 8))  # inputs per HF request
+MAX_CONCURRENCY = int(os.getenv("CLASSIFIER_MAX_CONCURRENCY", 2))  # HF requests in flight
+REQUEST_TIMEOUT = float(os.getenv("CLASSIFIER_TIMEOUT", 30))
+CACHE_FILE = os.path.join(CACHE_DIR, "categories.json")
+
+
+class CircuitBreaker:
+    """Stops calling the endpoint after repeated failures and lets one probe through after `reset_timeout`."""
+
+    def __init__(self, failure_threshold=3, reset_timeout=300):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Half-open: the next caller probes, everyone else keeps deferring
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f"[!] Classifier failing repeatedly, deferring classification for {self.reset_timeout}s")
+                self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_FILE, encoding="utf-8") as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache():
+    os.makedirs(os.path.dirname(CACHE_FILE) or ".", exist_ok=True)
+    tmp_path = f"{CACHE_FILE}.tmp"
+    with _cache_lock:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_cache, f)
+    os.replace(tmp_path, CACHE_FILE)
+
+
+def _label_from_result(result, text):
+    if "labels" in result and "scores" in result:
+        top_label = result["labels"][0]
+        top_score = result["scores"][0]
+
+        if top_score < LOW_CONFIDENCE_THRESHOLD:
+            print(f"[!] Low confidence ({top_score:.2f}) for: {text[:60]}")
+            return "Others"
+
+        return top_label
+
+    print(f"[!] Unexpected response format: {result}")
+    return UNCATEGORIZED
+
+
+def _classify_batch(texts):
+    """Classify one batch in a single request; every text is UNCATEGORIZED when the call is skipped or fails."""
+    if not breaker.allow():
+        return [UNCATEGORIZED] * len(texts)
 
     payload = {
-        "inputs": text,
+        "inputs": texts,
         "parameters": {
             "candidate_labels": CATEGORIES,
             "hypothesis_template": "This article is about {}.",
@@ -34,31 +130,67 @@ def classify_category(text):
     }
 
     try:
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=120)
+        response = requests.post(API_URL, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
-        result = response.json()
-
-        if "labels" in result and "scores" in result:
-            top_label = result["labels"][0]
-            top_score = result["scores"][0]
-
-            if top_score < 0.3:
-                print(f"[!] Low confidence ({top_score:.2f}) for: {text[:60]}")
-                return "Others"
-
-            return top_label
-        else:
-            print(f"[!] Unexpected response format: {result}")
-            return "uncategorized"
-
+        results = response.json()
     except requests.exceptions.Timeout:
         print("[!] Request timed out.")
-        return "uncategorized"
-
+        breaker.record_failure()
+        return [UNCATEGORIZED] * len(texts)
     except requests.exceptions.RequestException as e:
         print(f"[!] HTTP Error: {e}")
-        return "uncategorized"
-
+        breaker.record_failure()
+        return [UNCATEGORIZED] * len(texts)
     except Exception as e:
         print(f"[!] Unexpected error: {e}")
-        return "uncategorized"
+        breaker.record_failure()
+        return [UNCATEGORIZED] * len(texts)
+
+    breaker.record_success()
+    if isinstance(results, dict):
+        results = [results]
+    if len(results) != len(texts):
+        print(f"[!] Expected {len(texts)} classification results, got {len(results)}")
+        return [UNCATEGORIZED] * len(texts)
+
+    return [_label_from_result(result, text) for result, text in zip(results, texts)]
+
+
+def classify_categories(texts):
+    """
+    Classify many title+excerpt texts, reusing cached labels and sending the rest
+    in batches with bounded concurrency. Texts that could not be classified come
+    back as UNCATEGORIZED so ingestion never waits on the endpoint.
+    """
+    if CLASSIFIER_BACKEND == "embedding":
+        from src.scraper.prototype_classifier import classify_with_prototypes
+        return classify_with_prototypes(texts)
+
+    if not HF_TOKEN:
+        print("[!] Hugging Face token not found. Please set HF_TOKEN in your .env file.")
+        return [UNCATEGORIZED] * len(texts)
+
+    cache = _load_cache()
+    keys = [_text_key(text) for text in texts]
+    missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in cache))
+
+    if missing:
+        batches = [missing[i:i + BATCH_SIZE] for i in range(0, len(missing), BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(batches))) as executor:
+            labelled = list(executor.map(_classify_batch, batches))
+
+        fresh = False
+        with _cache_lock:
+            for batch, labels in zip(batches, labelled):
+                for text, label in zip(batch, labels):
+                    if label != UNCATEGORIZED:
+                        cache[_text_key(text)] = label
+                        fresh = True
+        if fresh:
+            _save_cache()
+
+    return [cache.get(key, UNCATEGORIZED) for key in keys]
+
+
+def classify_category(text):
+    return classify_categories([text])[0]
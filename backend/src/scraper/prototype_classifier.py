@@ -0,0 +1,113 @@
+"""Local category classifier that scores article embeddings against per-category prototype vectors."""
+import numpy as np
+
+from src.core.config import get_embedding_model
+from src.core.database import supabase
+from src.core.embedding_cache import cached_embed_documents
+from src.scraper.classifier import CATEGORIES, LOW_CONFIDENCE_THRESHOLD, UNCATEGORIZED
+
+# Written so the description embedding sits close to typical headlines of the category
+LABEL_DESCRIPTIONS = {
+    "Technology and Innovation": "Technology and innovation news: internet, telecom, software, "
+                                 "artificial intelligence, smartphones, startups, science and space.",
+    "Corporate and Business News": "Business and economy news: markets, stocks, PSX, banks, inflation, "
+                                   "petrol prices, IMF, trade, companies and earnings.",
+    "Sports and Athletics": "Sports news: cricket, PCB, football, hockey, tennis, matches, players, "
+                            "tournaments and athletes.",
+    "National News from Pakistan": "Pakistan national news: government, politics, parliament, Senate, "
+                                   "courts, provinces, security and public affairs.",
+}
+
+DESCRIPTION_WEIGHT = 0.5  # share of the description vector once labelled examples exist
+TEMPERATURE = 0.05  # softmax temperature so scores are comparable to the 0.3 MNLI threshold
+LABELLED_EXAMPLES_LIMIT = 500
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def fetch_labelled_articles(limit=LABELLED_EXAMPLES_LIMIT):
+    """Recent articles that already carry one of the known categories."""
+    try:
+        response = (
+            supabase.table('news_articles')
+            .select('title, excerpt, category')
+            .in_('category', CATEGORIES)
+            .order('scraped_at', desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return response.data
+    except Exception as e:
+        print(f"[!] Could not fetch labelled articles for prototypes: {e}")
+        return []
+
+
+class PrototypeClassifier:
+    """Cosine similarity to one prototype per category, turned into probabilities with a softmax."""
+
+    def __init__(self, embedding_model, labelled_articles=()):
+        self.embedding_model = embedding_model
+        self.labels = list(CATEGORIES)
+
+        descriptions = [f"{label}. {LABEL_DESCRIPTIONS[label]}" for label in self.labels]
+        prototypes = _normalize(np.array(cached_embed_documents(embedding_model, descriptions), dtype=np.float32))
+
+        examples = [article for article in labelled_articles if article['category'] in self.labels]
+        if examples:
+            vectors = self.embed([f"{article['title']} {article['excerpt']}" for article in examples])
+            categories = np.array([article['category'] for article in examples])
+            for i, label in enumerate(self.labels):
+                members = vectors[categories == label]
+                if len(members):
+                    centroid = _normalize(members.mean(axis=0))
+                    prototypes[i] = DESCRIPTION_WEIGHT * prototypes[i] + (1 - DESCRIPTION_WEIGHT) * centroid
+
+        self.prototypes = _normalize(prototypes)
+
+    def embed(self, texts):
+        """Article embeddings, shared with the FAISS build through the embedding cache."""
+        return np.array(cached_embed_documents(self.embedding_model, texts), dtype=np.float32).reshape(len(texts), -1)
+
+    def scores(self, vectors):
+        logits = _normalize(vectors) @ self.prototypes.T / TEMPERATURE
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def classify_vectors(self, vectors):
+        labels = []
+        for row in self.scores(vectors):
+            best = int(row.argmax())
+            labels.append(self.labels[best] if row[best] >= LOW_CONFIDENCE_THRESHOLD else "Others")
+        return labels
+
+    def classify(self, texts):
+        if not texts:
+            return []
+        return self.classify_vectors(self.embed(texts))
+
+
+_classifier = None
+
+
+def get_prototype_classifier(refresh=False):
+    """Build the classifier once per process, from label descriptions and labelled past articles."""
+    global _classifier
+
+    if _classifier is None or refresh:
+        embedding_model = get_embedding_model()
+        if embedding_model is None:
+            return None
+        _classifier = PrototypeClassifier(embedding_model, fetch_labelled_articles())
+    return _classifier
+
+
+def classify_with_prototypes(texts):
+    classifier = get_prototype_classifier()
+    if classifier is None:
+        print("[!] Local embedding model is not configured")
+        return [UNCATEGORIZED] * len(texts)
+    return classifier.classify(texts)
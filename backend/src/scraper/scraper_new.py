@@ -1,32 +1,109 @@
 import requests
+import time
+from collections import Counter
 from datetime import datetime, timezone
 from urllib.robotparser import RobotFileParser
 
-from src.core.config import HEADERS, NEWS_SOURCES
+from src.core.config import HEADERS, INSERT_BATCH_SIZE, INSERT_FLUSH_INTERVAL, NEWS_SOURCES, ROBOTS_CACHE_TTL
 from src.core.database import supabase
-from src.scraper.sources import SOURCE_PARSERS
-from src.scraper.classifier import classify_category
-from src.utils.helpers import human_delay
+from src.scraper.sources import SOURCE_PARSERS, commit_feed_state
+from src.scraper.classifier import UNCATEGORIZED, classify_categories
+from src.scraper.fetcher import FetchEngine
+from src.scraper.urls import canonicalize_url
 
+# Keeps each bulk lookup's query string well below PostgREST URL limits
+URL_LOOKUP_CHUNK = 100
+URL_WARM_PAGE_SIZE = 1000
 
-def article_exists(article_url):
-    """Checks if article already exists."""
+# Canonical URLs known to be stored, shared by every scrape in this process
+_seen_urls = set()
+_seen_urls_warmed = False
+
+# robots_url -> (fetched_at, RobotFileParser)
+_robot_parsers = {}
+
+
+def warm_seen_urls():
+    """Load every stored URL into the in-process seen set, one page at a time."""
+    global _seen_urls_warmed
+
+    start = 0
     try:
-        response = supabase.table('news_articles').select('id').eq('url', article_url).execute()
-        return len(response.data) > 0
+        while True:
+            response = (
+                supabase.table('news_articles')
+                .select('url')
+                # A stable order, so rows are not skipped or repeated between pages
+                .order('id')
+                .range(start, start + URL_WARM_PAGE_SIZE - 1)
+                .execute()
+            )
+            _seen_urls.update(canonicalize_url(row['url']) for row in response.data)
+            if len(response.data) < URL_WARM_PAGE_SIZE:
+                break
+            start += URL_WARM_PAGE_SIZE
     except Exception as e:
-        print(f"[!] Error checking article: {e}")
-        return True
+        print(f"[!] Error warming seen URLs: {e}")
+        return
 
+    _seen_urls_warmed = True
+    print(f"[i] Warmed seen-URL set with {len(_seen_urls)} stored article(s)")
 
-def insert_article(article_meta):
+
+def filter_new_articles(article_blocks):
+    """
+    Canonicalize feed URLs and drop articles that are already stored, using the
+    seen-URL set first and one bulk membership query for whatever is left.
+    Raises when the lookup fails, so the caller does not commit the feed's
+    validators: a 304 on the next run would otherwise hide unchecked items.
+    """
+    candidates, batch_urls = [], set()
+    for meta in article_blocks:
+        canonical = canonicalize_url(meta['url'])
+        if canonical in _seen_urls or canonical in batch_urls:
+            continue
+        batch_urls.add(canonical)
+        candidates.append((meta, canonical))
+
+    if not candidates:
+        return []
+
+    # Rows stored before canonicalization may only match the raw feed URL
+    lookup = sorted({meta['url'] for meta, _ in candidates} | batch_urls)
+    existing = set()
+    try:
+        for i in range(0, len(lookup), URL_LOOKUP_CHUNK):
+            response = (
+                supabase.table('news_articles')
+                .select('url')
+                .in_('url', lookup[i:i + URL_LOOKUP_CHUNK])
+                .execute()
+            )
+            existing.update(canonicalize_url(row['url']) for row in response.data)
+    except Exception as e:
+        print(f"[!] Error checking articles: {e}")
+        raise
+
+    _seen_urls.update(existing)
+
+    new_articles = []
+    for meta, canonical in candidates:
+        if canonical in existing:
+            continue
+        meta['url'] = canonical
+        new_articles.append(meta)
+    return new_articles
+
+
+def build_article_row(article_meta):
+    """Map processed article metadata to a news_articles row."""
     raw_time = article_meta.get("publish_time")
     if not raw_time or raw_time in ["N/A", "", None]:
         publish_time = datetime.now(timezone.utc).isoformat()
     else:
         publish_time = raw_time
 
-    article_data = {
+    return {
         "title": article_meta['title'],
         "excerpt": article_meta['excerpt'],
         "publish_time": publish_time,
@@ -36,20 +113,90 @@ def insert_article(article_meta):
         "source": article_meta['source'],
     }
 
+
+def upsert_articles(rows):
+    """
+    Upsert rows in one request, ignoring URLs another run already stored.
+    If the batch is rejected, rows are retried one by one so the failures can be
+    reported per row. Returns a list of (url, error) pairs.
+    """
+    if not rows:
+        return []
+
     try:
-        supabase.table('news_articles').insert(article_data).execute()
-        print(f"[✓] Article inserted: {article_meta['title'][:60]} | {article_meta['category']} [{article_meta['source']}]")
+        supabase.table('news_articles').upsert(rows, on_conflict='url', ignore_duplicates=True).execute()
+        return []
     except Exception as e:
-        print(f"[!] Failed to insert article: {e}")
+        if len(rows) == 1:
+            print(f"[!] Failed to insert article {rows[0]['url']}: {e}")
+            return [(rows[0]['url'], str(e))]
+        print(f"[!] Batch upsert of {len(rows)} article(s) failed, retrying row by row: {e}")
+
+    errors = []
+    for row in rows:
+        try:
+            supabase.table('news_articles').upsert(row, on_conflict='url', ignore_duplicates=True).execute()
+        except Exception as e:
+            print(f"[!] Failed to insert article {row['url']}: {e}")
+            errors.append((row['url'], str(e)))
+    return errors
+
+
+class ArticleBatchWriter:
+    """Buffers processed articles and writes them in batched upserts."""
+
+    def __init__(self, batch_size=INSERT_BATCH_SIZE, flush_interval=INSERT_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows = []
+        self.errors = []
+        self.written = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, article_meta):
+        self.rows.append(build_article_row(article_meta))
+        if len(self.rows) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows and return this flush's (url, error) pairs."""
+        rows, self.rows = self.rows, []
+        self._last_flush = time.monotonic()
+        if not rows:
+            return []
+
+        errors = upsert_articles(rows)
+        failed_urls = {url for url, _ in errors}
+        for row in rows:
+            if row['url'] in failed_urls:
+                continue
+            _seen_urls.add(canonicalize_url(row['url']))
+            print(f"[✓] Article inserted: {row['title'][:60]} | {row['category']} [{row['source']}]")
+
+        self.written += len(rows) - len(failed_urls)
+        self.errors.extend(errors)
+        return errors
+
+
+def insert_article(article_meta):
+    """Write a single article immediately."""
+    writer = ArticleBatchWriter(batch_size=1)
+    writer.add(article_meta)
 
 
 def get_robot_parser(robots_url):
+    """Return a parsed robots.txt, re-downloading it only after ROBOTS_CACHE_TTL seconds."""
+    cached = _robot_parsers.get(robots_url)
+    if cached and time.monotonic() - cached[0] < ROBOTS_CACHE_TTL:
+        return cached[1]
+
     response = requests.get(robots_url, headers=HEADERS, timeout=10)
     response.raise_for_status()
 
     parser = RobotFileParser()
     parser.set_url(robots_url)
     parser.parse(response.text.splitlines())
+    _robot_parsers[robots_url] = (time.monotonic(), parser)
     return parser
 
 
@@ -67,11 +214,10 @@ def check_supabase_connection():
         return False
 
 
-def scrape_source(source_config, robot_parser):
-    """Scrape articles from a single source via its RSS feed."""
-    source_name = source_config['name']
+def collect_source_articles(source_config, robot_parser):
+    """Read a source's RSS feed and return the articles that are new and allowed by robots.txt."""
     display_name = source_config['display_name']
-    parsers = SOURCE_PARSERS[source_name]
+    parsers = SOURCE_PARSERS[source_config['name']]
 
     print(f"\n{'='*50}")
     print(f"[→] Scraping {display_name} (RSS)")
@@ -79,42 +225,107 @@ def scrape_source(source_config, robot_parser):
 
     # Fetch articles list from RSS (no BeautifulSoup listing page needed)
     article_blocks = parsers['extract_links']()
+    if article_blocks is None:
+        print(f"[=] Skipping {display_name}: feed unchanged since last run")
+        return []
     print(f"[i] Found {len(article_blocks)} articles from {display_name} RSS")
 
-    new_count = 0
-    for meta in article_blocks:
-        if article_exists(meta['url']):
-            continue
+    new_articles = filter_new_articles(article_blocks)
+    print(f"[i] {len(new_articles)} of them not yet stored")
 
+    allowed = []
+    for meta in new_articles:
         if not robot_parser.can_fetch(HEADERS['User-Agent'], meta['url']):
             print(f"[=] Skipping blocked article: {meta['title'][:50]}")
             continue
+        allowed.append(meta)
+    return allowed
 
-        print(f"\n[→] Processing: {meta['title'][:60]}...")
 
+def fetch_article_pages(articles, engine):
+    """Fill in article content, fetching pages concurrently for items the RSS feed did not carry in full."""
+    to_fetch = []
+    for meta in articles:
         rss_content = meta.pop('_rss_content', None)
-
         if rss_content and len(rss_content.strip()) > 50:
             # Source provides full content in RSS (e.g. Tribune content:encoded)
             meta['content'] = rss_content
             # excerpt and publish_time already set from RSS
         else:
-            # Fetch the article page for full content
-            human_delay()
-            article_page = parsers['scrape_article'](meta['url'])
-            meta['content'] = article_page['content']
-            if meta['excerpt'] == 'N/A':
-                meta['excerpt'] = article_page['excerpt']
-            if meta['publish_time'] == 'N/A':
-                meta['publish_time'] = article_page['publish_time']
+            to_fetch.append(meta)
+
+    if to_fetch:
+        print(f"\n[→] Fetching {len(to_fetch)} article page(s)...")
+    jobs = [(SOURCE_PARSERS[meta['source']]['scrape_article'], meta['url']) for meta in to_fetch]
+    for meta, article_page in zip(to_fetch, engine.fetch_all(jobs)):
+        if article_page is None:
+            article_page = {'content': 'No content found.', 'excerpt': 'N/A', 'publish_time': 'N/A'}
+        meta['content'] = article_page['content']
+        if meta['excerpt'] == 'N/A':
+            meta['excerpt'] = article_page['excerpt']
+        if meta['publish_time'] == 'N/A':
+            meta['publish_time'] = article_page['publish_time']
+
+
+def process_articles(articles, writer):
+    """Classify fetched articles in one batch and queue them for writing."""
+    categories = classify_categories([f"{meta['title']} {meta['excerpt']}" for meta in articles])
+
+    for meta, category in zip(articles, categories):
+        print(f"\n[→] Processing: {meta['title'][:60]}...")
+        meta['category'] = category
+        writer.add(meta)
+
 
-        text_for_classification = f"{meta['title']} {meta['excerpt']}"
-        meta['category'] = classify_category(text_for_classification)
+def classify_deferred_articles(limit=100):
+    """Retry classification for articles stored while the classifier was unavailable."""
+    try:
+        response = (
+            supabase.table('news_articles')
+            .select('id, title, excerpt')
+            .eq('category', UNCATEGORIZED)
+            .limit(limit)
+            .execute()
+        )
+    except Exception as e:
+        print(f"[!] Error fetching unclassified articles: {e}")
+        return 0
+
+    if not response.data:
+        return 0
+
+    print(f"\n[→] Retrying classification for {len(response.data)} article(s)...")
+    categories = classify_categories([f"{row['title']} {row['excerpt']}" for row in response.data])
 
-        insert_article(meta)
-        new_count += 1
+    updated = 0
+    for row, category in zip(response.data, categories):
+        if category == UNCATEGORIZED:
+            continue
+        try:
+            supabase.table('news_articles').update({'category': category}).eq('id', row['id']).execute()
+            updated += 1
+        except Exception as e:
+            print(f"[!] Failed to update category for article {row['id']}: {e}")
 
-    return new_count
+    print(f"[+] Classified {updated} previously deferred article(s)")
+    return updated
+
+
+def scrape_source(source_config, robot_parser, writer=None, engine=None):
+    """Scrape articles from a single source via its RSS feed."""
+    owns_writer = writer is None
+    if owns_writer:
+        writer = ArticleBatchWriter()
+
+    articles = collect_source_articles(source_config, robot_parser)
+    fetch_article_pages(articles, engine or FetchEngine())
+    process_articles(articles, writer)
+
+    if owns_writer:
+        writer.flush()
+        if not writer.errors:
+            commit_feed_state([SOURCE_PARSERS[source_config['name']]['rss_url']])
+    return len(articles)
 
 
 def scrape_once():
@@ -124,7 +335,13 @@ def scrape_once():
 
     print(f"\n[✓] Starting multi-source RSS scrape at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-    total_new = 0
+    if not _seen_urls_warmed:
+        warm_seen_urls()
+
+    engine = FetchEngine()
+    writer = ArticleBatchWriter()
+    pending = []
+    collected_sources = []
     for source_config in NEWS_SOURCES:
         robots_url = source_config['robots_url']
         base_url = source_config['base_url']
@@ -139,14 +356,39 @@ def scrape_once():
             print(f"[!] Scraping blocked by robots.txt for {base_url}")
             continue
 
+        engine.set_crawl_delay(source_config['domain'], robot_parser.crawl_delay(HEADERS['User-Agent']))
+
         try:
-            new_count = scrape_source(source_config, robot_parser)
-            total_new += new_count
-            print(f"[+] {new_count} new article(s) from {source_config['display_name']}")
+            pending.extend(collect_source_articles(source_config, robot_parser))
+            collected_sources.append(source_config['name'])
         except Exception as e:
             print(f"[!] Error scraping {source_config['display_name']}: {e}")
             continue
 
+    # Pages from every source are fetched together; the engine keeps each host polite
+    fetch_article_pages(pending, engine)
+    process_articles(pending, writer)
+
+    writer.flush()
+    if writer.errors:
+        print(f"\n[!] {len(writer.errors)} article(s) failed to insert:")
+        for url, error in writer.errors:
+            print(f"    {url}: {error}")
+
+    failed_urls = {url for url, _ in writer.errors}
+    failed_sources = {meta['source'] for meta in pending if meta['url'] in failed_urls}
+    commit_feed_state([
+        SOURCE_PARSERS[name]['rss_url'] for name in collected_sources if name not in failed_sources
+    ])
+
+    classify_deferred_articles()
+
+    new_counts = Counter(meta['source'] for meta in pending)
+    for source_config in NEWS_SOURCES:
+        if source_config['name'] in new_counts:
+            print(f"[+] {new_counts[source_config['name']]} new article(s) from {source_config['display_name']}")
+
+    total_new = len(pending)
     if total_new == 0:
         print("\n[=] No new articles found across all sources.")
     else:
@@ -1,11 +1,18 @@
 """Source-specific parsers for each news website — RSS-based metadata extraction."""
 import re
+import os
 import html
+import json
 from xml.etree import ElementTree as ET
 
 import requests
 from bs4 import BeautifulSoup
-from src.core.config import HEADERS
+from src.core.config import CACHE_DIR, HEADERS
+
+# ETag / Last-Modified per feed URL, persisted between runs
+FEED_STATE_FILE = os.path.join(CACHE_DIR, 'feed_state.json')
+_feed_state = None
+_pending_feed_state = {}
 
 
 # ─────────────────── helpers ───────────────────
@@ -24,17 +31,72 @@ def _cdata_text(element) -> str:
     return _strip_html(text) if '<' in text else text
 
 
+# ─────────────────── conditional GET state ───────────────────
+
+def _load_feed_state() -> dict:
+    global _feed_state
+    if _feed_state is None:
+        try:
+            with open(FEED_STATE_FILE, encoding='utf-8') as f:
+                _feed_state = json.load(f)
+        except (OSError, ValueError):
+            _feed_state = {}
+    return _feed_state
+
+
+def commit_feed_state(rss_urls) -> None:
+    """
+    Persist validators for feeds whose articles were stored successfully.
+    Until then a 304 could hide items that were never written, so validators
+    stay pending.
+    """
+    state = _load_feed_state()
+    committed = False
+    for rss_url in rss_urls:
+        if rss_url in _pending_feed_state:
+            state[rss_url] = _pending_feed_state.pop(rss_url)
+            committed = True
+    if not committed:
+        return
+
+    os.makedirs(os.path.dirname(FEED_STATE_FILE) or '.', exist_ok=True)
+    tmp_path = f"{FEED_STATE_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, FEED_STATE_FILE)
+
+
 # ─────────────────── RSS feed parsers ───────────────────
 
-def parse_rss_feed(rss_url: str, source_name: str) -> list[dict]:
-    """Fetch an RSS feed and return a list of article metadata dicts."""
+def parse_rss_feed(rss_url: str, source_name: str) -> list[dict] | None:
+    """
+    Fetch an RSS feed and return a list of article metadata dicts, or None when
+    the server answers 304 Not Modified to our stored ETag / Last-Modified.
+    """
+    request_headers = dict(HEADERS)
+    validators = _load_feed_state().get(rss_url, {})
+    if validators.get('etag'):
+        request_headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        request_headers['If-Modified-Since'] = validators['last_modified']
+
     try:
-        response = requests.get(rss_url, headers=HEADERS, timeout=20)
+        response = requests.get(rss_url, headers=request_headers, timeout=20)
+        if response.status_code == 304:
+            print(f"[=] RSS feed not modified since last run: {rss_url}")
+            return None
         response.raise_for_status()
     except Exception as e:
         print(f"[!] Failed to fetch RSS feed {rss_url}: {e}")
         return []
 
+    new_validators = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    if any(new_validators.values()):
+        _pending_feed_state[rss_url] = new_validators
+
     # Strip any leading BOM / whitespace so ElementTree can parse
     content = response.content.lstrip(b'\xef\xbb\xbf').strip()
 
@@ -98,7 +160,7 @@ def parse_rss_feed(rss_url: str, source_name: str) -> list[dict]:
 GEO_RSS_URL = 'https://www.geo.tv/rss/1/1'
 
 
-def geo_extract_links(_soup=None) -> list[dict]:
+def geo_extract_links(_soup=None) -> list[dict] | None:
     """Return article metadata from Geo.tv RSS feed."""
     return parse_rss_feed(GEO_RSS_URL, 'geo')
 
@@ -139,7 +201,7 @@ def geo_scrape_article(url: str) -> dict:
 TRIBUNE_RSS_URL = 'https://tribune.com.pk/feed/pakistan'
 
 
-def tribune_extract_links(_soup=None) -> list[dict]:
+def tribune_extract_links(_soup=None) -> list[dict] | None:
     """Return article metadata from Express Tribune RSS feed."""
     return parse_rss_feed(TRIBUNE_RSS_URL, 'tribune')
 
@@ -189,7 +251,7 @@ def tribune_scrape_article(url: str) -> dict:
 THENEWS_RSS_URL = 'https://www.thenews.com.pk/rss/1/1'
 
 
-def thenews_extract_links(_soup=None) -> list[dict]:
+def thenews_extract_links(_soup=None) -> list[dict] | None:
     """Return article metadata from The News International RSS feed."""
     return parse_rss_feed(THENEWS_RSS_URL, 'thenews')
 
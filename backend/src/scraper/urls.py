@@ -0,0 +1,51 @@
+"""URL canonicalization so the same story is recognised under different links."""
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.core.config import NEWS_SOURCES
+
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'cmpid', 'ocid', '_ga', 'amp', 'outputtype',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+
+def _bare_host(host):
+    return host[len('www.'):] if host.startswith('www.') else host
+
+
+# amp.<site> -> the site's domain as configured in NEWS_SOURCES (www.geo.tv, tribune.com.pk, ...),
+# so AMP links merge with regular ones and share the source's rate limit
+AMP_HOSTS = {f"amp.{_bare_host(source['domain'])}": source['domain'] for source in NEWS_SOURCES}
+
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """
+    Return a canonical https URL: lower-cased host, no default port, fragment,
+    tracking parameters or trailing slash, and sorted query params. AMP variants
+    of a known source (an amp. host or a trailing /amp segment) map to the
+    source's own URL; other path segments are left alone.
+    """
+    parsed = urlsplit(url.strip())
+    host = (parsed.hostname or '').lower()
+    host = AMP_HOSTS.get(host, host)
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    if len(segments) > 1 and segments[-1].lower() == 'amp':
+        segments.pop()
+    path = '/' + '/'.join(segments)
+
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    )
+
+    return urlunsplit(('https', host, path, urlencode(query), ''))
@@ -1,6 +1,8 @@
 import time
 import random
+import numpy as np
 from src.core.config import get_embedding_model
+from src.core.embedding_cache import cached_embed_documents
 
 
 def generate_embedding(text):
@@ -11,7 +13,8 @@ def generate_embedding(text):
         return []
 
     try:
-        return embedding_model.embed_query(text)
+        # Plain floats, so the embedding serializes like the model's own output
+        return np.asarray(cached_embed_documents(embedding_model, [text])[0]).tolist()
     except Exception as e:
         print(f"[!] Error generating embedding: {e}")
         return []
@@ -1,8 +1,11 @@
+import importlib
 import sys
 import types
 from importlib.machinery import ModuleSpec
 from pathlib import Path
 
+import pytest
+
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
@@ -38,6 +41,8 @@ if "faiss" not in sys.modules:
             self.ntotal = len(self.vectors)
 
     faiss_module.IndexFlatL2 = IndexFlatL2
+    faiss_module.METRIC_INNER_PRODUCT = 0
+    faiss_module.METRIC_L2 = 1
     faiss_module.serialize_index = lambda index: b""
     faiss_module.read_index = lambda path: None
     sys.modules["faiss"] = faiss_module
@@ -82,6 +87,9 @@ if "langchain_google_genai" not in sys.modules:
         def invoke(self, messages):
             return _Response("stub query summary")
 
+        async def ainvoke(self, messages):
+            return _Response("stub query summary")
+
     genai_module.ChatGoogleGenerativeAI = ChatGoogleGenerativeAI
     sys.modules["langchain_google_genai"] = genai_module
 
@@ -116,3 +124,25 @@ if "langchain.prompts" not in sys.modules:
     prompts_module.SystemMessagePromptTemplate = _PromptTemplate
     prompts_module.HumanMessagePromptTemplate = _PromptTemplate
     sys.modules["langchain.prompts"] = prompts_module
+
+
+_real_faiss = None
+
+
+@pytest.fixture
+def real_faiss():
+    """
+    The installed faiss beside the stub above, for checks against real index
+    types. It is imported once: importing it again would wrap its classes twice.
+    """
+    global _real_faiss
+
+    if _real_faiss is None:
+        stub = sys.modules.pop("faiss")
+        try:
+            _real_faiss = importlib.import_module("faiss")
+        except ImportError:
+            pytest.skip("faiss is not installed")
+        finally:
+            sys.modules["faiss"] = stub
+    return _real_faiss
@@ -0,0 +1,78 @@
+import sys
+
+import pytest
+
+from src.core import config
+
+
+class FakeSentenceTransformer:
+    loads = []
+
+    def __init__(self, model_name, backend="torch", model_kwargs=None):
+        if backend == "onnx" and "broken" in model_name:
+            raise Exception("Using the ONNX backend requires installing Optimum and ONNX Runtime")
+        self.loads.append((model_name, backend, model_kwargs))
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def save(self, path):
+        self.saved = path
+
+
+def test_onnx_backends_load_through_sentence_transformers(monkeypatch, tmp_path):
+    exported = []
+
+    def fake_export(model, quantization_config, model_name_or_path):
+        exported.append((quantization_config, model_name_or_path))
+
+    FakeSentenceTransformer.loads = []
+    monkeypatch.setattr(config, "SentenceTransformer", FakeSentenceTransformer)
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "ONNX_QUANTIZATION", "avx2")
+    monkeypatch.setattr(sys.modules["sentence_transformers"], "export_dynamic_quantized_onnx_model",
+                        fake_export, raising=False)
+
+    onnx = config.LocalEmbeddingModel("BAAI/bge-base-en-v1.5", backend="onnx")
+    int8 = config.LocalEmbeddingModel("BAAI/bge-base-en-v1.5", backend="onnx-int8")
+
+    local_dir = str(tmp_path / "onnx" / "BAAI_bge-base-en-v1.5")
+    assert FakeSentenceTransformer.loads[-1] == (local_dir, "onnx", {"file_name": "onnx/model_qint8_avx2.onnx"})
+    assert exported == [("avx2", local_dir)]
+    assert (onnx.backend, onnx.cache_key) == ("onnx", "BAAI/bge-base-en-v1.5@onnx")
+    assert int8.cache_key == "BAAI/bge-base-en-v1.5@onnx-int8"
+
+
+def test_unavailable_onnx_backend_falls_back_to_torch(monkeypatch):
+    monkeypatch.setattr(config, "SentenceTransformer", FakeSentenceTransformer)
+
+    model = config.LocalEmbeddingModel("broken-model", backend="onnx")
+
+    assert model.backend == "torch"
+    assert model.cache_key == "broken-model"
+
+
+def test_failed_model_load_is_not_retried_until_the_interval_passes(monkeypatch):
+    attempts = []
+
+    class BrokenModel:
+        def __init__(self, model_name):
+            attempts.append(model_name)
+            raise OSError("model download failed")
+
+    monkeypatch.setattr(config, "SentenceTransformer", FakeSentenceTransformer)
+    monkeypatch.setattr(config, "LocalEmbeddingModel", BrokenModel)
+    monkeypatch.setattr(config, "embedding_model", None)
+    monkeypatch.setattr(config, "_embedding_model_failed_at", None)
+    monkeypatch.setattr(config, "_embedding_model_error", None)
+    monkeypatch.setattr(config, "EMBEDDING_RETRY_INTERVAL", 60)
+
+    for _ in range(3):
+        with pytest.raises(Exception, match="model download failed"):
+            config.get_embedding_model()
+    assert len(attempts) == 1
+
+    monkeypatch.setattr(config, "EMBEDDING_RETRY_INTERVAL", 0)
+    with pytest.raises(OSError):
+        config.get_embedding_model()
+    assert len(attempts) == 2
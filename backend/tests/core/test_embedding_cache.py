@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+
+from src.core import embedding_cache
+
+
+class FakeEmbeddingModel:
+    model_name = "fake-model"
+
+    def __init__(self):
+        self.encoded = []
+
+    def embed_documents(self, texts):
+        self.encoded.extend(texts)
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+
+def test_cache_round_trips_through_disk(tmp_path):
+    cache = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path))
+    cache.put_many(["first", "second"], [[1.0, 0.0], [0.0, 1.0]])
+    cache.save()
+
+    reloaded = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path))
+    vectors = reloaded.get_many(["second", "missing", "first"])
+
+    assert vectors[1] is None
+    np.testing.assert_array_equal(vectors[0], [0.0, 1.0])
+    np.testing.assert_array_equal(vectors[2], [1.0, 0.0])
+
+
+def test_evict_drops_rows_outside_retention(tmp_path):
+    cache = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path), retention=60)
+    cache.put_many(["old", "fresh"], [[1.0], [2.0]])
+    cache.save()
+    cache._shards[0].last_used[0] -= 120
+
+    assert cache.evict() == 1
+    assert cache.get_many(["old", "fresh"])[0] is None
+    assert len(cache) == 1
+
+
+def test_cached_embed_documents_only_encodes_misses(tmp_path, monkeypatch):
+    cache = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path))
+    monkeypatch.setattr(embedding_cache, "get_embedding_cache", lambda model_name: cache)
+    model = FakeEmbeddingModel()
+
+    embedding_cache.cached_embed_documents(model, ["alpha", "beta"])
+    vectors = embedding_cache.cached_embed_documents(model, ["beta", "gamma!"])
+
+    assert model.encoded == ["alpha", "beta", "gamma!"]
+    assert [vector[0] for vector in vectors] == [4.0, 6.0]
+
+
+def test_saves_append_shards_and_merge_them_by_size(tmp_path):
+    cache = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path))
+    for n in range(7):
+        cache.put_many([f"text {n}"], [[float(n), 1.0]])
+        cache.save()
+
+    # Seven one-row saves leave shards of 4, 2 and 1 rows
+    assert [len(shard) for shard in cache._shards] == [4, 2, 1]
+    assert len(os.listdir(cache.directory)) == 9
+
+    reloaded = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path))
+    vectors = reloaded.get_many([f"text {n}" for n in range(7)])
+    assert all(isinstance(shard.vectors, np.memmap) for shard in reloaded._shards)
+    assert [vector[0] for vector in vectors] == [float(n) for n in range(7)]
+
+
+def test_cache_hits_keep_rows_from_expiring(tmp_path):
+    cache = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path), retention=86400)
+    cache.put_many(["used", "unused"], [[1.0], [2.0]])
+    cache.save()
+    cache._shards[0].last_used[:] -= 80000
+    cache._shards[0].touched = True
+    cache.save()
+
+    # A run that only hits the cache still saves the refreshed last-used time
+    rerun = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path), retention=86400)
+    rerun.get_many(["used"])
+    rerun.save()
+
+    later = embedding_cache.EmbeddingCache("fake-model", cache_dir=str(tmp_path), retention=86400)
+    assert later.evict(now=later._shards[0].last_used.max() + 10000) == 1
+    assert later.get_many(["used", "unused"])[1] is None
@@ -0,0 +1,57 @@
+import requests
+
+from src.scraper import classifier
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def _setup(monkeypatch, tmp_path, post):
+    monkeypatch.setattr(classifier, "HF_TOKEN", "token")
+    monkeypatch.setattr(classifier, "CACHE_FILE", str(tmp_path / "categories.json"))
+    monkeypatch.setattr(classifier, "_cache", None)
+    monkeypatch.setattr(classifier, "breaker", classifier.CircuitBreaker(failure_threshold=1, reset_timeout=3600))
+    monkeypatch.setattr(classifier, "BATCH_SIZE", 2)
+    monkeypatch.setattr(classifier.requests, "post", post)
+
+
+def test_classify_categories_batches_requests_and_caches_labels(monkeypatch, tmp_path):
+    sent = []
+
+    def fake_post(url, headers, json, timeout):
+        sent.append(json["inputs"])
+        return FakeResponse([
+            {"labels": ["Sports and Athletics"], "scores": [0.9 if "match" in text else 0.1]}
+            for text in json["inputs"]
+        ])
+
+    _setup(monkeypatch, tmp_path, fake_post)
+
+    labels = classifier.classify_categories(["cricket match", "vague story", "football match"])
+    again = classifier.classify_categories(["football match"])
+
+    assert labels == ["Sports and Athletics", "Others", "Sports and Athletics"]
+    assert again == ["Sports and Athletics"]
+    assert sorted(len(batch) for batch in sent) == [1, 2]
+
+
+def test_circuit_breaker_defers_instead_of_calling_a_failing_endpoint(monkeypatch, tmp_path):
+    calls = []
+
+    def failing_post(url, headers, json, timeout):
+        calls.append(json["inputs"])
+        raise requests.exceptions.Timeout()
+
+    _setup(monkeypatch, tmp_path, failing_post)
+
+    assert classifier.classify_category("first story") == classifier.UNCATEGORIZED
+    assert classifier.classify_category("second story") == classifier.UNCATEGORIZED
+    assert len(calls) == 1
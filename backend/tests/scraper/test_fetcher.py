@@ -0,0 +1,50 @@
+import threading
+import time
+
+from src.scraper.fetcher import FetchEngine
+
+
+def test_fetch_engine_limits_concurrency_per_domain_but_not_across_domains():
+    sources = [
+        {"domain": "a.example", "max_concurrency": 1, "requests_per_second": 1000},
+        {"domain": "b.example", "max_concurrency": 1, "requests_per_second": 1000},
+    ]
+    engine = FetchEngine(sources=sources, max_workers=2)
+    lock = threading.Lock()
+    in_flight = {"a.example": 0, "b.example": 0}
+    peaks = {"a.example": 0, "b.example": 0}
+    overlap = []
+    started = []
+
+    def fake_fetch(url):
+        domain = url.split("/")[2]
+        with lock:
+            in_flight[domain] += 1
+            peaks[domain] = max(peaks[domain], in_flight[domain])
+            overlap.append(sum(in_flight.values()))
+            started.append(domain)
+        time.sleep(0.02)
+        with lock:
+            in_flight[domain] -= 1
+        return url
+
+    # Grouped by host, as scrape_once submits them
+    urls = [f"https://{domain}/{i}" for domain in ("a.example", "b.example") for i in range(3)]
+    results = engine.fetch_all([(fake_fetch, url) for url in urls])
+
+    assert results == urls
+    assert peaks == {"a.example": 1, "b.example": 1}
+    assert max(overlap) == 2
+    # Both hosts start at once rather than b.example waiting behind a.example's queue
+    assert set(started[:2]) == {"a.example", "b.example"}
+
+
+def test_fetch_engine_honours_crawl_delay_and_reports_failures():
+    engine = FetchEngine(sources=[{"domain": "a.example", "requests_per_second": 100}])
+    engine.set_crawl_delay("a.example", 10)
+
+    def broken_fetch(url):
+        raise RuntimeError("boom")
+
+    assert engine._limiter("a.example").bucket.rate == 0.1
+    assert engine.fetch_all([(broken_fetch, "https://a.example/1")]) == [None]
@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.core import embedding_cache
+from src.scraper import classifier, prototype_classifier
+
+KEYWORDS = {
+    "Technology": 0,
+    "Corporate": 1,
+    "Sports": 2,
+    "Pakistan": 3,
+    "smartphone": 0,
+    "PSX": 1,
+    "cricket": 2,
+    "Senate": 3,
+}
+
+
+class KeywordEmbeddingModel:
+    model_name = "keyword-model"
+
+    def embed_documents(self, texts):
+        vectors = []
+        for text in texts:
+            vector = np.full(4, 0.01)
+            for keyword, axis in KEYWORDS.items():
+                if keyword in text:
+                    vector[axis] += 1.0
+            vectors.append(vector.tolist())
+        return vectors
+
+
+def _isolated_cache(monkeypatch, tmp_path):
+    cache = embedding_cache.EmbeddingCache("keyword-model", cache_dir=str(tmp_path))
+    monkeypatch.setattr(embedding_cache, "get_embedding_cache", lambda model_name: cache)
+
+
+def test_prototype_classifier_picks_nearest_category(monkeypatch, tmp_path):
+    _isolated_cache(monkeypatch, tmp_path)
+    model = prototype_classifier.PrototypeClassifier(KeywordEmbeddingModel())
+
+    labels = model.classify(["New smartphone launched", "PSX closes higher", "cricket final tonight"])
+
+    assert labels == [
+        "Technology and Innovation",
+        "Corporate and Business News",
+        "Sports and Athletics",
+    ]
+
+
+def test_classify_categories_uses_embedding_backend_when_configured(monkeypatch, tmp_path):
+    _isolated_cache(monkeypatch, tmp_path)
+    monkeypatch.setattr(classifier, "CLASSIFIER_BACKEND", "embedding")
+    monkeypatch.setattr(
+        prototype_classifier,
+        "_classifier",
+        prototype_classifier.PrototypeClassifier(
+            KeywordEmbeddingModel(),
+            [{"title": "Senate session", "excerpt": "", "category": "National News from Pakistan"}],
+        ),
+    )
+
+    assert classifier.classify_categories(["Senate passes bill"]) == ["National News from Pakistan"]
@@ -0,0 +1,178 @@
+from src.scraper import scraper_new
+
+
+class FakeQuery:
+    def __init__(self, stored_urls, calls):
+        self.stored_urls = stored_urls
+        self.calls = calls
+        self.urls = []
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        self.calls.append(list(values))
+        self.urls = values
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": [{"url": url} for url in self.urls if url in self.stored_urls]})()
+
+
+class FakeSupabase:
+    def __init__(self, stored_urls):
+        self.stored_urls = stored_urls
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(self.stored_urls, self.calls)
+
+
+def test_filter_new_articles_uses_one_bulk_query_and_canonical_urls(monkeypatch):
+    fake_supabase = FakeSupabase({"http://www.geo.tv/latest/1-stored"})
+    monkeypatch.setattr(scraper_new, "supabase", fake_supabase)
+    monkeypatch.setattr(scraper_new, "_seen_urls", {"https://www.geo.tv/latest/2-seen"})
+
+    articles = scraper_new.filter_new_articles([
+        {"url": "http://www.geo.tv/latest/1-stored"},
+        {"url": "https://www.geo.tv/latest/2-seen?utm_source=rss"},
+        {"url": "https://www.geo.tv/latest/3-new/amp"},
+        {"url": "http://www.geo.tv/latest/3-new"},
+    ])
+
+    assert [article["url"] for article in articles] == ["https://www.geo.tv/latest/3-new"]
+    assert len(fake_supabase.calls) == 1
+    assert "https://www.geo.tv/latest/1-stored" in scraper_new._seen_urls
+
+
+class FakeUpsertTable:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def upsert(self, rows, on_conflict, ignore_duplicates):
+        self.calls.append((rows, on_conflict))
+        self.rows = rows
+        return self
+
+    def execute(self):
+        rows = self.rows if isinstance(self.rows, list) else [self.rows]
+        if any(row["title"] == "Broken row" for row in rows):
+            raise RuntimeError("value too long")
+
+
+def _processed(title, url):
+    return {
+        "title": title,
+        "excerpt": "Excerpt",
+        "publish_time": "N/A",
+        "url": url,
+        "content": "Body",
+        "category": "Others",
+        "source": "geo",
+    }
+
+
+def test_warm_seen_urls_pages_through_rows_in_id_order(monkeypatch):
+    rows = [{"id": article_id, "url": f"https://www.geo.tv/latest/{article_id}"} for article_id in (5, 1, 4, 2, 3)]
+    calls = []
+
+    class PagedQuery:
+        def __init__(self):
+            self.rows = rows
+
+        def select(self, columns):
+            return self
+
+        def order(self, column):
+            calls.append(("order", column))
+            self.rows = sorted(self.rows, key=lambda row: row[column])
+            return self
+
+        def range(self, start, end):
+            calls.append(("range", start, end))
+            self.rows = self.rows[start:end + 1]
+            return self
+
+        def execute(self):
+            return type("Response", (), {"data": self.rows})()
+
+    monkeypatch.setattr(scraper_new, "supabase", type("FakeSupabase", (), {"table": lambda self, name: PagedQuery()})())
+    monkeypatch.setattr(scraper_new, "URL_WARM_PAGE_SIZE", 2)
+    monkeypatch.setattr(scraper_new, "_seen_urls", set())
+    monkeypatch.setattr(scraper_new, "_seen_urls_warmed", False)
+
+    scraper_new.warm_seen_urls()
+
+    assert calls == [("order", "id"), ("range", 0, 1), ("order", "id"), ("range", 2, 3), ("order", "id"), ("range", 4, 5)]
+    assert scraper_new._seen_urls == {row["url"] for row in rows}
+
+
+def test_batch_writer_upserts_in_batches_and_reports_failed_rows(monkeypatch):
+    calls = []
+    monkeypatch.setattr(scraper_new, "supabase", type("S", (), {"table": lambda self, name: FakeUpsertTable(calls)})())
+    monkeypatch.setattr(scraper_new, "_seen_urls", set())
+    monkeypatch.setattr(scraper_new, "_seen_urls_warmed", False)
+    writer = scraper_new.ArticleBatchWriter(batch_size=2, flush_interval=3600)
+
+    writer.add(_processed("Good row", "https://www.geo.tv/latest/1"))
+    assert calls == []
+    writer.add(_processed("Broken row", "https://www.geo.tv/latest/2"))
+
+    assert calls[0][1] == "url"
+    assert len(calls[0][0]) == 2
+    assert writer.written == 1
+    assert writer.errors == [("https://www.geo.tv/latest/2", "value too long")]
+    assert scraper_new._seen_urls == {"https://www.geo.tv/latest/1"}
+
+
+def test_feed_validators_are_not_committed_when_the_stored_url_lookup_fails(monkeypatch):
+    class FlakyQuery(FakeQuery):
+        def execute(self):
+            if any("tribune" in url for url in self.urls):
+                raise RuntimeError("timeout")
+            return super().execute()
+
+    class FlakySupabase(FakeSupabase):
+        def table(self, name):
+            return FlakyQuery(self.stored_urls, self.calls)
+
+    class AllowAll:
+        def can_fetch(self, agent, url):
+            return True
+
+        def crawl_delay(self, agent):
+            return None
+
+    class FakeWriter:
+        errors = []
+
+        def flush(self):
+            pass
+
+    sources = [
+        {"name": "geo", "display_name": "Geo", "robots_url": "r1", "base_url": "b1", "domain": "www.geo.tv"},
+        {"name": "tribune", "display_name": "Tribune", "robots_url": "r2", "base_url": "b2", "domain": "tribune.com.pk"},
+    ]
+    parsers = {
+        name: {"rss_url": f"{name}-feed", "extract_links": lambda url=url, name=name: [{"url": url, "title": "t", "source": name}]}
+        for name, url in (("geo", "https://www.geo.tv/latest/1-new"), ("tribune", "https://tribune.com.pk/story/2"))
+    }
+    committed = []
+    monkeypatch.setattr(scraper_new, "supabase", FlakySupabase(set()))
+    monkeypatch.setattr(scraper_new, "_seen_urls", set())
+    monkeypatch.setattr(scraper_new, "_seen_urls_warmed", False)
+    monkeypatch.setattr(scraper_new, "_seen_urls_warmed", True)
+    monkeypatch.setattr(scraper_new, "NEWS_SOURCES", sources)
+    monkeypatch.setattr(scraper_new, "SOURCE_PARSERS", parsers)
+    monkeypatch.setattr(scraper_new, "check_supabase_connection", lambda: True)
+    monkeypatch.setattr(scraper_new, "get_robot_parser", lambda url: AllowAll())
+    monkeypatch.setattr(scraper_new, "FetchEngine", lambda: type("E", (), {"set_crawl_delay": lambda *a: None})())
+    monkeypatch.setattr(scraper_new, "ArticleBatchWriter", FakeWriter)
+    monkeypatch.setattr(scraper_new, "fetch_article_pages", lambda articles, engine: None)
+    monkeypatch.setattr(scraper_new, "process_articles", lambda articles, writer: None)
+    monkeypatch.setattr(scraper_new, "classify_deferred_articles", lambda: None)
+    monkeypatch.setattr(scraper_new, "commit_feed_state", committed.extend)
+
+    scraper_new.scrape_once()
+
+    assert committed == ["geo-feed"]
@@ -0,0 +1,52 @@
+import json
+
+from src.scraper import sources
+
+RSS = b"""<?xml version="1.0"?>
+<rss><channel>
+  <item>
+    <title>Budget approved by cabinet</title>
+    <link>https://www.geo.tv/latest/1-budget</link>
+    <description>The federal cabinet approved the budget.</description>
+    <pubDate>Fri, 10 Apr 2026 10:00:00 +0000</pubDate>
+  </item>
+</channel></rss>"""
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+
+def test_parse_rss_feed_sends_stored_validators_and_skips_on_304(tmp_path, monkeypatch):
+    state_file = tmp_path / "feed_state.json"
+    monkeypatch.setattr(sources, "FEED_STATE_FILE", str(state_file))
+    monkeypatch.setattr(sources, "_feed_state", None)
+    monkeypatch.setattr(sources, "_pending_feed_state", {})
+    sent_headers = []
+    responses = [
+        FakeResponse(200, RSS, {"ETag": '"v1"', "Last-Modified": "Fri, 10 Apr 2026 10:00:00 GMT"}),
+        FakeResponse(304),
+    ]
+
+    def fake_get(url, headers, timeout):
+        sent_headers.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(sources.requests, "get", fake_get)
+
+    articles = sources.parse_rss_feed("https://www.geo.tv/rss/1/1", "geo")
+    sources.commit_feed_state(["https://www.geo.tv/rss/1/1"])
+
+    assert [article["url"] for article in articles] == ["https://www.geo.tv/latest/1-budget"]
+    assert "If-None-Match" not in sent_headers[0]
+    assert json.loads(state_file.read_text())["https://www.geo.tv/rss/1/1"]["etag"] == '"v1"'
+
+    assert sources.parse_rss_feed("https://www.geo.tv/rss/1/1", "geo") is None
+    assert sent_headers[1]["If-None-Match"] == '"v1"'
+    assert sent_headers[1]["If-Modified-Since"] == "Fri, 10 Apr 2026 10:00:00 GMT"
@@ -0,0 +1,36 @@
+from src.scraper.urls import canonicalize_url
+
+
+def test_canonicalize_url_strips_tracking_and_scheme_differences():
+    assert canonicalize_url(
+        "http://WWW.Geo.tv/latest/123-story/?utm_source=twitter&fbclid=abc#comments"
+    ) == "https://www.geo.tv/latest/123-story"
+
+
+def test_canonicalize_url_collapses_amp_variants():
+    canonical = "https://www.thenews.com.pk/latest/555-budget"
+
+    assert canonicalize_url("https://www.thenews.com.pk/latest/555-budget/amp") == canonical
+    assert canonicalize_url("https://amp.thenews.com.pk/latest/555-budget?amp=1") == canonical
+
+
+def test_canonicalize_url_maps_amp_hosts_to_the_configured_source_domain():
+    # Tribune's canonical host has no www., which is also its NEWS_SOURCES domain
+    assert canonicalize_url("https://amp.tribune.com.pk/story/2541/budget") == "https://tribune.com.pk/story/2541/budget"
+    assert canonicalize_url("https://amp.geo.tv/latest/123-story") == "https://www.geo.tv/latest/123-story"
+    # Hosts of unknown sites are not guessed at
+    assert canonicalize_url("https://amp.example.com/story") == "https://amp.example.com/story"
+
+
+def test_canonicalize_url_only_drops_a_trailing_amp_segment():
+    assert canonicalize_url("https://www.geo.tv/amp/latest/7-story") == "https://www.geo.tv/amp/latest/7-story"
+    assert canonicalize_url("https://tribune.com.pk/story/9/amp-plant-expansion") == (
+        "https://tribune.com.pk/story/9/amp-plant-expansion"
+    )
+    assert canonicalize_url("https://www.geo.tv/amp") == "https://www.geo.tv/amp"
+
+
+def test_canonicalize_url_keeps_meaningful_query_params_sorted():
+    assert canonicalize_url("https://tribune.com.pk/story?p=2&id=9&utm_medium=rss") == (
+        "https://tribune.com.pk/story?id=9&p=2"
+    )
@@ -0,0 +1,63 @@
+import asyncio
+
+import numpy as np
+
+from src.app.services import answer_cache as answer_cache_module
+from src.app.services.answer_cache import AnswerCache
+
+
+def test_answer_cache_matches_normalised_query_and_same_articles():
+    cache = AnswerCache(maxsize=8, ttl=None, similarity_threshold=0)
+    cache.set("IMF loan", [3, 1], "v1", "summary")
+
+    assert cache.get("  imf LOAN ", [3, 1], "v1") == "summary"
+    assert cache.get("imf loan", [1, 3], "v1") is None
+
+
+def test_answer_cache_semantic_match_above_threshold():
+    cache = AnswerCache(maxsize=8, ttl=None, similarity_threshold=0.9)
+    cache.set("petrol price", [7], "v1", "summary", np.array([1.0, 0.0]))
+
+    assert cache.get("fuel price", [7], "v1", np.array([0.96, 0.28])) == "summary"
+    assert cache.get("fuel tax", [7], "v1", np.array([0.6, 0.8])) is None
+
+
+def test_answer_cache_is_cleared_when_index_version_changes(monkeypatch):
+    calls = []
+
+    async def fake_generate(query, articles):
+        calls.append(query)
+        return f"summary {len(calls)}"
+
+    monkeypatch.setattr(answer_cache_module, "answer_cache", AnswerCache(maxsize=8, ttl=None))
+    monkeypatch.setattr(answer_cache_module, "agenerate_summary", fake_generate)
+    articles = [{"id": 1}, {"id": 2}]
+
+    monkeypatch.setattr(answer_cache_module.rag, "index_version", "v1")
+    first = asyncio.run(answer_cache_module.summarize_with_cache("cricket", articles))
+    repeat = asyncio.run(answer_cache_module.summarize_with_cache("Cricket", articles))
+    monkeypatch.setattr(answer_cache_module.rag, "index_version", "v2")
+    after_reload = asyncio.run(answer_cache_module.summarize_with_cache("cricket", articles))
+
+    assert (first, repeat, after_reload) == ("summary 1", "summary 1", "summary 2")
+    assert len(calls) == 2
+
+
+def test_stream_with_cache_streams_once_then_replays(monkeypatch):
+    streamed = []
+
+    async def fake_stream(query, articles):
+        for token in ["Rains ", "lash ", "Karachi"]:
+            streamed.append(token)
+            yield token
+
+    async def collect():
+        return [chunk async for chunk in answer_cache_module.stream_with_cache("karachi rain", [{"id": 9}])]
+
+    monkeypatch.setattr(answer_cache_module, "answer_cache", AnswerCache(maxsize=8, ttl=None))
+    monkeypatch.setattr(answer_cache_module, "astream_summary", fake_stream)
+    monkeypatch.setattr(answer_cache_module.rag, "index_version", "v1")
+
+    assert asyncio.run(collect()) == ["Rains ", "lash ", "Karachi"]
+    assert asyncio.run(collect()) == ["Rains lash Karachi"]
+    assert len(streamed) == 3
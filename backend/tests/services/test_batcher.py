@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from src.app.services.batcher import MicroBatcher
+
+
+def test_concurrent_calls_share_batches_and_get_their_own_results():
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(run_batch, max_batch=3, max_wait=0.05)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    # Three items fill a batch at once; the other two go out when max_wait expires
+    assert batches == [[0, 1, 2], [3, 4]]
+    stats = batcher.stats()
+    assert stats["batches"] == 2
+    assert stats["mean_batch_size"] == 2.5
+    assert stats["largest_batch"] == 3
+    assert stats["size_histogram"] == {"2": 2}
+
+
+def test_a_failed_batch_fails_every_waiting_call():
+    def run_batch(items):
+        raise RuntimeError("index not loaded")
+
+    batcher = MicroBatcher(run_batch, max_batch=8, max_wait=0.001)
+
+    async def run():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [str(result) for result in results] == ["index not loaded", "index not loaded"]
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.submit("c"))
+
+
+def test_a_failing_item_only_fails_its_own_call():
+    def run_batch(items):
+        if 0 in items:
+            raise ValueError("k must be positive")
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(run_batch, max_batch=8, max_wait=0.001)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(item) for item in (2, 0, 3)), return_exceptions=True)
+
+    good, bad, other = asyncio.run(run())
+    assert (good, other) == (20, 30)
+    assert str(bad) == "k must be positive"
+    assert batcher.stats()["retried_batches"] == 1
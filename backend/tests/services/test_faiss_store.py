@@ -0,0 +1,130 @@
+import numpy as np
+
+from src.app.services import faiss_store, index_artifacts
+from src.app.services.vector_store import VECTOR_IDS_FILE, VECTORS_FILE, VectorStoreWriter
+
+
+def _article(article_id, title, excerpt="Excerpt text.", category="Sports and Athletics"):
+    return {
+        "id": article_id,
+        "title": title,
+        "excerpt": excerpt,
+        "url": f"https://example.com/{article_id}",
+        "category": category,
+        "source": "geo",
+    }
+
+
+def _indexed(article):
+    return faiss_store.article_metadata(article)
+
+
+def test_diff_articles_finds_new_changed_and_deleted_rows():
+    unchanged = _article(1, "Unchanged story")
+    changed = _article(2, "Changed story")
+    new = _article(3, "New story")
+    indexed = {
+        1: _indexed(unchanged),
+        2: _indexed({**changed, "excerpt": "Old excerpt."}),
+        4: _indexed(_article(4, "Deleted story")),
+    }
+
+    to_embed, to_remove = faiss_store.diff_articles([unchanged, changed, new], indexed)
+
+    assert [article["id"] for article in to_embed] == [2, 3]
+    assert sorted(to_remove) == [2, 4]
+
+
+def test_update_faiss_index_only_embeds_new_articles(monkeypatch):
+    class FakeIndex:
+        ntotal = 1
+
+        def __init__(self):
+            self.added_ids = []
+            self.removed_ids = []
+
+        def add_with_ids(self, embeddings, ids):
+            self.added_ids.extend(ids.tolist())
+
+        def remove_ids(self, ids):
+            self.removed_ids.extend(ids.tolist())
+
+    existing = _article(1, "Existing story")
+    new = _article(2, "Fresh story")
+    fake_index = FakeIndex()
+    embedded, uploaded = [], []
+
+    def fake_generate_embeddings(articles):
+        embedded.extend(article["id"] for article in articles)
+        return np.zeros((len(articles), 3), dtype=np.float32), [_indexed(article) for article in articles]
+
+    monkeypatch.setattr(faiss_store, "download_faiss_index", lambda: (fake_index, {1: _indexed(existing)}))
+    monkeypatch.setattr(faiss_store, "generate_embeddings", fake_generate_embeddings)
+    monkeypatch.setattr(faiss_store, "upload_faiss_index", lambda index, metadata, passages=None, store=None, factory=None: uploaded.append(metadata))
+
+    faiss_store.update_faiss_index([existing, new])
+
+    assert embedded == [2]
+    assert fake_index.added_ids == [2 * faiss_store.MAX_PASSAGES]
+    assert fake_index.removed_ids == []
+    assert sorted(uploaded[0]) == [1, 2]
+
+
+def test_article_passages_cover_content_with_overlapping_windows():
+    assert faiss_store.split_passages("one two three four five six seven eight nine ten", 4, 1) == [
+        "one two three four", "four five six seven", "seven eight nine ten",
+    ]
+    assert faiss_store.split_passages("", 4, 1) == []
+
+    words = [f"w{n}" for n in range(faiss_store.PASSAGE_WORDS + 10)]
+    passages = faiss_store.article_passages({**_article(5, "Budget"), "content": " ".join(words)})
+
+    assert passages[0] == "Budget Excerpt text."
+    assert passages[1] == "Budget: " + " ".join(words[:faiss_store.PASSAGE_WORDS])
+    assert passages[2].endswith(words[-1])
+    assert len(passages) == 3
+
+
+def test_training_fallback_publishes_the_factory_actually_built(real_faiss, monkeypatch):
+    published = []
+    monkeypatch.setattr(faiss_store, "faiss", real_faiss)
+    monkeypatch.setattr(faiss_store, "FAISS_INDEX_FACTORY", "IVF64,Flat")
+    monkeypatch.setattr(faiss_store, "get_embedding_dimension", lambda: 8)
+    monkeypatch.setattr(faiss_store, "publish", lambda artifacts, **details: published.append((artifacts, details))
+                        or {"version": "v1"})
+
+    # Ten vectors cannot train 64 IVF lists
+    builder = faiss_store.IndexBuilder()
+    builder.add(np.arange(10, dtype=np.int64), np.random.default_rng(0).standard_normal((10, 8)).astype(np.float32))
+    index = builder.finish()
+    faiss_store.upload_faiss_index(index, {}, factory=builder.factory)
+
+    assert builder.factory == "Flat"
+    artifacts, details = published[0]
+    assert details == {"index_factory": "Flat"}
+    header = faiss_store.MetadataStore.from_bytes(artifacts[faiss_store.META_FILE]).header
+    assert header["index_factory"] == "Flat"
+
+
+def test_download_vector_store_memory_maps_the_cached_copy(monkeypatch, tmp_path):
+    writer = VectorStoreWriter(str(tmp_path), dimension=2)
+    writer.add([8, 3], np.array([[0.0, 1.0], [1.0, 0.0]], dtype=np.float32))
+    ids_path, vectors_path = writer.close()
+    published = {VECTOR_IDS_FILE: ids_path, VECTORS_FILE: vectors_path}
+
+    def fake_download(name):
+        with open(published[name], "rb") as f:
+            return f.read()
+
+    manifest = {"files": {name: {"sha256": index_artifacts.file_checksum(path)} for name, path in published.items()}}
+    monkeypatch.setattr(index_artifacts, "download", fake_download)
+    monkeypatch.setattr(faiss_store, "download_manifest", lambda: manifest)
+    monkeypatch.setattr(faiss_store, "fetch",
+                        lambda name, digest: index_artifacts.fetch(name, digest, str(tmp_path / "cache")))
+    monkeypatch.setattr(faiss_store, "get_embedding_dimension", lambda: 2)
+
+    store = faiss_store.download_vector_store()
+
+    assert isinstance(store.vectors, np.memmap)
+    assert store.ids.tolist() == [3, 8]
+    assert store.lookup([8]).tolist() == [[0.0, 1.0]]
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from src.app.services import index_artifacts
+
+
+def test_publish_uploads_changed_artifacts_and_the_manifest_last(monkeypatch):
+    bucket = {}
+    uploads = []
+
+    def fake_upload(name, data):
+        uploads.append(name)
+        bucket[name] = data
+
+    monkeypatch.setattr(index_artifacts, "download", lambda name: bucket[name])
+    monkeypatch.setattr(index_artifacts, "upload", fake_upload)
+
+    first = index_artifacts.publish({"faiss_index.bin": b"index-1", "metadata.pkl": b"meta-1"})
+    uploads.clear()
+    second = index_artifacts.publish({"faiss_index.bin": b"index-1", "metadata.pkl": b"meta-2"})
+
+    assert uploads == ["metadata.pkl", "manifest.json"]
+    assert second["version"] != first["version"]
+    assert json.loads(bucket["manifest.json"])["files"]["metadata.pkl"]["sha256"] == index_artifacts.checksum(b"meta-2")
+
+
+def test_fetch_reuses_the_cached_copy_and_verifies_downloads(monkeypatch, tmp_path):
+    downloads = []
+
+    def fake_download(name):
+        downloads.append(name)
+        return b"index-bytes"
+
+    monkeypatch.setattr(index_artifacts, "download", fake_download)
+    digest = index_artifacts.checksum(b"index-bytes")
+
+    path, data = index_artifacts.fetch("faiss_index.bin", digest, tmp_path)
+    cached_path, cached_data = index_artifacts.fetch("faiss_index.bin", digest, tmp_path)
+
+    assert data == b"index-bytes"
+    assert cached_path == path and cached_data is None
+    assert downloads == ["faiss_index.bin"]
+
+    with pytest.raises(ValueError):
+        index_artifacts.fetch("faiss_index.bin", index_artifacts.checksum(b"newer-bytes"), tmp_path)
+
+    index_artifacts.prune({"files": {}}, tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,32 @@
+from src.app.services.lexical import BM25Index, tokenize
+
+
+def _index():
+    return BM25Index.build([
+        (7, "Senate passes budget after long debate"),
+        (3, "PSX closes higher as banks rally"),
+        (5, "Babar Azam scores century against Australia"),
+        (9, "Senate committee questions PSX chief"),
+    ])
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Senate and the PSX") == ["senate", "psx"]
+
+
+def test_bm25_ranks_documents_containing_the_query_terms():
+    ids, scores = _index().search("PSX Senate", k=3)
+
+    assert ids.tolist()[0] == 9
+    assert sorted(ids.tolist()) == [3, 7, 9]
+    assert scores[0] > scores[1] > 0
+    assert _index().search("cricket", k=3)[0].tolist() == []
+
+
+def test_bm25_round_trips_and_respects_allowed_ids():
+    data = _index().to_bytes()
+    restored = BM25Index.from_bytes(data)
+
+    assert restored.to_bytes() == data
+    assert restored.search("babar", k=2)[0].tolist() == [5]
+    assert restored.search("senate", k=2, allowed_ids=[7])[0].tolist() == [7]
@@ -1,3 +1,5 @@
+import asyncio
+
 from src.app.services import llm
 
 
@@ -19,6 +21,10 @@ class FakeLLM:
         self.invocations.append(messages)
         return FakeResponse("query summary")
 
+    async def ainvoke(self, messages):
+        self.invocations.append(messages)
+        return FakeResponse("async summary")
+
 
 def test_generate_article_summary_builds_prompt_from_article(monkeypatch):
     fake_llm = FakeLLM()
@@ -53,4 +59,41 @@ def test_generate_summary_includes_query_and_articles(monkeypatch):
     prompt_text = "\n".join(str(message) for message in fake_llm.invocations[0])
     assert "stock market today" in prompt_text
     assert "Stocks edge higher" in prompt_text
-    assert "Oil slips" in prompt_text
\ No newline at end of file
+    assert "Oil slips" in prompt_text
+
+
+def test_agenerate_summary_uses_async_client(monkeypatch):
+    fake_llm = FakeLLM()
+    monkeypatch.setattr(llm, "llm", fake_llm)
+
+    articles = [{"title": "PSX gains", "excerpt": "The index rose 1,200 points."}]
+
+    summary = asyncio.run(llm.agenerate_summary("PSX", articles))
+
+    assert summary == "async summary"
+    prompt_text = "\n".join(str(message) for message in fake_llm.invocations[0])
+    assert "PSX gains" in prompt_text
+
+
+def test_generate_summary_prefers_matched_passages_over_excerpts(monkeypatch):
+    fake_llm = FakeLLM()
+    monkeypatch.setattr(llm, "llm", fake_llm)
+
+    articles = [{"title": "Budget passes", "excerpt": "Short excerpt.",
+                 "passages": ["The Senate approved the budget 61-38.", "Opposition members walked out."]}]
+
+    llm.generate_summary("budget vote", articles)
+
+    prompt_text = "\n".join(str(message) for message in fake_llm.invocations[0])
+    assert "The Senate approved the budget 61-38." in prompt_text
+    assert "Opposition members walked out." in prompt_text
+    assert "Short excerpt." not in prompt_text
+
+
+def test_llm_client_is_created_on_first_use_and_reused(monkeypatch):
+    monkeypatch.setattr(llm, "llm", None)
+
+    client = llm.get_llm()
+
+    assert client.kwargs["model"] == llm.CHAT_MODEL
+    assert llm.get_llm() is client
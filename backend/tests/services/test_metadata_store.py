@@ -0,0 +1,47 @@
+import pytest
+
+from src.app.services.metadata_store import MetadataStore, encode_metadata
+
+
+def _articles():
+    return {
+        9: {"id": 9, "text_hash": "b" * 40, "title": "Cricket: Pakistan win", "excerpt": None,
+            "url": "https://example.com/9", "category": "Sports and Athletics", "source": "geo", "published_at": 1_760_000_000,
+            "passages": 1},
+        2: {"id": 2, "text_hash": "a" * 40, "title": "Rupee gains — PSX closes higher", "excerpt": "Markets rallied.",
+            "url": "https://example.com/2", "category": "Corporate and Business News", "source": "dawn",
+            "published_at": 1_750_000_000, "passages": 3},
+    }
+
+
+def test_metadata_store_round_trips_articles_and_header():
+    store = MetadataStore.from_bytes(encode_metadata(_articles(), model="bge", index_factory="SQ8"))
+
+    assert store.header["model"] == "bge"
+    assert list(store) == [2, 9]
+    assert store == _articles()
+    assert store[9]["excerpt"] is None
+    assert 5 not in store
+    with pytest.raises(KeyError):
+        store[5]
+
+
+def test_metadata_store_reads_from_a_memory_mapped_file(tmp_path):
+    path = tmp_path / "metadata.bin"
+    path.write_bytes(encode_metadata(_articles()))
+
+    store = MetadataStore.open(path)
+
+    assert store.get(2)["title"] == "Rupee gains — PSX closes higher"
+    assert store.get(3) is None
+    assert len(MetadataStore.from_bytes(encode_metadata({}))) == 0
+
+
+def test_filter_ids_combines_string_and_time_filters():
+    store = MetadataStore.from_bytes(encode_metadata(_articles()))
+
+    assert store.filter_ids(equals={"source": "geo"}).tolist() == [9]
+    assert store.filter_ids(at_least={"published_at": 1_755_000_000}).tolist() == [9]
+    assert store.filter_ids(equals={"category": "Sports and Athletics", "source": "dawn"}).tolist() == []
+    assert store.filter_ids(equals={"category": "Unknown"}).tolist() == []
+    assert store.filter_ids().tolist() == [2, 9]
@@ -0,0 +1,21 @@
+from src.app.services.passages import PassageStore, PassageWriter, passage_ids
+
+
+def test_passage_ids_number_passages_within_each_article():
+    ids = passage_ids([3, 7], [2, 3], stride=4)
+
+    assert ids.tolist() == [12, 13, 28, 29, 30]
+
+
+def test_passage_store_round_trips_texts_written_out_of_order(tmp_path):
+    writer = PassageWriter(str(tmp_path / "passages.bin"), stride=4)
+    writer.add(7, ["Senate passes budget", "Debate ran — late into the night"])
+    writer.add(3, ["PSX closes higher"])
+    store = PassageStore.open(writer.close())
+
+    assert store.stride == 4
+    assert store.ids.tolist() == [12, 28, 29]
+    assert store.text(29) == "Debate ran — late into the night"
+    assert store.text(13) is None
+    assert store.passages_of([7, 5, 3]).tolist() == [28, 29, 12]
+    assert not (tmp_path / "passages.bin.blob").exists()
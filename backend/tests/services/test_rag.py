@@ -1,11 +1,15 @@
+from datetime import datetime, timezone
+
+import numpy as np
 import pytest
 
 from src.app.services import rag
+from src.app.services.metadata_store import encode_metadata
+from src.app.services.passages import PassageStore, PassageWriter
 
 
 def test_retrieve_articles_requires_loaded_index(monkeypatch):
-    monkeypatch.setattr(rag, "faiss_index", None)
-    monkeypatch.setattr(rag, "metadata", None)
+    monkeypatch.setattr(rag, "generation", None)
 
     with pytest.raises(rag.HTTPException) as exc_info:
         rag.retrieve_articles("stock")
@@ -25,25 +29,21 @@ def test_retrieve_articles_returns_ranked_articles(monkeypatch):
             assert k == 2
             return [[0.25, 1.0]], [[1, 0]]
 
-    monkeypatch.setattr(rag, "faiss_index", FakeIndex())
-    monkeypatch.setattr(
-        rag,
-        "metadata",
-        [
-            {
-                "title": "Oil prices steady",
-                "excerpt": "Energy shares were mixed.",
-                "url": "https://example.com/1",
-                "category": "Corporate and Business News",
-            },
-            {
-                "title": "Stocks rise after earnings beat",
-                "excerpt": "Markets closed higher on Thursday.",
-                "url": "https://example.com/2",
-                "category": "Corporate and Business News",
-            },
-        ],
-    )
+    metadata = [
+        {
+            "title": "Oil prices steady",
+            "excerpt": "Energy shares were mixed.",
+            "url": "https://example.com/1",
+            "category": "Corporate and Business News",
+        },
+        {
+            "title": "Stocks rise after earnings beat",
+            "excerpt": "Markets closed higher on Thursday.",
+            "url": "https://example.com/2",
+            "category": "Corporate and Business News",
+        },
+    ]
+    monkeypatch.setattr(rag, "generation", rag.IndexGeneration(FakeIndex(), metadata))
     monkeypatch.setattr(rag, "get_embedding_model", lambda: FakeEmbeddingModel())
 
     articles = rag.retrieve_articles("stock market", k=2)
@@ -54,3 +54,341 @@ def test_retrieve_articles_returns_ranked_articles(monkeypatch):
     ]
     assert articles[0]["relevance_score"] == pytest.approx(1 / 1.25)
     assert articles[1]["relevance_score"] == pytest.approx(0.5)
+
+
+def test_embed_query_caches_normalised_queries(monkeypatch):
+    calls = []
+
+    class FakeEmbeddingModel:
+        model_name = "fake-model"
+
+        def embed_query(self, query):
+            calls.append(query)
+            return [0.1, 0.2, 0.3]
+
+    monkeypatch.setattr(rag, "get_embedding_model", lambda: FakeEmbeddingModel())
+    monkeypatch.setattr(rag, "query_embedding_cache", rag.LRUCache(maxsize=8))
+
+    rag.embed_query("Petrol Price")
+    rag.embed_query("  petrol   price ")
+
+    assert calls == ["petrol price"]
+    assert rag.query_embedding_cache.stats()["hits"] == 1
+    assert rag.query_embedding_cache.stats()["hit_rate"] == 0.5
+
+
+def test_retrieve_articles_uses_inner_product_scores_directly(monkeypatch):
+    class FakeEmbeddingModel:
+        model_name = "fake-model"
+
+        def embed_query(self, query):
+            return [0.1, 0.2, 0.3]
+
+    class FakeIndex:
+        metric_type = rag.faiss.METRIC_INNER_PRODUCT
+
+        def search(self, query_vector, k):
+            return [[0.82, 0.4, -1.0]], [[7, 3, -1]]
+
+    metadata = {
+        3: {"id": 3, "title": "B", "excerpt": "", "url": "https://example.com/3", "category": "Others"},
+        7: {"id": 7, "title": "A", "excerpt": "", "url": "https://example.com/7", "category": "Others"},
+    }
+    monkeypatch.setattr(rag, "generation", rag.IndexGeneration(FakeIndex(), metadata))
+    monkeypatch.setattr(rag, "get_embedding_model", lambda: FakeEmbeddingModel())
+
+    articles = rag.retrieve_articles("anything", k=3)
+
+    assert [article["id"] for article in articles] == [7, 3]
+    assert articles[0]["relevance_score"] == pytest.approx(0.82)
+
+
+def test_retrieve_articles_reranks_compressed_candidates_exactly(monkeypatch):
+    class FakeEmbeddingModel:
+        model_name = "fake-model"
+
+        def embed_query(self, query):
+            return [1.0, 0.0, 0.0]
+
+    class FakeIndex:
+        metric_type = rag.faiss.METRIC_INNER_PRODUCT
+
+        def __init__(self):
+            self.k = None
+
+        def search(self, query_vector, k):
+            self.k = k
+            # Quantized scores put article 3 first
+            return [[0.9, 0.8, 0.7, -1.0]], [[3, 7, 5, -1]]
+
+    fake_index = FakeIndex()
+    ids = np.array([3, 5, 7], dtype=np.int64)
+    vectors = np.array([[0.5, 0.5, 0.0], [0.1, 0.9, 0.0], [0.95, 0.05, 0.0]], dtype=np.float32)
+    metadata = {
+        article_id: {"id": article_id, "title": str(article_id), "excerpt": "",
+                     "url": f"https://example.com/{article_id}", "category": "Others"}
+        for article_id in (3, 5, 7)
+    }
+    monkeypatch.setattr(rag, "FAISS_RERANK_FACTOR", 2)
+    monkeypatch.setattr(
+        rag, "generation", rag.IndexGeneration(fake_index, metadata, rag.VectorStore(ids, vectors))
+    )
+    monkeypatch.setattr(rag, "get_embedding_model", lambda: FakeEmbeddingModel())
+
+    articles = rag.retrieve_articles("reranked query", k=2)
+
+    assert fake_index.k == 4
+    assert [article["id"] for article in articles] == [7, 3]
+    assert articles[0]["relevance_score"] == pytest.approx(0.95)
+
+
+def test_refresh_index_swaps_generation_only_for_new_versions(monkeypatch):
+    class FakeIndex:
+        ntotal = 1
+
+    old = rag.IndexGeneration(FakeIndex(), {1: {"id": 1}}, version="v1")
+    manifests = [{"version": "v1", "files": {}}, {"version": "v2", "files": {}}]
+    built = []
+
+    def fake_build_generation(manifest):
+        built.append(manifest["version"])
+        return rag.IndexGeneration(FakeIndex(), {2: {"id": 2}}, version=manifest["version"])
+
+    monkeypatch.setattr(rag, "generation", old)
+    monkeypatch.setattr(rag, "index_version", "v1")
+    monkeypatch.setattr(rag, "download_manifest", lambda: manifests.pop(0))
+    monkeypatch.setattr(rag, "build_generation", fake_build_generation)
+    monkeypatch.setattr(rag, "prune", lambda manifest: None)
+
+    # A search that already read the old generation keeps using it
+    in_flight = rag.generation
+
+    assert rag.refresh_index() is False
+    assert rag.refresh_index() is True
+    assert built == ["v2"]
+    assert rag.generation.version == rag.index_version == "v2"
+    assert 2 in rag.generation.metadata
+    assert in_flight.metadata == {1: {"id": 1}}
+
+
+def test_retrieve_articles_pushes_filters_into_the_index_search(monkeypatch):
+    class FakeEmbeddingModel:
+        model_name = "fake-model"
+
+        def embed_query(self, query):
+            return [0.0, 1.0, 0.0]
+
+    class FakeIndex:
+        metric_type = rag.faiss.METRIC_INNER_PRODUCT
+
+        def __init__(self):
+            self.params = None
+
+        def search(self, query_vector, k, params=None):
+            self.params = params
+            return [[0.9, 0.7]], [[4, 8]]
+
+    articles = {
+        article_id: {"id": article_id, "text_hash": "0" * 40, "title": str(article_id), "excerpt": "",
+                     "url": f"https://example.com/{article_id}", "category": category, "source": "geo",
+                     "published_at": published_at}
+        for article_id, category, published_at in [
+            (4, "Sports and Athletics", 1_760_000_000),
+            (6, "Sports and Athletics", 1_700_000_000),
+            (8, "Sports and Athletics", 1_760_500_000),
+            (9, "National News from Pakistan", 1_760_500_000),
+        ]
+    }
+    fake_index = FakeIndex()
+    metadata = rag.MetadataStore.from_bytes(encode_metadata(articles))
+    monkeypatch.setattr(rag, "generation", rag.IndexGeneration(fake_index, metadata))
+    monkeypatch.setattr(rag, "get_embedding_model", lambda: FakeEmbeddingModel())
+    monkeypatch.setattr(rag, "search_parameters", lambda index, allowed_ids: ("selector", allowed_ids.tolist()))
+
+    results = rag.retrieve_articles(
+        "filtered query", k=2, category="Sports and Athletics", since=datetime(2025, 9, 1, tzinfo=timezone.utc)
+    )
+
+    assert fake_index.params == ("selector", [4, 8])
+    assert [article["id"] for article in results] == [4, 8]
+    assert rag.retrieve_articles("filtered query", k=2, category="Weather") == []
+
+
+def test_hybrid_retrieval_fuses_rankings_and_falls_back_to_bm25(monkeypatch):
+    class FakeIndex:
+        metric_type = rag.faiss.METRIC_INNER_PRODUCT
+
+        def search(self, query_vector, k):
+            return [[0.9, 0.8]], [[1, 2]]
+
+    class FakeLexical:
+        def search(self, query, k, allowed_ids=None):
+            return np.array([2, 3]), np.array([5.0, 1.0])
+
+    metadata = {
+        article_id: {"id": article_id, "title": str(article_id), "excerpt": "",
+                     "url": f"https://example.com/{article_id}", "category": "Others"}
+        for article_id in (1, 2, 3)
+    }
+    monkeypatch.setattr(rag, "generation", rag.IndexGeneration(FakeIndex(), metadata, lexical=FakeLexical()))
+    monkeypatch.setattr(rag, "embed_query", lambda query: np.array([1.0, 0.0, 0.0], dtype=np.float32))
+
+    hybrid = rag.retrieve_articles("psx", k=3, mode="hybrid")
+    assert [article["id"] for article in hybrid] == [2, 1, 3]
+    assert hybrid[0]["relevance_score"] < 1
+
+    vector = rag.retrieve_articles("psx", k=3, mode="vector")
+    assert [article["id"] for article in vector] == [1, 2]
+
+    def failing_embed_query(query):
+        raise rag.HTTPException(status_code=500, detail="Local embedding model is not configured")
+
+    monkeypatch.setattr(rag, "embed_query", failing_embed_query)
+    fallback = rag.retrieve_articles("psx", k=3, mode="vector")
+    assert [article["id"] for article in fallback] == [2, 3]
+    assert fallback[0]["relevance_score"] == pytest.approx(1.0)
+
+
+def test_passage_hits_are_grouped_per_article_by_best_score(monkeypatch, tmp_path):
+    class FakeIndex:
+        metric_type = rag.faiss.METRIC_INNER_PRODUCT
+        ntotal = 7
+
+        def __init__(self):
+            self.k = None
+
+        def search(self, query_vector, k):
+            self.k = k
+            # Passage ids are article_id * 4 + n
+            return [[0.9, 0.85, 0.7, 0.6, 0.5]], [[29, 28, 12, 30, 20]]
+
+    writer = PassageWriter(str(tmp_path / "passages.bin"), stride=4)
+    writer.add(3, ["PSX intro", "PSX closes higher"])
+    writer.add(5, ["Cricket intro"])
+    writer.add(7, ["Budget intro", "Senate debate", "Budget passes", "Opposition walks out"])
+    metadata = {
+        article_id: {"id": article_id, "title": str(article_id), "excerpt": "",
+                     "url": f"https://example.com/{article_id}", "category": "Others"}
+        for article_id in (3, 5, 7)
+    }
+    fake_index = FakeIndex()
+    monkeypatch.setattr(rag, "PASSAGE_SEARCH_FACTOR", 3)
+    monkeypatch.setattr(rag, "PASSAGES_PER_ARTICLE", 2)
+    monkeypatch.setattr(
+        rag, "generation", rag.IndexGeneration(fake_index, metadata, passages=PassageStore.open(writer.close()))
+    )
+    monkeypatch.setattr(rag, "embed_query", lambda query: np.array([1.0, 0.0, 0.0], dtype=np.float32))
+
+    articles = rag.retrieve_articles("senate budget", k=2, mode="vector")
+
+    assert fake_index.k == 6
+    assert [article["id"] for article in articles] == [7, 3]
+    assert articles[0]["relevance_score"] == pytest.approx(0.9)
+    assert articles[0]["passages"] == ["Senate debate", "Budget intro"]
+    assert articles[1]["passages"] == ["PSX intro"]
+
+
+def test_passage_search_deepens_until_k_articles_are_found(monkeypatch, tmp_path):
+    # Article 9 owns the eight best passages; articles 2 and 4 follow
+    ranked = [9 * 8 + n for n in range(8)] + [2 * 8, 4 * 8]
+
+    class FakeIndex:
+        metric_type = rag.faiss.METRIC_INNER_PRODUCT
+        ntotal = len(ranked)
+
+        def __init__(self):
+            self.depths = []
+
+        def search(self, query_vectors, k):
+            self.depths.append(k)
+            ids = ranked[:k]
+            scores = [1.0 - 0.05 * i for i in range(len(ids))]
+            return [scores] * len(query_vectors), [ids] * len(query_vectors)
+
+    writer = PassageWriter(str(tmp_path / "passages.bin"), stride=8)
+    writer.add(2, ["Tranche approved"])
+    writer.add(4, ["Reserves rise"])
+    writer.add(9, [f"IMF passage {n}" for n in range(8)])
+    metadata = {
+        article_id: {"id": article_id, "title": str(article_id), "excerpt": "",
+                     "url": f"https://example.com/{article_id}", "category": "Business"}
+        for article_id in (2, 4, 9)
+    }
+    fake_index = FakeIndex()
+    monkeypatch.setattr(rag, "PASSAGE_SEARCH_FACTOR", 2)
+    monkeypatch.setattr(
+        rag, "generation", rag.IndexGeneration(fake_index, metadata, passages=PassageStore.open(writer.close()))
+    )
+    monkeypatch.setattr(rag, "embed_query", lambda query: np.array([1.0, 0.0, 0.0], dtype=np.float32))
+
+    articles = rag.retrieve_articles("imf loan tranche", k=3, mode="vector")
+
+    assert [article["id"] for article in articles] == [9, 2, 4]
+    assert fake_index.depths == [6, 10]
+
+
+def test_retrieve_batch_encodes_once_and_searches_once_per_filter_group(monkeypatch):
+    encoded = []
+
+    class FakeEmbeddingModel:
+        model_name = "fake-model"
+
+        def embed_documents(self, texts):
+            encoded.append(list(texts))
+            return [[1.0, 0.0, 0.0] if "oil" in text else [0.0, 1.0, 0.0] for text in texts]
+
+    class FakeIndex:
+        metric_type = rag.faiss.METRIC_INNER_PRODUCT
+
+        def __init__(self):
+            self.calls = []
+
+        def search(self, query_vectors, k, params=None):
+            self.calls.append((len(query_vectors), k, params))
+            rows = [[[0.9, 0.5, 0.1], [1, 2, 3]] if vector[0] else [[0.8, 0.6, 0.2], [3, 2, 1]]
+                    for vector in query_vectors]
+            return [row[0] for row in rows], [row[1] for row in rows]
+
+    metadata = {
+        article_id: {"id": article_id, "title": str(article_id), "excerpt": "",
+                     "url": f"https://example.com/{article_id}", "category": category, "source": "geo",
+                     "published_at": 0, "text_hash": "0" * 40}
+        for article_id, category in [(1, "Business"), (2, "Business"), (3, "Sports")]
+    }
+    fake_index = FakeIndex()
+    monkeypatch.setattr(rag, "generation",
+                        rag.IndexGeneration(fake_index, rag.MetadataStore.from_bytes(encode_metadata(metadata))))
+    monkeypatch.setattr(rag, "get_embedding_model", lambda: FakeEmbeddingModel())
+    monkeypatch.setattr(rag, "query_embedding_cache", rag.LRUCache(maxsize=8))
+    monkeypatch.setattr(rag, "search_parameters", lambda index, allowed_ids: ("selector", allowed_ids.tolist()))
+
+    results = rag.retrieve_batch([
+        {"query": "Oil prices", "k": 1},
+        {"query": "cricket", "k": 3},
+        {"query": "oil  PRICES", "k": 2, "category": "Business"},
+        {"query": "weather", "k": 2, "category": "Weather"},
+    ], mode="vector")
+
+    assert encoded == [["oil prices", "cricket", "weather"]]
+    assert fake_index.calls == [(2, 3, None), (1, 2, ("selector", [1, 2]))]
+    assert [[article["id"] for article in articles] for articles in results] == [[1], [3, 2, 1], [1, 2], []]
+
+
+@pytest.mark.parametrize("factory", ["Flat", "HNSW16", "IVF4,Flat", "SQ8", "PQ4x4", "IVF4,PQ4x4", "PQ4x4fs", "IVF4,SQ8"])
+def test_filtered_search_works_for_every_index_family(real_faiss, monkeypatch, factory):
+    monkeypatch.setattr(rag, "faiss", real_faiss)
+    monkeypatch.setattr(rag, "FAISS_NPROBE", 4)
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((600, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = np.arange(600, dtype=np.int64) * 3
+    index = real_faiss.index_factory(8, f"IDMap2,{factory}", real_faiss.METRIC_INNER_PRODUCT)
+    index.train(vectors)
+    index.add_with_ids(vectors, ids)
+    allowed_ids = ids[::50]
+
+    results = rag.vector_search(rag.IndexGeneration(index, None), vectors[:2], 5, allowed_ids)
+
+    for found, _ in results:
+        assert len(found) == 5
+        assert set(found.tolist()) <= set(allowed_ids.tolist())
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from src.app.services import rag, startup
+from src.core import config
+
+
+class FakeGeneration:
+    version = "v2"
+    index = type("FakeIndex", (), {"ntotal": 4})()
+    vector_store = None
+
+
+@pytest.fixture
+def fresh_status(monkeypatch):
+    status = {**startup.status, "errors": {}}
+    monkeypatch.setattr(startup, "status", status)
+    monkeypatch.setattr(startup, "WARM_UP_QUERY", "warm up")
+    monkeypatch.setattr(startup, "get_llm", lambda: object())
+    monkeypatch.setattr(config, "embedding_model", None)
+    monkeypatch.setattr(rag, "generation", None)
+    monkeypatch.setattr(rag, "index_version", None)
+    return status
+
+
+def _load_model():
+    config.embedding_model = object()
+    return config.embedding_model
+
+
+def test_warm_up_loads_everything_then_runs_one_search(monkeypatch, fresh_status):
+    searches = []
+
+    def load_index():
+        rag.generation = FakeGeneration()
+        return True
+
+    monkeypatch.setattr(startup, "get_embedding_model", _load_model)
+    monkeypatch.setattr(startup, "load_faiss_index", load_index)
+    monkeypatch.setattr(startup, "retrieve_articles", lambda query, k: searches.append((query, k)) or [])
+
+    assert asyncio.run(startup.warm_up()) is True
+
+    assert searches == [("warm up", 1)]
+    ready = startup.readiness()
+    assert ready["ready"] and ready["warmed_up"] and ready["llm_client"]
+    assert ready["index_version"] == "v2"
+    assert ready["errors"] == {}
+    assert ready["startup_seconds"] is not None
+
+
+def test_warm_up_stays_unready_when_a_step_fails(monkeypatch, fresh_status):
+    def broken_model():
+        raise RuntimeError("model download failed")
+
+    monkeypatch.setattr(startup, "get_embedding_model", broken_model)
+    monkeypatch.setattr(startup, "load_faiss_index", lambda: False)
+    monkeypatch.setattr(startup, "retrieve_articles", lambda query, k: pytest.fail("searched without an index"))
+
+    assert asyncio.run(startup.warm_up()) is False
+
+    assert startup.readiness()["ready"] is False
+    assert fresh_status["errors"] == {"model": "model download failed", "index": "not available"}
+
+
+def test_worker_becomes_ready_when_the_index_is_published_after_start_up(monkeypatch, fresh_status):
+    monkeypatch.setattr(startup, "get_embedding_model", _load_model)
+    monkeypatch.setattr(startup, "load_faiss_index", lambda: False)
+
+    assert asyncio.run(startup.warm_up()) is False
+    assert startup.readiness()["ready"] is False
+
+    # watch_index swaps in the first published generation
+    monkeypatch.setattr(rag, "build_generation", lambda manifest: FakeGeneration())
+    monkeypatch.setattr(rag, "download_manifest", lambda: {"version": "v2"})
+    monkeypatch.setattr(rag, "prune", lambda manifest: None)
+    assert rag.refresh_index() is True
+
+    ready = startup.readiness()
+    assert ready["ready"] is True
+    assert ready["index_version"] == "v2"
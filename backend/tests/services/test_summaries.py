@@ -0,0 +1,82 @@
+import asyncio
+
+from src.app.services import summaries
+from src.app.services.cache import LRUCache
+from src.app.services.singleflight import SingleFlight
+
+ARTICLE = {
+    "id": 42,
+    "title": "Senate passes finance bill",
+    "excerpt": "The bill now goes to the President.",
+    "content": "The Senate approved the finance bill on Friday.",
+}
+
+
+def _isolate(monkeypatch, stored=None):
+    saved = []
+    monkeypatch.setattr(summaries, "summary_cache", LRUCache(maxsize=8))
+    monkeypatch.setattr(summaries, "summary_flight", SingleFlight())
+    monkeypatch.setattr(summaries, "get_stored_summary", lambda article_id, article_hash: stored)
+    monkeypatch.setattr(summaries, "store_summary", lambda *row: saved.append(row))
+    return saved
+
+
+def test_concurrent_requests_share_one_llm_call(monkeypatch):
+    saved = _isolate(monkeypatch)
+    calls = []
+
+    async def slow_summary(article):
+        calls.append(article["id"])
+        await asyncio.sleep(0.01)
+        return "fresh summary"
+
+    monkeypatch.setattr(summaries, "agenerate_article_summary", slow_summary)
+
+    async def run():
+        return await asyncio.gather(*(summaries.get_or_create_summary(ARTICLE) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["fresh summary"] * 5
+    assert calls == [42]
+    assert saved == [(42, summaries.content_hash(ARTICLE), "fresh summary")]
+
+
+def test_stored_summary_skips_the_llm(monkeypatch):
+    _isolate(monkeypatch, stored="stored summary")
+
+    async def unexpected(article):
+        raise AssertionError("LLM should not be called")
+
+    monkeypatch.setattr(summaries, "agenerate_article_summary", unexpected)
+
+    assert asyncio.run(summaries.get_or_create_summary(ARTICLE)) == "stored summary"
+    assert summaries.content_hash(ARTICLE) != summaries.content_hash({**ARTICLE, "content": "Edited."})
+
+
+def test_concurrent_streams_share_one_llm_stream(monkeypatch):
+    saved = _isolate(monkeypatch)
+    monkeypatch.setattr(summaries, "summary_streams", {})
+    calls = []
+
+    async def slow_stream(article):
+        calls.append(article["id"])
+        for chunk in ("Senate ", "passes ", "bill"):
+            await asyncio.sleep(0.005)
+            yield chunk
+
+    async def collect():
+        return [chunk async for chunk in summaries.stream_summary(ARTICLE)]
+
+    async def late_collect():
+        await asyncio.sleep(0.008)
+        return await collect()
+
+    monkeypatch.setattr(summaries, "astream_article_summary", slow_stream)
+
+    async def run():
+        return await asyncio.gather(collect(), collect(), late_collect(), summaries.get_or_create_summary(ARTICLE))
+
+    first, second, late, summary = asyncio.run(run())
+    assert first == second == late == ["Senate ", "passes ", "bill"]
+    assert summary == "Senate passes bill"
+    assert calls == [42]
+    assert saved == [(42, summaries.content_hash(ARTICLE), "Senate passes bill")]
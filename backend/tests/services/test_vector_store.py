@@ -0,0 +1,28 @@
+import numpy as np
+
+from src.app.services.vector_store import VectorStore, VectorStoreWriter
+
+
+def test_rerank_scores_memory_mapped_vectors_and_skips_unknown_ids(tmp_path):
+    ids = np.array([2, 4, 9], dtype=np.int64)
+    vectors = np.array([[0.0, 1.0], [0.6, 0.8], [1.0, 0.0]], dtype=np.float32)
+    np.save(tmp_path / "vector_ids.npy", ids)
+    np.save(tmp_path / "vectors.npy", vectors)
+
+    store = VectorStore.open(tmp_path / "vector_ids.npy", tmp_path / "vectors.npy")
+    best_ids, scores = store.rerank(np.array([1.0, 0.0], dtype=np.float32), [4, 11, 2, 9, -1], k=2)
+
+    assert isinstance(store.vectors, np.memmap)
+    assert best_ids.tolist() == [9, 4]
+    assert np.allclose(scores, [1.0, 0.6])
+
+
+def test_vector_store_writer_sorts_spooled_rows_by_id(tmp_path):
+    writer = VectorStoreWriter(str(tmp_path), dimension=2)
+    writer.add([9, 2], [[1.0, 0.0], [0.0, 1.0]])
+    writer.add([4], [[0.6, 0.8]])
+
+    store = VectorStore.open(*writer.close())
+
+    assert store.ids.tolist() == [2, 4, 9]
+    assert np.allclose(store.lookup([9, 4]), [[1.0, 0.0], [0.6, 0.8]])